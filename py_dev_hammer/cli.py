@@ -0,0 +1,182 @@
+"""
+The pydevhammer command: report a build's results, run the analysis tools and report theirs, flush
+results spooled by earlier builds, serve build events with clients kept warm between them, or export
+the build history of every branch.
+"""
+
+# pylint: disable=logging-fstring-interpolation
+
+import json
+import os
+import sys
+import time
+
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.general import logger, get_certs
+
+
+def main(args=None):
+    """
+    Dispatches to a subcommand and returns the exit status.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='pydevhammer', description="Python development tools using AWS and GitHub.")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser(
+        'report', add_help=False,
+        help="analyse build results and report them (takes github_status_posting's options)"
+    )
+    subparsers.add_parser(
+        'run', add_help=False,
+        help="run each tests_to_run command concurrently, then report the results as 'report' does"
+    )
+    flush_parser = subparsers.add_parser(
+        'flush', help="report results spooled by builds running with reporting.mode 'spool'")
+    flush_parser.add_argument(
+        '--spool-dir', metavar='DIR', help="spool to flush (defaults to reporting.spool_dir)")
+
+    serve_parser = subparsers.add_parser(
+        'serve', help="report a build per line of JSON events in FILE, keeping clients warm")
+    serve_parser.add_argument(
+        'events', metavar='FILE', nargs='?', default='-', help="events to read (defaults to stdin)")
+
+    history_parser = subparsers.add_parser(
+        'history', help="write every branch's build scores as CSV or JSON Lines")
+    history_parser.add_argument(
+        '--days', type=float, metavar='N', help="only builds started in the last N days")
+    history_parser.add_argument(
+        '--branch', metavar='PREFIX', help="only branches whose name starts with PREFIX")
+    history_parser.add_argument(
+        '--test-type', dest='test_types', action='append', metavar='NAME',
+        help="a test type to include, may be repeated (defaults to every configured test type)")
+    history_parser.add_argument(
+        '--latest', action='store_true',
+        help="one row per branch with its latest scores and their change over the builds read")
+    history_parser.add_argument('--format', choices=('csv', 'json'), default='csv')
+    history_parser.add_argument(
+        '--output', metavar='FILE', default='-', help="file to write (defaults to stdout)")
+    history_parser.add_argument(
+        '--segments', type=int, default=8, metavar='N', help="scans or queries to run at once")
+    history_parser.add_argument(
+        '--create-index', action='store_true',
+        help="add dynamo.history_index_name to the table and record the day of earlier builds")
+
+    options, remaining_args = parser.parse_known_args(args)
+    if options.command == 'report':
+        from py_dev_hammer.github_status_posting import entry_point
+
+        entry_point(remaining_args)
+        return 0
+    if options.command == 'run':
+        from py_dev_hammer.github_status_posting import runner_entry_point
+
+        runner_entry_point(remaining_args)
+        return 0
+    if options.command == 'flush':
+        return _flush(options.spool_dir)
+    if options.command == 'serve':
+        return _serve(options.events)
+    if options.command == 'history':
+        return _history(options)
+    parser.print_help()
+    return 2
+
+
+def _flush(spool_dir):
+    from py_dev_hammer.github_status_posting import USER_CONFIG, flush_spool
+
+    try:
+        os.environ['REQUESTS_CA_BUNDLE'] = get_certs()
+        flush_spool(USER_CONFIG, spool_dir)
+    except GeneralError as gen_err:
+        logger.error(f"GeneralError flushing spooled results: {gen_err}")
+        return 1
+    return 0
+
+
+def _serve(events_file):
+    """
+    Hands each event to event_handler as it is read and writes its summary, or error, as a line of
+    JSON to stdout. An event that fails for any reason is logged and the next one is served.
+    Returns 1 if any event couldn't be reported.
+    """
+    from py_dev_hammer.github_status_posting import event_handler
+
+    failed = False
+    events = sys.stdin if events_file == '-' else open(events_file)
+    with events:
+        for line in events:
+            if not line.strip():
+                continue
+            try:
+                result = event_handler(json.loads(line))
+            except Exception as err:  # pylint: disable=broad-except
+                logger.error(f"Couldn't handle build event: {err}", exc_info=True)
+                result = {'error': str(err)}
+                failed = True
+            print(json.dumps(result), flush=True)
+    return 1 if failed else 0
+
+
+def _history(options):
+    """
+    Streams the build history of every branch to options.output, or creates the history index.
+    Recent builds are read from the index once it is active, and otherwise from a segmented scan.
+    """
+    from py_dev_hammer.github_status_posting import APP_CONFIG, TEST_REGISTRY, USER_CONFIG
+    from py_dev_hammer.utils.aws import connect_to_aws_resource, get_boto_client
+    from py_dev_hammer.utils import history_report
+
+    try:
+        os.environ['REQUESTS_CA_BUNDLE'] = get_certs()
+        dynamo_config = APP_CONFIG['dynamo']
+        resource = connect_to_aws_resource('dynamodb', USER_CONFIG)
+        if options.create_index:
+            if not dynamo_config.get('history_index_name'):
+                raise GeneralError("No dynamo.history_index_name in the app config")
+            history_report.create_history_index(
+                get_boto_client('dynamodb', USER_CONFIG), resource, dynamo_config,
+                options.segments
+            )
+            return 0
+
+        test_types = options.test_types or list(TEST_REGISTRY)
+        unknown = [test_type for test_type in test_types if test_type not in TEST_REGISTRY]
+        if unknown:
+            raise GeneralError(f"Unknown test types: {unknown}")
+        since = None
+        use_index = False
+        if options.days is not None:
+            since = time.time() - options.days * history_report.SECONDS_PER_DAY
+            use_index = bool(dynamo_config.get('history_index_name')) and (
+                history_report.is_history_index_active(
+                    get_boto_client('dynamodb', USER_CONFIG), dynamo_config))
+            if not use_index:
+                logger.info("History index isn't active, scanning the table")
+
+        rows = history_report.read_history(
+            resource, dynamo_config, test_types, since, options.branch, options.segments,
+            use_index
+        )
+        if options.latest:
+            rows = history_report.summarise_branches(
+                rows, test_types, dynamo_config['sort_key_name'])
+        columns = history_report.get_columns(
+            test_types, dynamo_config['sort_key_name'], options.latest)
+        output = sys.stdout if options.output == '-' else open(options.output, 'w', newline='')
+        try:
+            count = history_report.write_rows(rows, output, options.format, columns)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    except GeneralError as gen_err:
+        logger.error(f"GeneralError exporting build history: {gen_err}")
+        return 1
+    logger.info(f"Wrote {count} rows of build history")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
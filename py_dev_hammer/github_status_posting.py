@@ -1,78 +1,753 @@
 """
-This carries out dynamic and static code analysis and POSTs the results to GitHub as statuses.
-Without passing statuses, a pull request cannot be merged. Dynamic tests require 100% passing to be
-considered a success. The static tests are informational only and will always generate success if
-they run correctly.
+This carries out dynamic and static code analysis and POSTs the results to GitHub as statuses, or
+as a single Check Run. The analysis tools either run beforehand and leave their results in files,
+or run here concurrently with their output parsed as it is produced. Without passing statuses, a
+pull request cannot be merged. Dynamic tests require 100% passing to be considered a success. The
+static tests are informational only and will always generate success if they run correctly.
 """
 
 # pylint: disable=logging-fstring-interpolation
 
 import decimal
+import hashlib
 import json
 import os
 import re
+import shlex
+import tempfile
+import threading
 import time
-
-import dpath
-import requests
-from requests.exceptions import MissingSchema
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from xml.etree.ElementTree import ParseError
 
 from py_dev_hammer.utils.aws import (
-    connect_to_aws_resource, get_items_by_partition_key, put_with_partition_and_sort_key,
-    get_boto_client,
+    connect_to_aws_resource, get_latest_items_by_partition_key, put_with_partition_and_sort_key,
+    get_boto_client, get_ssm_parameters, get_with_partition_and_sort_key, update_if_version_matches,
+    update_if_not_newer,
+    batch_get_with_partition_and_sort_key, batch_put_with_partition_and_sort_key,
+    DEFAULT_MAX_POOL_CONNECTIONS,
 )
 from py_dev_hammer.utils.errors import GeneralError
-from py_dev_hammer.utils.general import logger, load_config_file, get_certs
+from py_dev_hammer.utils.general import logger, LazyConfig, get_certs, DEFAULT_CACHE_DIR
+from py_dev_hammer.utils.github import (
+    DEFAULT_CHECK_NAME, RateLimiter, complete_check_run, create_check_run_payload,
+    filter_unchanged_statuses, get_combined_status, send_json, start_check_run,
+)
+from py_dev_hammer.utils.file_coverage import (
+    FILE_COVERAGE_SUFFIX, get_coverage_changes, get_total_coverage_rate, pack_file_coverage,
+    unpack_file_coverage,
+)
+from py_dev_hammer.utils.history import History
+from py_dev_hammer.utils.history_report import BUILD_DAY_NAME, get_build_day
+from py_dev_hammer.utils.incremental import (
+    ResultCache, aggregate, hash_files, parse_file_results, DEFAULT_CACHE_MAX_ENTRIES,
+)
+from py_dev_hammer.utils.metrics import (
+    PROFILE_METRICS_FILE, metrics, start_profiling, stop_profiling,
+)
+from py_dev_hammer.utils.parsers import (
+    FORMAT_COBERTURA, MATCH_FIRST, parse_junit_xml, parse_junit_with_regex, parse_cobertura_xml,
+    find_first_match, find_last_match, match_lines,
+)
+from py_dev_hammer.utils.registry import BETTER_LOWER, load_app_config, load_test_registry
+from py_dev_hammer.utils.rollups import (
+    HEAD_COMMIT_NAME, HEAD_STARTED_AT_NAME, ROLLUP_VERSION_NAME, get_rollup_key, get_trend, roll_up,
+)
+from py_dev_hammer.utils.runner import run_command
+from py_dev_hammer.utils.spool import Spool
 
-APP_CONFIG = load_config_file(f"{os.environ.get('CONFIG_DIR')}/app_config.yml")
-USER_CONFIG = load_config_file(f"{os.environ.get('CONFIG_DIR')}/user_config.yml")
+APP_CONFIG = LazyConfig('app_config.yml', loader=load_app_config)
+TEST_REGISTRY = LazyConfig('app_config.yml', loader=load_test_registry)
+USER_CONFIG = LazyConfig('user_config.yml')
+PREVIOUS_BUILDS_TO_FETCH = 1
+COMMIT_SHA_NAME = 'commit_sha'
+ROLLUP_ATTEMPTS = 3
+CHANGE_DECIMAL_PLACES = 2
+DEFAULT_GITHUB_WORKERS = 8
+GITHUB_DESCRIPTION_LENGTH = 140
+REPORTER_STATUSES = 'statuses'
+REPORTER_CHECKS = 'checks'
+METRICS_REPORT_ENV = 'PYDEVHAMMER_METRICS_REPORT'
+REPORTING_SYNC = 'sync'
+REPORTING_SPOOL = 'spool'
+DEFAULT_SPOOL_DIR = os.path.join(DEFAULT_CACHE_DIR, 'spool')
+DEFAULT_FLUSH_ATTEMPTS = 3
+FLUSH_BACKOFF_BASE = 1
+FLUSH_BACKOFF_CAP = 30
+FLUSH_LOG_FILE = 'flush.log'
+SPOOLED_ENVIRONMENT = ('CODEBUILD_GIT_BRANCH', 'CODEBUILD_SOURCE_VERSION', 'CODEBUILD_START_TIME')
+INCREMENTAL_BATCH_FILES = 200
+SUBPROJECT_SEPARATOR = '#'
+EVENT_ENVIRONMENT = {
+    'build_arn': 'CODEBUILD_BUILD_ARN',
+    'git_branch': 'CODEBUILD_GIT_BRANCH',
+    'source_version': 'CODEBUILD_SOURCE_VERSION',
+    'start_time': 'CODEBUILD_START_TIME',
+}
+OPTIONAL_EVENT_KEYS = ('start_time',)
+SUPERSEDED_DYNAMIC = 'dynamic'
+SUPERSEDED_SKIP = 'skip'
+SUPERSEDED_ALL = 'all'
+DEFAULT_DOWNLOAD_WORKERS = 8
+_GITHUB_SESSIONS = {}
+_GITHUB_SESSIONS_LOCK = threading.Lock()
 
 
-def entry_point():
+def entry_point(args=None, run_tools=False):
     """
     Allows the module to be called from the command line.
     """
     logger.info("Starting at entry point")
 
-    dynamic_test_types = list(APP_CONFIG['tests_to_run']['dynamic'].keys())
-    static_test_types = list(APP_CONFIG['tests_to_run']['static'].keys())
-    test_types = dynamic_test_types + static_test_types
-
-    static_results_dir = os.path.join(
-        APP_CONFIG['static_analysis']['root_dir'], APP_CONFIG['static_analysis']['results_dir'])
-    test_parameters = [
-        _create_test_parameters_dict(test_type, static_results_dir) for test_type in test_types]
-    target_url = _parse_url_from_arn(USER_CONFIG)
-    os.environ['REQUESTS_CA_BUNDLE'] = get_certs()
+    options = _parse_arguments(args)
+    metrics_report = options.metrics_report or os.environ.get(METRICS_REPORT_ENV)
+    if options.profile and not metrics_report:
+        metrics_report = os.path.join(options.profile, PROFILE_METRICS_FILE)
+    if metrics_report:
+        metrics.enable()
+    profiler = start_profiling() if options.profile else None
 
     try:
-        _execute(USER_CONFIG, test_parameters, target_url, dynamic_test_types, static_test_types)
+        with metrics.span('stage.config'):
+            subprojects = USER_CONFIG.get('subprojects')
+            if subprojects and run_tools:
+                raise GeneralError(
+                    "Running the analysis tools isn't supported with subprojects, run them in "
+                    "buildspec.yml and report their results instead"
+                )
+            test_parameters = _create_build_test_parameters(subprojects)
+            target_url = _parse_url_from_arn(USER_CONFIG)
+            os.environ['REQUESTS_CA_BUNDLE'] = get_certs()
+
+        if subprojects:
+            _execute_subprojects(USER_CONFIG, test_parameters, target_url)
+        else:
+            _execute(USER_CONFIG, test_parameters, target_url, run_tools)
     except GeneralError as gen_err:
         logger.error(f"GeneralError in GitHub Status Posting: {gen_err}", exc_info=True)
     else:
         logger.info("Successfully executed GitHub Status Posting")
+    finally:
+        if profiler is not None:
+            stop_profiling(profiler, options.profile)
+        if metrics_report:
+            metrics.write_report(metrics_report)
+            metrics.disable()
+
+
+def event_handler(event, context=None):  # pylint: disable=unused-argument
+    """
+    Reports one build described by an event, so reporting can run in AWS Lambda or another
+    long-lived process. The event gives the build's `build_arn`, `git_branch` and
+    `source_version`, and optionally its `start_time`, in place of the CodeBuild variables, and
+    where its results are: `results_dir`, a local directory laid out like the source directory, or
+    `s3_bucket` and `s3_prefix`, a copy of it in S3. Config, AWS clients, SSM parameters,
+    certificates and GitHub sessions are kept between events, so only the first event handled by a
+    process pays for setting them up. Returns a summary of the build reported, and raises
+    GeneralError if it couldn't be, including when the event isn't a JSON object.
+    """
+    if not isinstance(event, Mapping):
+        raise GeneralError(f"Build event isn't a JSON object: {event!r}")
+    logger.info(f"Handling build event: {event.get('build_arn')}")
+
+    missing = [
+        key for key in EVENT_ENVIRONMENT if key not in OPTIONAL_EVENT_KEYS and not event.get(key)]
+    if missing:
+        raise GeneralError(f"Build event is missing {missing}")
+    environment = {
+        name: str(event[key]) if event.get(key) is not None else None
+        for key, name in EVENT_ENVIRONMENT.items()
+    }
 
+    user_config = dict(USER_CONFIG)
+    # Lambda has no shared memory for a process pool
+    user_config['parsing'] = dict({'executor': 'thread'}, **USER_CONFIG.get('parsing', {}))
+    subprojects = user_config.get('subprojects')
+    with _build_environment(environment), tempfile.TemporaryDirectory() as download_dir:
+        with metrics.span('stage.config'):
+            os.environ['REQUESTS_CA_BUNDLE'] = get_certs()
+            source_dir = event.get('results_dir', download_dir)
+            test_parameters = _create_build_test_parameters(subprojects, source_dir)
+            if event.get('s3_bucket'):
+                _download_results(user_config, event, test_parameters, source_dir)
+            target_url = _parse_url_from_arn(user_config)
 
-def _execute(user_config, test_parameters, target_url, dynamic_test_types, static_test_types):
+        if subprojects:
+            _execute_subprojects(user_config, test_parameters, target_url)
+        else:
+            _execute(user_config, test_parameters, target_url)
+    return {'build_arn': event['build_arn'], 'test_types': len(test_parameters)}
+
+
+def _download_results(user_config, event, test_parameters, download_dir):
+    logger.info(f"Downloading results from S3: s3://{event['s3_bucket']}/{event.get('s3_prefix')}")
+
+    client = get_boto_client('s3', user_config)
+    input_files = sorted({test_parameter['input_file'] for test_parameter in test_parameters})
+    with ThreadPoolExecutor(
+            max_workers=max(1, min(DEFAULT_DOWNLOAD_WORKERS, len(input_files)))) as executor:
+        futures = [
+            executor.submit(
+                _download_result, client, event['s3_bucket'],
+                '/'.join(filter(None, [
+                    event.get('s3_prefix', '').strip('/'),
+                    os.path.relpath(input_file, download_dir).replace(os.sep, '/')
+                ])),
+                input_file
+            )
+            for input_file in input_files
+        ]
+    for future in futures:
+        future.result()
+
+
+def _download_result(client, bucket, key, input_file):
+    from botocore.exceptions import ClientError
+
+    os.makedirs(os.path.dirname(input_file), exist_ok=True)
+    try:
+        with metrics.span('s3.GetObject'):
+            client.download_file(bucket, key, input_file)
+    except ClientError as cli_err:
+        # Left missing, so its test type is reported as a parse error like a missing local file
+        logger.warning(f"Couldn't download s3://{bucket}/{key}: {cli_err}")
+
+
+def runner_entry_point(args=None):
+    """
+    Allows the module to be called from the command line to run the analysis tools as well.
+    """
+    entry_point(args, run_tools=True)
+
+
+def _parse_arguments(args):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Analyse build results and report them to GitHub.")
+    parser.add_argument(
+        '--metrics-report', metavar='FILE',
+        help=f"write per-stage timings as JSON to FILE (or set {METRICS_REPORT_ENV})"
+    )
+    parser.add_argument(
+        '--profile', metavar='DIR',
+        help="write cProfile stats, top memory allocations and the metrics report to DIR"
+    )
+    options, _ = parser.parse_known_args(args)
+    return options
+
+
+def _execute(user_config, test_parameters, target_url, run_tools=False):
     logger.info("Executing main function")
 
-    pytest_state = 'failure'
-    dynamo_payload = {}
-    for test_parameter in test_parameters:
-        if test_parameter.get('test_type') in dynamic_test_types:
-            pytest_state, score = _parse_pytest(test_parameter)
-            dynamo_payload = _update_dynamo_payload(test_parameter, score, dynamo_payload)
-        elif test_parameter.get('test_type') in static_test_types:
-            score = _parse_quality_indicator_tests(test_parameter)
-            dynamo_payload = _update_dynamo_payload(test_parameter, score, dynamo_payload)
+    reporter = user_config['github'].get('reporter', REPORTER_STATUSES)
+    spooled = user_config.get('reporting', {}).get('mode', REPORTING_SYNC) == REPORTING_SPOOL
+    check_run_url = None
+    if reporter == REPORTER_CHECKS and not spooled:
+        check_run_url = _start_check_run(user_config, target_url)
+
+    if run_tools:
+        with metrics.span('stage.run', test_types=len(test_parameters)):
+            pytest_state, dynamo_payload, parse_errors, file_coverage = _run_test_results(
+                user_config, test_parameters)
+    else:
+        with metrics.span('stage.parse', test_types=len(test_parameters)):
+            pytest_state, dynamo_payload, parse_errors, file_coverage = _parse_test_results(
+                user_config, test_parameters)
+
+    build_start_time = int(time.time())
+    if spooled:
+        with metrics.span('stage.spool'):
+            _spool_results(
+                user_config, target_url, build_start_time, pytest_state, dynamo_payload,
+                parse_errors, file_coverage
+            )
+        return
+    _report_results(
+        user_config, target_url, build_start_time, pytest_state, dynamo_payload, parse_errors,
+        check_run_url, file_coverage
+    )
+
+
+def _execute_subprojects(user_config, test_parameters, target_url):
+    """
+    Reports every subproject of a monorepo in one pass. All their results are parsed on one pool,
+    their builds are written to DynamoDB in batches under partitions namespaced by subproject, and
+    their statuses, with contexts namespaced the same way, are posted through one GitHub session.
+    """
+    logger.info("Executing main function for subprojects")
+
+    reporter = user_config['github'].get('reporter', REPORTER_STATUSES)
+    if user_config.get('reporting', {}).get('mode', REPORTING_SYNC) == REPORTING_SPOOL:
+        logger.warning("Spooling isn't supported with subprojects, reporting results now")
+    check_run_url = None
+    if reporter == REPORTER_CHECKS:
+        check_run_url = _start_check_run(user_config, target_url)
+
+    with metrics.span('stage.parse', test_types=len(test_parameters)):
+        subproject_results = _parse_subproject_results(user_config, test_parameters)
 
     build_start_time = int(time.time())
-    dynamo_items = _maintain_state_in_dynamo(user_config, build_start_time, dynamo_payload)
+    with metrics.span('stage.dynamodb', subprojects=len(subproject_results)):
+        superseded = not _claim_branch_head(user_config, build_start_time)
+        subproject_state = _maintain_subproject_state_in_dynamo(
+            user_config, build_start_time, subproject_results, superseded)
 
+    github_payloads = []
+    parse_errors = {}
+    coverage_changes = {}
+    for subproject, results in subproject_results.items():
+        pytest_state, dynamo_payload, subproject_parse_errors, _ = results
+        dynamo_items, rollup_metrics = subproject_state[subproject]
+        subproject_coverage_changes = _get_coverage_changes(dynamo_items)
+        subproject_payloads = _create_github_payloads(
+            pytest_state, target_url, dynamo_payload, dynamo_items, rollup_metrics,
+            subproject_coverage_changes, superseded
+        )
+        subproject_payloads.extend(
+            _create_parse_error_payloads(target_url, subproject_parse_errors))
+        if superseded:
+            subproject_payloads = _select_superseded_payloads(user_config, subproject_payloads)
+        for github_payload in subproject_payloads:
+            github_payload['context'] = _get_subproject_name(subproject, github_payload['context'])
+            github_payloads.append(github_payload)
+        parse_errors.update({
+            _get_subproject_name(subproject, test_type): parse_error
+            for test_type, parse_error in subproject_parse_errors.items()
+        })
+        coverage_changes.update({
+            _get_subproject_name(subproject, test_type): changes
+            for test_type, changes in subproject_coverage_changes.items()
+        })
+    _send_github_payloads(
+        user_config, target_url, github_payloads, parse_errors, check_run_url, coverage_changes)
+
+
+def _report_results(user_config, target_url, build_start_time, pytest_state, dynamo_payload,
+                    parse_errors, check_run_url=None, file_coverage=None):
+    with metrics.span('stage.dynamodb'):
+        superseded = not _claim_branch_head(user_config, build_start_time)
+        dynamo_items, rollup_metrics = _maintain_state_in_dynamo(
+            user_config, build_start_time, dynamo_payload, file_coverage, superseded)
+
+    coverage_changes = _get_coverage_changes(dynamo_items)
     github_payloads = _create_github_payloads(
-        pytest_state, target_url, dynamo_payload, dynamo_items)
-    for github_payload in github_payloads:
-        _post_to_github_status(github_payload, user_config)
+        pytest_state, target_url, dynamo_payload, dynamo_items, rollup_metrics, coverage_changes,
+        superseded
+    )
+    github_payloads.extend(_create_parse_error_payloads(target_url, parse_errors))
+    if superseded:
+        github_payloads = _select_superseded_payloads(user_config, github_payloads)
+    _send_github_payloads(
+        user_config, target_url, github_payloads, parse_errors, check_run_url, coverage_changes)
+
+
+def _select_superseded_payloads(user_config, github_payloads):
+    """
+    Returns the statuses still worth posting for a commit that is no longer its branch's head: by
+    default only those of dynamic test types, which gate merging, or none or all of them as
+    github.superseded says. A Check Run has already been started, so it is always completed.
+    """
+    if user_config['github'].get('reporter', REPORTER_STATUSES) == REPORTER_CHECKS:
+        return github_payloads
+    mode = user_config['github'].get('superseded', SUPERSEDED_DYNAMIC)
+    if mode == SUPERSEDED_ALL:
+        return github_payloads
+    if mode == SUPERSEDED_SKIP:
+        logger.info(f"Skipping all {len(github_payloads)} GitHub statuses of a superseded build")
+        return []
+    selected = [
+        github_payload for github_payload in github_payloads
+        if github_payload.get('context') in TEST_REGISTRY
+        and TEST_REGISTRY[github_payload.get('context')].dynamic
+    ]
+    logger.info(
+        f"Skipping {len(github_payloads) - len(selected)} static GitHub statuses of a superseded "
+        f"build"
+    )
+    return selected
+
+
+def _send_github_payloads(user_config, target_url, github_payloads, parse_errors, check_run_url,
+                          coverage_changes):
+    reporter = user_config['github'].get('reporter', REPORTER_STATUSES)
+    with metrics.span('stage.github', reporter=reporter, payloads=len(github_payloads)):
+        if reporter == REPORTER_CHECKS:
+            session, github_urls = _create_github_session(user_config, 1)
+            complete_check_run(
+                session, github_urls.get('check_runs'),
+                create_check_run_payload(
+                    github_payloads, parse_errors, _get_check_name(user_config), target_url,
+                    coverage_changes
+                ),
+                check_run_url, os.environ.get('CODEBUILD_SOURCE_VERSION')
+            )
+        else:
+            _post_github_payloads(github_payloads, user_config)
+
+
+def _spool_results(user_config, target_url, build_start_time, pytest_state, dynamo_payload,
+                   parse_errors, file_coverage=None):
+    logger.info("Spooling results to report later")
+
+    reporting_config = user_config.get('reporting', {})
+    entry = {
+        'build_start_time': build_start_time,
+        'target_url': target_url,
+        'pytest_state': pytest_state,
+        'dynamo_payload': {test_type: str(score) for test_type, score in dynamo_payload.items()},
+        'parse_errors': parse_errors,
+        'file_coverage': file_coverage or {},
+        'environment': {name: os.environ.get(name) for name in SPOOLED_ENVIRONMENT},
+    }
+    # The same results spooled twice by one build, say by a retried phase, share an id
+    entry_key = json.dumps(
+        dict(entry, build_start_time=None, build_arn=os.environ.get('CODEBUILD_BUILD_ARN')),
+        sort_keys=True
+    )
+    entry['id'] = hashlib.sha256(entry_key.encode()).hexdigest()
+    spool_dir = reporting_config.get('spool_dir', DEFAULT_SPOOL_DIR)
+    Spool(spool_dir).append(entry)
+    if reporting_config.get('background_flush', True):
+        _start_background_flush(spool_dir)
+
+
+def _start_background_flush(spool_dir):
+    logger.info("Starting background flush of spooled results")
+
+    import subprocess
+    import sys
+
+    spool_dir = os.path.expanduser(spool_dir)
+    with open(os.path.join(spool_dir, FLUSH_LOG_FILE), 'a') as flush_log:
+        subprocess.Popen(
+            [sys.executable, '-m', 'py_dev_hammer.cli', 'flush', '--spool-dir', spool_dir],
+            stdin=subprocess.DEVNULL, stdout=flush_log, stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+
+
+def flush_spool(user_config, spool_dir=None):
+    """
+    Reports spooled results in the order they were spooled and returns how many were sent. Each
+    entry is retried with backoff; one that still fails stops the flush, leaving it and everything
+    after it for next time. Re-reporting an entry is harmless, as its DynamoDB put and rollup are
+    keyed on the build and commit and unchanged GitHub statuses are skipped, so a crash mid-entry
+    only repeats that entry.
+    """
+    reporting_config = user_config.get('reporting', {})
+    spool = Spool(spool_dir or reporting_config.get('spool_dir', DEFAULT_SPOOL_DIR))
+    max_attempts = reporting_config.get('max_attempts', DEFAULT_FLUSH_ATTEMPTS)
+    logger.info(f"Flushing spooled results: {spool.spool_dir}")
+
+    flushed = 0
+    with spool.lock() as locked:
+        if not locked:
+            logger.info("Another flush is already running, leaving the spool to it")
+            return flushed
+        flushed_ids = set(spool.read_checkpoint()['flushed_ids'])
+        for offset, entry in spool.pending():
+            if entry['id'] in flushed_ids:
+                logger.info(f"Skipping spooled entry that was already reported: {entry['id']}")
+            else:
+                _flush_spool_entry(user_config, entry, max_attempts)
+                flushed += 1
+            spool.commit(offset, entry['id'])
+            flushed_ids.add(entry['id'])
+        spool.compact()
+    logger.info(f"Flushed {flushed} spooled results")
+    return flushed
+
+
+def _flush_spool_entry(user_config, entry, max_attempts):
+    logger.info(f"Reporting spooled entry: {entry['id']}")
+
+    dynamo_payload = {
+        test_type: decimal.Decimal(score) for test_type, score in entry['dynamo_payload'].items()}
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with _build_environment(entry['environment']):
+                _report_results(
+                    user_config, entry['target_url'], entry['build_start_time'],
+                    entry['pytest_state'], dynamo_payload, entry['parse_errors'],
+                    file_coverage=_get_spooled_file_coverage(entry)
+                )
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning(f"Attempt {attempt} to report spooled entry failed: {exc}")
+            if attempt == max_attempts:
+                raise GeneralError(
+                    f"Couldn't report spooled entry {entry['id']} after {max_attempts} attempts, "
+                    f"leaving it for the next flush: {exc}"
+                )
+            time.sleep(min(FLUSH_BACKOFF_CAP, FLUSH_BACKOFF_BASE * 2 ** (attempt - 1)))
+        else:
+            return
+
+
+def _get_spooled_file_coverage(entry):
+    return {
+        test_type: {file_name: tuple(counts) for file_name, counts in files.items()}
+        for test_type, files in entry.get('file_coverage', {}).items()
+    }
+
+
+@contextmanager
+def _build_environment(environment):
+    """
+    Sets the CodeBuild variables a build ran with while it is reported, for a spooled entry or an
+    event, then puts back what was there before.
+    """
+    saved = {name: os.environ.get(name) for name in environment}
+    for name, value in environment.items():
+        _set_environment_variable(name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            _set_environment_variable(name, value)
+
+
+def _set_environment_variable(name, value):
+    if value is None:
+        os.environ.pop(name, None)
+    else:
+        os.environ[name] = value
+
+
+def _parse_test_results(user_config, test_parameters):
+    logger.info("Parsing test results")
+
+    return _collect_test_results(test_parameters, _parse_outcomes(user_config, test_parameters))
+
+
+def _parse_subproject_results(user_config, test_parameters):
+    logger.info("Parsing test results for subprojects")
+
+    subproject_outcomes = {}
+    for test_parameter, outcome in zip(
+            test_parameters, _parse_outcomes(user_config, test_parameters)):
+        parameters, outcomes = subproject_outcomes.setdefault(
+            test_parameter.get('subproject'), ([], []))
+        parameters.append(test_parameter)
+        outcomes.append(outcome)
+    return {
+        subproject: _collect_test_results(parameters, outcomes)
+        for subproject, (parameters, outcomes) in subproject_outcomes.items()
+    }
+
+
+def _parse_outcomes(user_config, test_parameters):
+    from concurrent.futures import ProcessPoolExecutor
+
+    parsing_config = user_config.get('parsing', {})
+    executor_class = (
+        ThreadPoolExecutor if parsing_config.get('executor') == 'thread' else ProcessPoolExecutor)
+    max_workers = parsing_config.get('max_workers', os.cpu_count() or 1)
+
+    with executor_class(max_workers=max(1, min(max_workers, len(test_parameters)))) as executor:
+        futures = [
+            executor.submit(_time_parse_test_parameter, test_parameter)
+            for test_parameter in test_parameters
+        ]
+
+    outcomes = []
+    for test_parameter, future in zip(test_parameters, futures):
+        try:
+            result, seconds = future.result()
+        except Exception as exc:  # pylint: disable=broad-except
+            outcomes.append((None, exc))
+            continue
+        test_name = test_parameter.get('test_type')
+        if test_parameter.get('subproject') is not None:
+            test_name = _get_subproject_name(test_parameter.get('subproject'), test_name)
+        metrics.record(
+            f"parse.{test_name}", seconds, bytes=_get_file_size(test_parameter.get('input_file')))
+        outcomes.append((result, None))
+    return outcomes
+
+
+def _run_test_results(user_config, test_parameters):
+    logger.info("Running analysis tools")
+
+    running_config = user_config.get('running', {})
+    tee = running_config.get('tee', True)
+    incremental = [
+        test_parameter for test_parameter in test_parameters
+        if running_config.get('incremental') and test_parameter.get('incremental')
+    ]
+    streams = {
+        test_parameter.get('test_type'): [
+            consumer for consumer in test_parameters
+            if not consumer.get('dynamic') and consumer.get('format') != FORMAT_COBERTURA
+            and test_parameter.get('stdout_file') is not None
+            and consumer.get('input_file') == test_parameter.get('stdout_file')
+        ]
+        for test_parameter in test_parameters
+        if test_parameter.get('command') and test_parameter not in incremental
+    }
+    commands = [
+        test_parameter for test_parameter in test_parameters
+        if test_parameter.get('test_type') in streams
+    ]
+
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(commands) + len(incremental))) as executor:
+        futures = {
+            test_parameter.get('test_type'): executor.submit(
+                _run_test_parameter, test_parameter,
+                streams[test_parameter.get('test_type')], tee
+            )
+            for test_parameter in commands
+        }
+        futures.update({
+            test_parameter.get('test_type'): executor.submit(
+                _run_incremental_test_parameter, test_parameter, running_config)
+            for test_parameter in incremental
+        })
+        for test_type, future in futures.items():
+            try:
+                outcomes.update(future.result())
+            except Exception as exc:  # pylint: disable=broad-except
+                outcomes[test_type] = (None, exc)
+                for consumer in streams.get(test_type, []):
+                    outcomes.setdefault(consumer.get('test_type'), (None, exc))
+
+    for test_parameter in test_parameters:
+        # Test types nothing here produced are read from the files left by earlier build steps
+        if test_parameter.get('test_type') not in outcomes:
+            try:
+                outcomes[test_parameter.get('test_type')] = (
+                    _parse_test_parameter(test_parameter), None)
+            except Exception as exc:  # pylint: disable=broad-except
+                outcomes[test_parameter.get('test_type')] = (None, exc)
+    return _collect_test_results(
+        test_parameters,
+        [outcomes[test_parameter.get('test_type')] for test_parameter in test_parameters]
+    )
+
+
+def _run_test_parameter(test_parameter, consumers, tee):
+    test_type = test_parameter.get('test_type')
+    command = test_parameter.get('command').format(
+        input_file=test_parameter.get('input_file'),
+        results_dir=os.path.dirname(test_parameter.get('input_file'))
+    )
+    stdout_file = test_parameter.get('stdout_file')
+    if tee and stdout_file is not None:
+        os.makedirs(os.path.dirname(stdout_file) or '.', exist_ok=True)
+    matchers = {
+        consumer.get('test_type'): (consumer.get('regex_pattern'), consumer.get('match'))
+        for consumer in consumers
+    }
+
+    with metrics.span(f'run.{test_type}', consumers=len(consumers)) as span:
+        line_parses, exit_status = run_command(
+            command, lambda lines: match_lines(lines, matchers),
+            tee_file=stdout_file if tee else None
+        )
+        span.set('exit_status', exit_status)
+
+    outcomes = {
+        consumer_type: ((None, _get_quality_indicator_score(line_parse), None), None)
+        for consumer_type, line_parse in line_parses.items()
+    }
+    if test_parameter.get('dynamic') or test_parameter.get('format') == FORMAT_COBERTURA:
+        try:
+            outcomes[test_type] = (_parse_test_parameter(test_parameter), None)
+        except GeneralError as gen_err:
+            outcomes[test_type] = (None, gen_err)
+    return outcomes
+
+
+def _run_incremental_test_parameter(test_parameter, running_config):
+    test_type = test_parameter.get('test_type')
+    incremental = test_parameter.get('incremental')
+    cache = ResultCache(
+        test_type, incremental, running_config.get('cache_dir'),
+        running_config.get('cache_max_entries', DEFAULT_CACHE_MAX_ENTRIES)
+    )
+
+    with metrics.span(f'run.{test_type}', incremental=True) as span:
+        content_hashes = hash_files(incremental['paths'], incremental['suffix'])
+        file_results = {
+            file_path: cache.get(file_path, content_hash)
+            for file_path, content_hash in content_hashes.items()
+        }
+        changed = [file_path for file_path, result in file_results.items() if result is None]
+        logger.info(
+            f"Analysing {len(changed)} of {len(content_hashes)} files for {test_type}, "
+            f"reusing cached results for the rest"
+        )
+        span.set('files', len(content_hashes))
+        span.set('changed_files', len(changed))
+
+        for start in range(0, len(changed), INCREMENTAL_BATCH_FILES):
+            batch = changed[start:start + INCREMENTAL_BATCH_FILES]
+            command = incremental['command'].format(
+                files=' '.join(shlex.quote(file_path) for file_path in batch))
+            batch_results, exit_status = run_command(
+                command, lambda lines, batch=batch: parse_file_results(
+                    lines, incremental['file_regex'], batch)
+            )
+            if exit_status not in incremental['exit_statuses']:
+                # Results from a failed run can't be trusted, only the batches before it are kept
+                if start:
+                    cache.save()
+                raise GeneralError(
+                    f"Command exited with status {exit_status}, expected one of "
+                    f"{incremental['exit_statuses']}: {command}"
+                )
+            for file_path, result in batch_results.items():
+                file_results[file_path] = result
+                cache.put(file_path, content_hashes[file_path], result)
+        cache.save()
+
+    score = aggregate(file_results.values(), incremental['aggregate'])
+    return {test_type: ((None, 100.0 if score is None else score, None), None)}
+
+
+def _collect_test_results(test_parameters, outcomes):
+    pytest_state = 'failure'
+    dynamo_payload = {}
+    parse_errors = {}
+    file_coverage = {}
+    for test_parameter, (result, error) in zip(test_parameters, outcomes):
+        test_type = test_parameter.get('test_type')
+        if error is not None:
+            logger.error(f"Failed to parse {test_type}: {error}", exc_info=error)
+            parse_errors[test_type] = str(error)
+            continue
+        state, score, files = result
+        if test_parameter.get('dynamic'):
+            pytest_state = state
+        if files is not None:
+            file_coverage[test_type] = files
+        dynamo_payload = _update_dynamo_payload(test_parameter, score, dynamo_payload)
+    return pytest_state, dynamo_payload, parse_errors, file_coverage
+
+
+def _time_parse_test_parameter(test_parameter):
+    start = time.perf_counter()
+    return _parse_test_parameter(test_parameter), time.perf_counter() - start
+
+
+def _get_file_size(input_file):
+    try:
+        return os.path.getsize(input_file)
+    except OSError:
+        return 0
+
+
+def _parse_test_parameter(test_parameter):
+    if test_parameter.get('dynamic'):
+        state, score = _parse_pytest(test_parameter)
+        return state, score, None
+    if test_parameter.get('format') == FORMAT_COBERTURA:
+        score, files = _parse_cobertura(test_parameter)
+        return None, score, files
+    return None, _parse_quality_indicator_tests(test_parameter), None
 
 
 def _parse_url_from_arn(user_config):
@@ -90,18 +765,72 @@ def _parse_url_from_arn(user_config):
 def _create_test_parameters_dict(test_type, static_results_dir):
     logger.info(f"Creating test parameters dict: {test_type}")
 
-    test_to_run = dpath.get(APP_CONFIG['tests_to_run'], f'*/{test_type}')
+    test_to_run = TEST_REGISTRY[test_type]
 
     return {
         'test_type': test_type,
-        'input_file': os.path.join(static_results_dir, test_to_run['input_file']),
-        'regex_pattern': fr"{test_to_run['regex_pattern']}",
-        'message': test_to_run['message'],
-        'multiplier': test_to_run['multiplier'],
-        'percent': test_to_run['percent']
+        'dynamic': test_to_run.dynamic,
+        'input_file': os.path.join(static_results_dir, test_to_run.input_file),
+        'regex_pattern': test_to_run.regex,
+        'message': test_to_run.message,
+        'multiplier': test_to_run.multiplier,
+        'percent': test_to_run.percent,
+        'match': test_to_run.match,
+        'command': test_to_run.command,
+        'stdout_file': (
+            os.path.join(static_results_dir, test_to_run.stdout_file)
+            if test_to_run.stdout_file is not None else None
+        ),
+        'incremental': test_to_run.incremental,
+        'format': test_to_run.format,
     }
 
 
+def _create_build_test_parameters(subprojects, source_dir=''):
+    if subprojects:
+        return _create_subproject_test_parameters(subprojects, source_dir)
+    static_results_dir = os.path.join(
+        source_dir,
+        APP_CONFIG['static_analysis']['root_dir'],
+        APP_CONFIG['static_analysis']['results_dir']
+    )
+    return [
+        _create_test_parameters_dict(test_type, static_results_dir) for test_type in TEST_REGISTRY]
+
+
+def _create_subproject_test_parameters(subprojects, source_dir=''):
+    logger.info(f"Creating test parameters for {len(subprojects)} subprojects")
+
+    names = [subproject.get('name') for subproject in subprojects]
+    if None in names or len(set(names)) != len(names):
+        raise GeneralError(f"Every subproject needs a unique name: {names}")
+
+    test_parameters = []
+    for subproject in subprojects:
+        static_results_dir = os.path.join(
+            source_dir,
+            subproject.get('path', subproject['name']),
+            APP_CONFIG['static_analysis']['root_dir'],
+            APP_CONFIG['static_analysis']['results_dir']
+        )
+        test_types = subproject.get('tests_to_run') or list(TEST_REGISTRY)
+        unknown = [test_type for test_type in test_types if test_type not in TEST_REGISTRY]
+        if unknown:
+            raise GeneralError(f"Unknown test types for subproject {subproject['name']}: {unknown}")
+        test_parameters.extend(
+            dict(
+                _create_test_parameters_dict(test_type, static_results_dir),
+                subproject=subproject['name']
+            )
+            for test_type in test_types
+        )
+    return test_parameters
+
+
+def _get_subproject_name(subproject, name):
+    return f'{subproject}/{name}'
+
+
 def _update_dynamo_payload(test_parameter, score, dynamo_payload):
     logger.info(f"Updating DynamoDB payload: {test_parameter.get('test_type')}")
 
@@ -112,126 +841,488 @@ def _update_dynamo_payload(test_parameter, score, dynamo_payload):
     return dynamo_payload
 
 
-def _maintain_state_in_dynamo(user_config, build_start_time, dynamo_payload):
+def _maintain_state_in_dynamo(user_config, build_start_time, dynamo_payload, file_coverage=None,
+                              superseded=False):
     logger.info("Maintaining state in DynamoDB")
 
-    branch_parse = re.match(
-        re.compile(r'(remotes/origin/)*(.+)'), os.environ.get('CODEBUILD_GIT_BRANCH'))
-    branch_name = branch_parse.group(2)
-
     resource = connect_to_aws_resource('dynamodb', user_config)
+    table_name = APP_CONFIG['dynamo']['table_name']
+    partition_and_sort_key = _get_partition_and_sort_key(build_start_time)
 
-    partition_key_name = APP_CONFIG['dynamo']['partition_key_name']
+    coverage_data = _pack_coverage_data(file_coverage)
+    current_item = put_with_partition_and_sort_key(
+        resource, table_name, partition_and_sort_key,
+        dict(dynamo_payload, **coverage_data, **_get_build_attributes(build_start_time))
+    )
+    if superseded:
+        # Its history is kept, but the rollup and trend figures belong to the newer build
+        return [current_item], None
+
+    previous_items, rollup_metrics = _get_previous_state(
+        resource, table_name, partition_and_sort_key, dynamo_payload, coverage_data)
+    return [current_item] + previous_items, rollup_metrics
+
+
+def _maintain_subproject_state_in_dynamo(user_config, build_start_time, subproject_results,
+                                        superseded=False):
+    logger.info(f"Maintaining state in DynamoDB for {len(subproject_results)} subprojects")
+
+    resource = connect_to_aws_resource('dynamodb', user_config)
     table_name = APP_CONFIG['dynamo']['table_name']
-    sort_key_name = APP_CONFIG['dynamo']['sort_key_name']
+    partition_and_sort_keys = {
+        subproject: _get_partition_and_sort_key(build_start_time, subproject)
+        for subproject in subproject_results
+    }
+    coverage_data = {
+        subproject: _pack_coverage_data(file_coverage)
+        for subproject, (_, _, _, file_coverage) in subproject_results.items()
+    }
+    build_attributes = _get_build_attributes(build_start_time)
+    current_items = dict(zip(subproject_results, batch_put_with_partition_and_sort_key(
+        resource, table_name, [
+            (
+                partition_and_sort_keys[subproject],
+                dict(dynamo_payload, **coverage_data[subproject], **build_attributes)
+            )
+            for subproject, (_, dynamo_payload, _, _) in subproject_results.items()
+        ]
+    )))
+
+    if superseded:
+        return {
+            subproject: ([current_item], None) for subproject, current_item in current_items.items()
+        }
+
+    rollups = dict.fromkeys(subproject_results)
+    if APP_CONFIG['dynamo'].get('rollup_window'):
+        rollups = dict(zip(subproject_results, (
+            rollup or {} for rollup in batch_get_with_partition_and_sort_key(
+                resource, table_name, [
+                    get_rollup_key(partition_and_sort_keys[subproject])
+                    for subproject in subproject_results
+                ]
+            )
+        )))
+
+    max_workers = user_config['aws_general'].get('connection', {}).get(
+        'max_pool_connections', DEFAULT_MAX_POOL_CONNECTIONS)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rollups)))) as executor:
+        futures = {
+            subproject: executor.submit(
+                _get_previous_state, resource, table_name, partition_and_sort_keys[subproject],
+                dynamo_payload, coverage_data[subproject], rollups[subproject]
+            )
+            for subproject, (_, dynamo_payload, _, _) in subproject_results.items()
+        }
+    subproject_state = {}
+    for subproject, future in futures.items():
+        previous_items, rollup_metrics = future.result()
+        subproject_state[subproject] = (
+            [current_items[subproject]] + previous_items, rollup_metrics)
+    return subproject_state
+
+
+def _claim_branch_head(user_config, build_start_time):
+    """
+    Records this build as the latest to report on its branch, unless a build that started after it
+    already has. In that case this build's commit is no longer the branch head and False is
+    returned. The claim is one conditional write to the branch's rollup item, so builds racing to
+    report can't both win. Builds are ordered by when they started, not by their commits, so a
+    retried build of an older commit takes the head back from a newer commit that already reported.
+    Its commit is recorded as the head, and it reports in full until the next build claims the head.
+    """
+    resource = connect_to_aws_resource('dynamodb', user_config)
+    head_key = get_rollup_key(_get_partition_and_sort_key(build_start_time))
+    claimed = update_if_not_newer(
+        resource, APP_CONFIG['dynamo']['table_name'], head_key,
+        {HEAD_COMMIT_NAME: os.environ.get('CODEBUILD_SOURCE_VERSION')}, HEAD_STARTED_AT_NAME,
+        _get_build_started_at(build_start_time)
+    )
+    if not claimed:
+        logger.info("A build that started later has reported on this branch, so this is superseded")
+    return claimed
+
+
+def _get_build_started_at(build_start_time):
+    """
+    Returns when the build started in milliseconds, from CodeBuild if it says, otherwise from when
+    its results were reported.
+    """
+    return int(os.environ.get('CODEBUILD_START_TIME') or build_start_time * 1000)
+
+
+def _get_build_attributes(build_start_time):
+    """
+    Returns what each build item records besides its scores: the day it started on, for the history
+    index, and its commit, so that a re-run isn't compared with an earlier build of the same commit.
+    """
+    build_attributes = {BUILD_DAY_NAME: get_build_day(build_start_time)}
+    commit_sha = os.environ.get('CODEBUILD_SOURCE_VERSION')
+    if commit_sha is not None:
+        build_attributes[COMMIT_SHA_NAME] = commit_sha
+    return build_attributes
+
+
+def _get_partition_and_sort_key(build_start_time, subproject=None):
+    branch_parse = re.match(
+        re.compile(r'(remotes/origin/)*(.+)'), os.environ.get('CODEBUILD_GIT_BRANCH'))
+    branch_name = branch_parse.group(2)
+    if subproject is not None:
+        branch_name = f'{subproject}{SUBPROJECT_SEPARATOR}{branch_name}'
 
-    partition_and_sort_key = {
-        'partition_key_name': partition_key_name,
+    return {
+        'partition_key_name': APP_CONFIG['dynamo']['partition_key_name'],
         'partition_key_value': branch_name,
-        'sort_key_name': sort_key_name,
+        'sort_key_name': APP_CONFIG['dynamo']['sort_key_name'],
         'sort_key_value': build_start_time,
     }
 
-    put_with_partition_and_sort_key(
-        resource, table_name, partition_and_sort_key, dynamo_payload)
-    return get_items_by_partition_key(resource, table_name, partition_key_name, branch_name)
+
+def _pack_coverage_data(file_coverage):
+    return {
+        f'{test_type}{FILE_COVERAGE_SUFFIX}': pack_file_coverage(files)
+        for test_type, files in (file_coverage or {}).items()
+    }
+
+
+def _get_previous_state(resource, table_name, partition_and_sort_key, dynamo_payload,
+                        coverage_data, rollup=None):
+    """
+    Returns the branch's previous build, for changes from previous, and its rollup metrics once
+    this build is folded in. A rollup already read, say in a batch, saves reading it again. Earlier
+    builds of the same commit are passed over, so a re-run reports the same changes as the first
+    build of its commit did.
+    """
+    from boto3.dynamodb.conditions import Attr
+
+    filter_condition = None
+    commit_sha = os.environ.get('CODEBUILD_SOURCE_VERSION')
+    if commit_sha is not None:
+        filter_condition = Attr(COMMIT_SHA_NAME).not_exists() | Attr(COMMIT_SHA_NAME).ne(commit_sha)
+    previous_items = []
+    rollup_metrics = None
+    rollup_window = APP_CONFIG['dynamo'].get('rollup_window')
+    if rollup_window:
+        previous_metrics, rollup_metrics = _update_rollup_in_dynamo(
+            resource, table_name, partition_and_sort_key, dynamo_payload, rollup_window, rollup)
+        if previous_metrics:
+            previous_items = [
+                {test_type: metric['last'] for test_type, metric in previous_metrics.items()}]
+            if coverage_data:
+                # The rollup doesn't carry per-file coverage, so that still comes from the table
+                previous_items[0].update(next(iter(get_latest_items_by_partition_key(
+                    resource, table_name, partition_and_sort_key, PREVIOUS_BUILDS_TO_FETCH,
+                    attributes=list(coverage_data), filter_condition=filter_condition
+                )), {}))
+    if not previous_items:
+        previous_items = get_latest_items_by_partition_key(
+            resource, table_name, partition_and_sort_key, PREVIOUS_BUILDS_TO_FETCH,
+            attributes=list(dynamo_payload.keys()) + list(coverage_data),
+            filter_condition=filter_condition
+        )
+    return previous_items, rollup_metrics
+
+
+def _update_rollup_in_dynamo(resource, table_name, partition_and_sort_key, dynamo_payload,
+                             rollup_window, rollup=None):
+    logger.info("Updating branch rollup in DynamoDB")
+
+    rollup_key = get_rollup_key(partition_and_sort_key)
+    lower_is_better = {
+        test_type for test_type, test_to_run in TEST_REGISTRY.items()
+        if test_to_run.better == BETTER_LOWER
+    }
+    commit_sha = os.environ.get('CODEBUILD_SOURCE_VERSION')
+    started_at = _get_build_started_at(partition_and_sort_key['sort_key_value'])
+    previous_metrics = {}
+    for _ in range(ROLLUP_ATTEMPTS):
+        if rollup is None:
+            rollup = get_with_partition_and_sort_key(resource, table_name, rollup_key) or {}
+        if rollup.get(HEAD_STARTED_AT_NAME, started_at) > started_at:
+            logger.info("Branch rollup already has a build that started later, leaving it")
+            return {}, None
+        previous_metrics = rollup.get('metrics', {})
+        if commit_sha is not None and rollup.get(COMMIT_SHA_NAME) == commit_sha:
+            # A re-run of the same commit replaces its build in the rollup rather than adding one
+            previous_metrics = rollup.get('previous_metrics', {})
+        rollup_metrics = roll_up(previous_metrics, dynamo_payload, lower_is_better, rollup_window)
+        rollup_data = {
+            'metrics': rollup_metrics,
+            'previous_metrics': previous_metrics,
+            COMMIT_SHA_NAME: commit_sha,
+            HEAD_STARTED_AT_NAME: started_at,
+        }
+        if update_if_version_matches(
+                resource, table_name, rollup_key, rollup_data, ROLLUP_VERSION_NAME,
+                rollup.get(ROLLUP_VERSION_NAME)):
+            return previous_metrics, rollup_metrics
+        logger.info("Branch rollup was updated by another build, retrying")
+        rollup = None
+
+    logger.warning(f"Couldn't update branch rollup after {ROLLUP_ATTEMPTS} attempts")
+    return previous_metrics, None
 
 
-def _create_github_payloads(pytest_state, target_url, dynamo_payload, dynamo_items):
+def _create_github_payloads(pytest_state, target_url, dynamo_payload, dynamo_items,
+                            rollup_metrics=None, coverage_changes=None, superseded=False):
     logger.info("Creating GitHub payloads")
 
     github_payloads = []
     for test_type, test_value in dynamo_payload.items():
-        test_to_run = dpath.get(APP_CONFIG['tests_to_run'], f'*/{test_type}')
+        test_to_run = TEST_REGISTRY[test_type]
+        percent = '%' if test_to_run.percent else ''
+        if superseded:
+            change = 'N/A - superseded by a later build'
+        else:
+            change = _get_change_from_previous(test_type, dynamo_items)
         description = '{message}: {multiplier:.0f}{percent}, Change from previous: {change}'.format(
-            message=test_to_run.get('message'),
+            message=test_to_run.message,
             multiplier=test_value,
-            percent='%' if test_to_run.get('percent') else '',
-            change=_get_change_from_previous(test_type, dynamo_items)
+            percent=percent,
+            change=change
         )
+        suffixes = []
+        trend = get_trend(rollup_metrics or {}, test_type)
+        if trend is not None:
+            suffixes.append(
+                ', Mean of last {window}: {mean:.1f}{percent}, Best: {best:.0f}{percent}, '
+                'Regression streak: {streak}'.format(percent=percent, **trend)
+            )
+        changes = (coverage_changes or {}).get(test_type)
+        if changes:
+            suffixes.append(', Most changed: {file} {change:+.1f}%'.format(**changes[0]))
+        for suffix in suffixes:
+            # A suffix that doesn't fit is left off whole rather than cut mid-way
+            if len(description) + len(suffix) <= GITHUB_DESCRIPTION_LENGTH:
+                description += suffix
         github_payload = {
-            'state': pytest_state if test_type in 'pytest' else 'success',
+            'state': pytest_state if test_to_run.dynamic else 'success',
             'target_url': target_url,
-            'description': description,
+            'description': description[:GITHUB_DESCRIPTION_LENGTH],
             'context': test_type,
         }
         github_payloads.append(github_payload)
     return github_payloads
 
 
+def _create_parse_error_payloads(target_url, parse_errors):
+    logger.info("Creating GitHub payloads for parse errors")
+
+    return [
+        {
+            'state': 'error',
+            'target_url': target_url,
+            'description': f"Failed to parse results: {parse_error}"[:GITHUB_DESCRIPTION_LENGTH],
+            'context': test_type,
+        }
+        for test_type, parse_error in parse_errors.items()
+    ]
+
+
+def _get_coverage_changes(dynamo_items):
+    if len(dynamo_items) < 2:
+        return {}
+    current_item, previous_item = dynamo_items[0], dynamo_items[1]
+    coverage_changes = {}
+    for name, data in current_item.items():
+        if not name.endswith(FILE_COVERAGE_SUFFIX) or name not in previous_item:
+            continue
+        test_type = name[:-len(FILE_COVERAGE_SUFFIX)]
+        logger.info(f"Getting per-file coverage changes from previous build: {test_type}")
+        try:
+            coverage_changes[test_type] = get_coverage_changes(
+                unpack_file_coverage(data), unpack_file_coverage(previous_item[name]))
+        except ValueError as cov_err:
+            logger.warning(f"Couldn't read previous per-file coverage for {test_type}: {cov_err}")
+    return coverage_changes
+
+
 def _get_change_from_previous(test_type, dynamo_items):
     logger.info(f"Getting change from previous build: {test_type}")
 
-    change_value = 'N/A - first build'
-    if len(dynamo_items) > 1:
-        change_value = dynamo_items[-1].get(test_type) - dynamo_items[-2].get(test_type)
-    return change_value
+    change_value = History.from_items(dynamo_items[::-1], [test_type]).change_from_previous(
+        test_type)
+    if change_value is None:
+        return 'N/A - first build'
+    return round(change_value, CHANGE_DECIMAL_PLACES)
 
 
 def _parse_pytest(test_parameter):
     logger.info("Parsing PyTest")
 
+    input_file = test_parameter.get('input_file')
     try:
-        file = open(test_parameter.get('input_file'), 'r')
+        try:
+            results = parse_junit_xml(input_file)
+        except ParseError as par_err:
+            logger.warning(f"Falling back to regex parsing of PyTest results: {par_err}")
+            results = parse_junit_with_regex(input_file, test_parameter.get('regex_pattern'))
     except FileNotFoundError as fil_err:
         raise GeneralError(f"File not found error: {fil_err}")
-    else:
-        line_parse = re.match(
-            re.compile(fr"{test_parameter.get('regex_pattern')}"), file.readlines()[0])
-        test_range = 5
-        results_to_parse = [line_parse.group(iterator) for iterator in range(1, test_range)]
+    except ParseError as par_err:
+        raise GeneralError(f"Couldn't parse PyTest results: {par_err}")
 
-        results = {
-            res.split(sep='=')[0]: int(res.split(sep='=')[1].strip('"')) for res in results_to_parse
-        }
-        state = (
-            'failure' if results.get('errors') is not 0 or
-            results.get('failures') is not 0 else 'success'
-        )
+    for suite in results.get('suites'):
+        logger.info(
+            f"Test suite {suite.get('name')}: {suite.get('tests')} tests in {suite.get('time')}s")
+
+    totals = results.get('totals')
+    total_problems = totals.get('errors') + totals.get('failures')
+    total_tests = totals.get('tests')
+    state = 'failure' if total_problems != 0 else 'success'
+    score = 1
+    if total_problems != 0:
+        score = (total_tests - total_problems) / total_tests
+    return state, score
+
+
+def _parse_cobertura(test_parameter):
+    logger.info(f"Parsing Cobertura coverage: {test_parameter.get('test_type')}")
+
+    try:
+        files = parse_cobertura_xml(test_parameter.get('input_file'))
+    except FileNotFoundError as fil_err:
+        raise GeneralError(f"File not found error: {fil_err}")
+    except ParseError as par_err:
+        raise GeneralError(f"Couldn't parse Cobertura coverage: {par_err}")
 
-        total_problems = results.get('errors') + results.get('failures')
-        total_tests = results.get('tests')
-        score = 1
-        if total_problems is not 0:
-            score = (total_tests - total_problems) / total_tests
-        return state, score
+    score = get_total_coverage_rate(files)
+    return 100.0 if score is None else score, files
 
 
 def _parse_quality_indicator_tests(test_parameter):
     logger.info(f"Parsing quality indicator tests: {test_parameter.get('test_type')}")
 
+    find_match = (
+        find_first_match if test_parameter.get('match') == MATCH_FIRST else find_last_match)
     try:
-        file = open(test_parameter.get('input_file'), 'r')
+        line_parse = find_match(
+            test_parameter.get('input_file'), test_parameter.get('regex_pattern'))
     except FileNotFoundError as fil_err:
         raise GeneralError(f"File not found error: {fil_err}")
-    else:
-        score = 100.0
-        for line in file.readlines():
-            line_parse = re.match(
-                re.compile(fr"{test_parameter.get('regex_pattern')}"), line.strip('\n'))
-            if line_parse is not None:
-                score = float(line_parse.group(1))
-        return score
+    return _get_quality_indicator_score(line_parse)
 
 
-def _post_to_github_status(data, user_config):
-    logger.info(f"Starting POST to GitHub: {data.get('context')}")
+def _get_quality_indicator_score(line_parse):
+    score = 100.0
+    if line_parse is not None:
+        score = float(line_parse.group(1))
+    return score
+
+
+def _post_github_payloads(github_payloads, user_config):
+    logger.info(f"Posting {len(github_payloads)} GitHub statuses")
+
+    max_workers = user_config['github'].get('max_workers', DEFAULT_GITHUB_WORKERS)
+    session, github_urls = _create_github_session(user_config, max_workers)
+    rate_limiter = RateLimiter(pending=len(github_payloads) + 1)
 
-    ssm_parameters = {}
-    for param in ['github_owner', 'github_token']:
-        this_param = get_boto_client('ssm').get_parameter(Name=param, WithDecryption=True)
-        ssm_parameters.update({
-            this_param.get('Parameter').get('Name'): this_param.get('Parameter').get('Value')})
-    url = APP_CONFIG['github']['api_url'].format(
-        owner=ssm_parameters.get('github_owner'),
-        repo=user_config['github']['repo'],
-        commit_sha=os.environ.get('CODEBUILD_SOURCE_VERSION')
+    results = {}
+    errors = {}
+    github_payloads = _drop_unchanged_statuses(
+        github_payloads, github_urls.get('combined_status'), session, rate_limiter)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            github_payload.get('context'): executor.submit(
+                _post_to_github_status, github_payload, github_urls.get('statuses'), session,
+                rate_limiter
+            )
+            for github_payload in github_payloads
+        }
+        for context, future in futures.items():
+            try:
+                response = future.result()
+            except GeneralError as gen_err:
+                errors[context] = str(gen_err)
+            else:
+                results[context] = response.status_code
+                if not response.ok:
+                    errors[context] = f"HTTP {response.status_code}: {response.reason}"
+
+    if errors:
+        raise GeneralError(
+            f"Failed to POST {len(errors)} of {len(github_payloads)} GitHub statuses: {errors}")
+    return results
+
+
+def _create_github_session(user_config, max_workers):
+    logger.info("Creating GitHub session")
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    ssm_config = user_config.get('ssm', {})
+    ssm_parameters = get_ssm_parameters(
+        ['github_owner', 'github_token'],
+        config=user_config,
+        cache_file=ssm_config.get('cache_file'),
+        cache_ttl=ssm_config.get('cache_ttl')
     )
-    headers = {"Authorization": f"token {ssm_parameters.get('github_token')}"}
+    url_parameters = {
+        'owner': ssm_parameters.get('github_owner'),
+        'repo': user_config['github']['repo'],
+        'commit_sha': os.environ.get('CODEBUILD_SOURCE_VERSION'),
+    }
+    github_urls = {
+        'statuses': APP_CONFIG['github']['api_url'].format(**url_parameters),
+        'combined_status': None,
+        'check_runs': None,
+    }
+    if APP_CONFIG['github'].get('combined_status_url'):
+        github_urls['combined_status'] = APP_CONFIG['github']['combined_status_url'].format(
+            **url_parameters)
+    if APP_CONFIG['github'].get('check_runs_url'):
+        github_urls['check_runs'] = APP_CONFIG['github']['check_runs_url'].format(
+            **url_parameters)
+
+    # Sessions are kept for the life of the process so a warm handler reuses their connections
+    session_key = (ssm_parameters.get('github_token'), max_workers)
+    with _GITHUB_SESSIONS_LOCK:
+        if session_key not in _GITHUB_SESSIONS:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+            session.headers.update({
+                "Authorization": f"token {ssm_parameters.get('github_token')}",
+                "Accept": "application/vnd.github+json",
+            })
+            _GITHUB_SESSIONS[session_key] = session
+        return _GITHUB_SESSIONS[session_key], github_urls
+
+
+def _drop_unchanged_statuses(github_payloads, combined_status_url, session, rate_limiter):
+    if combined_status_url is None:
+        return github_payloads
+    logger.info("Fetching the commit's combined status from GitHub")
+
+    from requests.exceptions import RequestException
 
     try:
-        response = requests.post(url, data=json.dumps(data), headers=headers, verify=True)
-    except MissingSchema as sch_exc:  # If URL is incorrect, other errors are HTTP codes
-        raise GeneralError(f"POST to GitHub MissingSchema Exception: {sch_exc}")
-    else:
-        logger.info(f"POST Response Code: {response.status_code}")
+        existing_statuses = get_combined_status(session, combined_status_url, rate_limiter)
+    except RequestException as req_exc:
+        logger.warning(f"Couldn't fetch combined status, posting every status: {req_exc}")
+        return github_payloads
+
+    changed_payloads = filter_unchanged_statuses(github_payloads, existing_statuses)
+    logger.info(
+        f"Skipping {len(github_payloads) - len(changed_payloads)} unchanged GitHub statuses")
+    return changed_payloads
+
+
+def _post_to_github_status(data, url, session, rate_limiter=None):
+    logger.info(f"Starting POST to GitHub: {data.get('context')}")
+
+    response = send_json(session, 'POST', url, data, rate_limiter)
+    logger.info(f"POST Response Code: {data.get('context')}: {response.status_code}")
+    return response
+
+
+def _start_check_run(user_config, target_url):
+    session, github_urls = _create_github_session(user_config, 1)
+    return start_check_run(
+        session, github_urls.get('check_runs'), _get_check_name(user_config),
+        os.environ.get('CODEBUILD_SOURCE_VERSION'), target_url
+    )
+
+
+def _get_check_name(user_config):
+    return user_config['github'].get('check_name', DEFAULT_CHECK_NAME)
@@ -2,44 +2,501 @@
 Utilities for interacting with AWS.
 """
 
-# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring, global-statement
 
+import json
 import logging
+import os
+import queue
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import boto3
-from boto3.dynamodb.conditions import Key
-from botocore.vendored.requests.exceptions import SSLError
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.general import atomic_write_json
+from py_dev_hammer.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 logger.addHandler(logging.StreamHandler())
 
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+SSM_BATCH_SIZE = 10  # GetParameters accepts at most ten names per call
+DEFAULT_SSM_TTL = 15 * 60
+BATCH_WRITE_SIZE = 25  # BatchWriteItem accepts at most 25 items per call
+BATCH_GET_SIZE = 100  # BatchGetItem accepts at most 100 keys per call
+BATCH_ATTEMPTS = 5
+BATCH_BACKOFF_BASE = 0.05
+STREAM_PAGES_PER_READER = 2
+STREAM_POLL_SECONDS = 0.1
+_SSM_PARAMETERS = {}
+_SSM_LOCK = threading.Lock()
+_AWS_SESSION = None
+_AWS_CLIENTS = {}
+_AWS_LOCK = threading.Lock()
+
 
 def connect_to_aws_resource(resource_name, config):
+    from botocore.vendored.requests.exceptions import SSLError
+
     try:
-        resource = boto3.resource(
-            resource_name, region_name=config['aws_general']['region_name'], verify=True)
+        resource = _get_pooled('resource', resource_name, config)
     except SSLError as ssl_err:
         logger.error(f"SSL Error: {ssl_err}", exc_info=True)
     else:
         return resource
 
 
-def get_boto_client(service):
-    return boto3.client(service)
+def get_boto_client(service, config=None):
+    return _get_pooled('client', service, config)
+
+
+def get_aws_session():
+    global _AWS_SESSION
+    with _AWS_LOCK:
+        if _AWS_SESSION is None:
+            import boto3
+
+            _AWS_SESSION = boto3.session.Session()
+        return _AWS_SESSION
+
+
+def _get_pooled(kind, service, config):
+    """
+    Returns the process-wide client or resource for a service and region, creating it on first
+    use. Creation is serialised as boto3 sessions are not thread-safe; the objects themselves are
+    shared freely afterwards.
+    """
+    aws_config = (config or {}).get('aws_general', {})
+    pool_key = (kind, service, aws_config.get('region_name'))
+    if pool_key not in _AWS_CLIENTS:
+        session = get_aws_session()
+        with _AWS_LOCK:
+            if pool_key not in _AWS_CLIENTS:
+                factory = session.client if kind == 'client' else session.resource
+                _AWS_CLIENTS[pool_key] = factory(
+                    service,
+                    region_name=aws_config.get('region_name'),
+                    verify=aws_config.get('verify', True),
+                    config=_create_botocore_config(aws_config.get('connection', {}))
+                )
+    return _AWS_CLIENTS[pool_key]
+
+
+def _create_botocore_config(connection_config):
+    from botocore.config import Config
 
+    return Config(
+        max_pool_connections=connection_config.get(
+            'max_pool_connections', DEFAULT_MAX_POOL_CONNECTIONS),
+        tcp_keepalive=connection_config.get('tcp_keepalive', True),
+        connect_timeout=connection_config.get('connect_timeout', 60),
+        read_timeout=connection_config.get('read_timeout', 60),
+        retries={
+            'mode': connection_config.get('retry_mode', 'standard'),
+            'max_attempts': connection_config.get('max_attempts', 5),
+        }
+    )
+
+
+def get_ssm_parameters(names, config=None, cache_file=None, cache_ttl=None):
+    """
+    Returns decrypted SSM parameters, fetching in batched GetParameters calls any this process
+    hasn't seen or has held for more than cache_ttl seconds (DEFAULT_SSM_TTL without one), so a
+    long-lived process picks up rotated values. When a cache file and TTL are given the values are
+    also kept on disk, readable only by the current user, so later processes on the same host can
+    skip SSM.
+    """
+    with _SSM_LOCK:
+        now = time.time()
+        missing = _get_expired_ssm_parameters(names, now)
+        if missing and cache_file and cache_ttl:
+            expires_at, parameters = _read_ssm_cache(cache_file)
+            _SSM_PARAMETERS.update(
+                {name: (value, expires_at) for name, value in parameters.items()})
+            missing = _get_expired_ssm_parameters(names, now)
+        if missing:
+            expires_at = now + (cache_ttl or DEFAULT_SSM_TTL)
+            _SSM_PARAMETERS.update({
+                name: (value, expires_at)
+                for name, value in _fetch_ssm_parameters(missing, config).items()
+            })
+            if cache_file and cache_ttl:
+                _write_ssm_cache(cache_file, {
+                    name: parameter for name, parameter in _SSM_PARAMETERS.items()
+                    if parameter[1] > now
+                })
+        return {name: _SSM_PARAMETERS[name][0] for name in names}
+
+
+def _get_expired_ssm_parameters(names, now):
+    return [
+        name for name in names if name not in _SSM_PARAMETERS or _SSM_PARAMETERS[name][1] <= now]
+
+
+def _fetch_ssm_parameters(names, config):
+    logger.info(f"Fetching SSM parameters: {names}")
+
+    client = get_boto_client('ssm', config)
+    parameters = {}
+    for start in range(0, len(names), SSM_BATCH_SIZE):
+        with metrics.span('ssm.GetParameters') as span:
+            response = client.get_parameters(
+                Names=names[start:start + SSM_BATCH_SIZE], WithDecryption=True)
+            span.add('retries', _get_retry_attempts(response))
+        if response.get('InvalidParameters'):
+            raise GeneralError(f"SSM parameters not found: {response.get('InvalidParameters')}")
+        parameters.update({
+            param.get('Name'): param.get('Value') for param in response.get('Parameters')})
+    return parameters
+
+
+def _read_ssm_cache(cache_file):
+    """
+    Returns when the cached parameters expire and the parameters, with no parameters if the cache
+    is missing, unsafe, unreadable or expired.
+    """
+    cache_file = os.path.expanduser(cache_file)
+    try:
+        file_stat = os.stat(cache_file)
+        if file_stat.st_uid != os.getuid() or file_stat.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            logger.warning(f"Ignoring SSM cache with unsafe ownership or mode: {cache_file}")
+            return 0, {}
+        with open(cache_file) as cache_str:
+            cache = json.load(cache_str)
+    except FileNotFoundError:
+        return 0, {}
+    except (IOError, ValueError):
+        logger.warning(f"Ignoring unreadable SSM cache: {cache_file}")
+        return 0, {}
+    if cache.get('expires_at', 0) < time.time():
+        return 0, {}
+    return cache['expires_at'], cache.get('parameters', {})
+
+
+def _write_ssm_cache(cache_file, parameters):
+    """
+    Writes parameters, a mapping of name to value and expiry, to the cache, which expires with the
+    first of them.
+    """
+    try:
+        atomic_write_json(os.path.expanduser(cache_file), {
+            'expires_at': min(expires_at for _, expires_at in parameters.values()),
+            'parameters': {name: value for name, (value, _) in parameters.items()},
+        }, mode=0o600)
+    except IOError as io_err:
+        logger.warning(f"Couldn't write SSM cache: {io_err}")
+
+
+def get_latest_items_by_partition_key(
+        resource, table_name, partition_and_sort_key, limit, attributes=None, page_size=None,
+        filter_condition=None):
+    """
+    Returns at most `limit` items from a partition, newest first by sort key. If a sort key value
+    is given, only items strictly older than it are returned. If attributes are given, only they
+    and the keys are read. Items failing filter_condition are skipped, though DynamoDB still reads
+    them. Pages are followed until the limit is met or the partition runs out.
+    """
+    from boto3.dynamodb.conditions import Key
 
-def get_items_by_partition_key(resource, table_name, key_name, key_value):
     table = resource.Table(table_name)
-    response = table.query(KeyConditionExpression=Key(key_name).eq(key_value))
-    return response['Items']
+    partition_key_name = partition_and_sort_key['partition_key_name']
+    sort_key_name = partition_and_sort_key['sort_key_name']
+
+    key_condition = Key(partition_key_name).eq(partition_and_sort_key['partition_key_value'])
+    if partition_and_sort_key.get('sort_key_value') is not None:
+        key_condition &= Key(sort_key_name).lt(partition_and_sort_key['sort_key_value'])
+    query_kwargs = {'KeyConditionExpression': key_condition, 'ScanIndexForward': False}
+    if attributes is not None:
+        query_kwargs.update(_get_projection([partition_key_name, sort_key_name, *attributes]))
+    if filter_condition is not None:
+        query_kwargs['FilterExpression'] = filter_condition
+
+    items = []
+    while len(items) < limit:
+        with metrics.span('dynamodb.Query', table=table_name) as span:
+            response = table.query(
+                Limit=min(limit - len(items), page_size or limit), **query_kwargs)
+            span.add('retries', _get_retry_attempts(response))
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items[:limit]
+
+
+def scan_in_segments(resource, table_name, segments, attributes=None, filter_condition=None,
+                     page_size=None):
+    """
+    Yields every item in a table matching filter_condition, read by `segments` Scans running at
+    once, each over its own share of the table. If attributes are given, only they are read. Items
+    arrive in no particular order and only a few pages are held at a time, however big the table.
+    """
+    table = resource.Table(table_name)
+    scan_kwargs = _get_projection(attributes) if attributes is not None else {}
+    if filter_condition is not None:
+        scan_kwargs['FilterExpression'] = filter_condition
+    if page_size is not None:
+        scan_kwargs['Limit'] = page_size
+
+    def read_segment(segment):
+        return _read_pages(
+            table.scan, 'dynamodb.Scan', table_name,
+            dict(scan_kwargs, Segment=segment, TotalSegments=segments)
+        )
+
+    return _stream_pages([
+        lambda segment=segment: read_segment(segment) for segment in range(segments)])
+
+
+def query_in_parallel(resource, table_name, key_conditions, index_name=None, attributes=None,
+                      page_size=None, max_workers=None):
+    """
+    Yields the items matching each of key_conditions, from the table or one of its indexes, with
+    the Queries running at once. Items of one Query arrive in sort key order, but Queries are
+    interleaved. Holds only a few pages at a time, as scan_in_segments does.
+    """
+    table = resource.Table(table_name)
+    query_kwargs = _get_projection(attributes) if attributes is not None else {}
+    if index_name is not None:
+        query_kwargs['IndexName'] = index_name
+    if page_size is not None:
+        query_kwargs['Limit'] = page_size
+
+    def read_query(key_condition):
+        return _read_pages(
+            table.query, 'dynamodb.Query', table_name,
+            dict(query_kwargs, KeyConditionExpression=key_condition)
+        )
+
+    return _stream_pages([
+        lambda key_condition=key_condition: read_query(key_condition)
+        for key_condition in key_conditions
+    ], max_workers)
+
+
+def _read_pages(operation, span_name, table_name, kwargs):
+    while True:
+        with metrics.span(span_name, table=table_name) as span:
+            response = operation(**kwargs)
+            span.add('retries', _get_retry_attempts(response))
+        yield response['Items']
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs = dict(kwargs, ExclusiveStartKey=response['LastEvaluatedKey'])
+
+
+def _stream_pages(page_readers, max_workers=None):
+    """
+    Runs the page readers on a thread each, up to max_workers at once, and yields the items of
+    their pages as they arrive. The queue between them holds a couple of pages per reader, so a
+    slow consumer holds the readers back instead of pages piling up. A reader's error is raised to
+    the consumer, and readers stop at their next page once the consumer stops.
+    """
+    if not page_readers:
+        return
+    pages = queue.Queue(maxsize=STREAM_PAGES_PER_READER * len(page_readers))
+    stopped = threading.Event()
+    finished = object()
+
+    def offer(page):
+        while not stopped.is_set():
+            try:
+                pages.put(page, timeout=STREAM_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(page_reader):
+        if stopped.is_set():
+            return
+        try:
+            for page in page_reader():
+                if not offer(page):
+                    return
+        except Exception as err:  # pylint: disable=broad-except
+            offer(err)
+        offer(finished)
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers or len(page_readers), len(page_readers)))
+    try:
+        for page_reader in page_readers:
+            executor.submit(run, page_reader)
+        remaining = len(page_readers)
+        while remaining:
+            page = pages.get()
+            if page is finished:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        stopped.set()
+        executor.shutdown(wait=True)
 
 
 def put_with_partition_and_sort_key(resource, table_name, partition_and_sort_key, data):
     table = resource.Table(table_name)
-    item = {
+    item = dict(_get_key(partition_and_sort_key), **data)
+    with metrics.span('dynamodb.PutItem', table=table_name) as span:
+        span.add('retries', _get_retry_attempts(table.put_item(Item=item)))
+    return item
+
+
+def batch_put_with_partition_and_sort_key(resource, table_name, keys_and_data):
+    """
+    Puts a (partition_and_sort_key, data) pair per item with BatchWriteItem, 25 items a call, and
+    returns the items as put. Items DynamoDB leaves unprocessed are resent with backoff.
+    """
+    items = [
+        dict(_get_key(partition_and_sort_key), **data)
+        for partition_and_sort_key, data in keys_and_data
+    ]
+    for start in range(0, len(items), BATCH_WRITE_SIZE):
+        request_items = {table_name: [
+            {'PutRequest': {'Item': item}} for item in items[start:start + BATCH_WRITE_SIZE]]}
+        for attempt in range(BATCH_ATTEMPTS):
+            if attempt:
+                time.sleep(BATCH_BACKOFF_BASE * 2 ** (attempt - 1))
+            with metrics.span('dynamodb.BatchWriteItem', table=table_name) as span:
+                response = resource.batch_write_item(RequestItems=request_items)
+                span.add('retries', _get_retry_attempts(response))
+            request_items = response.get('UnprocessedItems')
+            if not request_items:
+                break
+        if request_items:
+            raise GeneralError(
+                f"DynamoDB left {len(request_items[table_name])} items unwritten after "
+                f"{BATCH_ATTEMPTS} attempts"
+            )
+    return items
+
+
+def batch_get_with_partition_and_sort_key(resource, table_name, partition_and_sort_keys):
+    """
+    Gets an item per key with BatchGetItem, 100 keys a call, and returns them in the order of the
+    keys, None where there is no such item. Keys DynamoDB leaves unprocessed are resent with
+    backoff.
+    """
+    keys = [_get_key(partition_and_sort_key) for partition_and_sort_key in partition_and_sort_keys]
+    found = {}
+    for start in range(0, len(keys), BATCH_GET_SIZE):
+        request_items = {table_name: {'Keys': keys[start:start + BATCH_GET_SIZE]}}
+        for attempt in range(BATCH_ATTEMPTS):
+            if attempt:
+                time.sleep(BATCH_BACKOFF_BASE * 2 ** (attempt - 1))
+            with metrics.span('dynamodb.BatchGetItem', table=table_name) as span:
+                response = resource.batch_get_item(RequestItems=request_items)
+                span.add('retries', _get_retry_attempts(response))
+            for item in response.get('Responses', {}).get(table_name, []):
+                found[_get_key_values(item, partition_and_sort_keys[0])] = item
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+        if request_items:
+            raise GeneralError(
+                f"DynamoDB left {len(request_items[table_name]['Keys'])} items unread after "
+                f"{BATCH_ATTEMPTS} attempts"
+            )
+    return [
+        found.get(_get_key_values(key, partition_and_sort_key))
+        for key, partition_and_sort_key in zip(keys, partition_and_sort_keys)
+    ]
+
+
+def get_with_partition_and_sort_key(resource, table_name, partition_and_sort_key):
+    table = resource.Table(table_name)
+    with metrics.span('dynamodb.GetItem', table=table_name) as span:
+        response = table.get_item(Key=_get_key(partition_and_sort_key))
+        span.add('retries', _get_retry_attempts(response))
+    return response.get('Item')
+
+
+def update_if_version_matches(
+        resource, table_name, partition_and_sort_key, data, version_name, version):
+    """
+    Sets the given attributes and increments the version attribute in one atomic UpdateItem,
+    provided the stored version still equals `version` (or, when it is None, that the item has no
+    version yet). Returns False instead of writing if another writer got there first.
+    """
+    condition = 'attribute_not_exists(#version)'
+    attribute_values = {':one': 1}
+    if version is not None:
+        condition = '#version = :version'
+        attribute_values[':version'] = version
+    return _update_if(
+        resource, table_name, partition_and_sort_key, data, condition,
+        {'#version': version_name}, attribute_values, ' ADD #version :one'
+    )
+
+
+def update_if_not_newer(
+        resource, table_name, partition_and_sort_key, data, order_name, order_value):
+    """
+    Sets the given attributes and the order attribute to `order_value` in one atomic UpdateItem,
+    provided the stored order attribute is missing or no greater than `order_value`. Returns False
+    instead of writing if a write with a greater order value got there first.
+    """
+    return _update_if(
+        resource, table_name, partition_and_sort_key, dict(data, **{order_name: order_value}),
+        'attribute_not_exists(#order) OR #order <= :order',
+        {'#order': order_name}, {':order': order_value}
+    )
+
+
+def _update_if(resource, table_name, partition_and_sort_key, data, condition, attribute_names,
+               attribute_values, update_suffix=''):
+    from botocore.exceptions import ClientError
+
+    table = resource.Table(table_name)
+    attribute_names = dict(
+        attribute_names, **{f'#attr{index}': name for index, name in enumerate(data)})
+    attribute_values = dict(
+        attribute_values, **{f':attr{index}': value for index, value in enumerate(data.values())})
+
+    try:
+        with metrics.span('dynamodb.UpdateItem', table=table_name) as span:
+            response = table.update_item(
+                Key=_get_key(partition_and_sort_key),
+                UpdateExpression='SET {}{}'.format(', '.join(
+                    f'#attr{index} = :attr{index}' for index in range(len(data))), update_suffix),
+                ConditionExpression=condition,
+                ExpressionAttributeNames=attribute_names,
+                ExpressionAttributeValues=attribute_values
+            )
+            span.add('retries', _get_retry_attempts(response))
+    except ClientError as cli_err:
+        if cli_err.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return False
+        raise
+    return True
+
+
+def _get_projection(attributes):
+    attribute_names = {f'#attr{index}': name for index, name in enumerate(attributes)}
+    return {
+        'ProjectionExpression': ', '.join(attribute_names),
+        'ExpressionAttributeNames': attribute_names,
+    }
+
+
+def _get_key(partition_and_sort_key):
+    return {
         partition_and_sort_key['partition_key_name']: partition_and_sort_key['partition_key_value'],
         partition_and_sort_key['sort_key_name']: partition_and_sort_key['sort_key_value']
     }
-    item.update(data)
-    table.put_item(Item=item)
+
+
+def _get_key_values(item, partition_and_sort_key):
+    return (
+        item[partition_and_sort_key['partition_key_name']],
+        item[partition_and_sort_key['sort_key_name']]
+    )
+
+
+def _get_retry_attempts(response):
+    return (response or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
@@ -0,0 +1,92 @@
+"""
+Utilities for storing per-file coverage compactly and comparing it between builds.
+"""
+
+# pylint: disable=invalid-name, missing-docstring
+
+import struct
+import sys
+import zlib
+from array import array
+
+FILE_COVERAGE_FORMAT_VERSION = 1
+FILE_COVERAGE_SUFFIX = '#files'
+COVERAGE_CHANGES_TO_REPORT = 5
+_HEADER = struct.Struct('<BI')
+
+
+def pack_file_coverage(files):
+    """
+    Packs {file: (lines_valid, lines_covered, branches_valid, branches_covered)} into compressed
+    bytes: a version byte, the sorted file names joined by newlines, then the counts as
+    little-endian unsigned 32-bit integers in the same order. Sorting keeps shared path prefixes
+    together so they compress well.
+    """
+    file_names = sorted(files)
+    names = '\n'.join(file_names).encode()
+    counts = array('I', [count for file_name in file_names for count in files[file_name]])
+    if sys.byteorder != 'little':
+        counts.byteswap()
+    return zlib.compress(
+        _HEADER.pack(FILE_COVERAGE_FORMAT_VERSION, len(names)) + names + counts.tobytes(), 9)
+
+
+def unpack_file_coverage(data):
+    """
+    Reverses pack_file_coverage, raising ValueError for data it didn't produce. DynamoDB hands
+    binary attributes back wrapped in a Binary, so anything with a `value` is unwrapped first.
+    """
+    try:
+        data = zlib.decompress(bytes(getattr(data, 'value', data)))
+    except zlib.error as zlib_err:
+        raise ValueError(f"Couldn't decompress file coverage: {zlib_err}")
+    version, names_length = _HEADER.unpack_from(data)
+    if version != FILE_COVERAGE_FORMAT_VERSION:
+        raise ValueError(f"Unknown file coverage format version: {version}")
+    names_end = _HEADER.size + names_length
+    file_names = data[_HEADER.size:names_end].decode().split('\n') if names_length else []
+    counts = array('I')
+    counts.frombytes(data[names_end:])
+    if sys.byteorder != 'little':
+        counts.byteswap()
+    return {
+        file_name: tuple(counts[index * 4:index * 4 + 4])
+        for index, file_name in enumerate(file_names)
+    }
+
+
+def get_coverage_rate(counts):
+    """
+    Returns the percentage of lines and branches covered, as coverage.py's report does, or None if
+    there is nothing to cover.
+    """
+    lines_valid, lines_covered, branches_valid, branches_covered = counts
+    valid = lines_valid + branches_valid
+    if not valid:
+        return None
+    return (lines_covered + branches_covered) / valid * 100
+
+
+def get_total_coverage_rate(files):
+    totals = [sum(file_counts[index] for file_counts in files.values()) for index in range(4)]
+    return get_coverage_rate(totals)
+
+
+def get_coverage_changes(files, previous_files, limit=COVERAGE_CHANGES_TO_REPORT):
+    """
+    Returns up to `limit` files whose coverage rate moved furthest since the previous build, most
+    changed first, each as {'file', 'rate', 'change'}. Only files present in both builds with
+    something to cover are compared, and unchanged files are left out.
+    """
+    changes = []
+    for file_name, counts in files.items():
+        previous_counts = previous_files.get(file_name)
+        if previous_counts is None:
+            continue
+        rate = get_coverage_rate(counts)
+        previous_rate = get_coverage_rate(previous_counts)
+        if rate is None or previous_rate is None or rate == previous_rate:
+            continue
+        changes.append({'file': file_name, 'rate': rate, 'change': rate - previous_rate})
+    changes.sort(key=lambda change: (-abs(change['change']), change['file']))
+    return changes[:limit]
@@ -4,25 +4,70 @@ General utilities.
 
 # pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
 
+import functools
+import json
 import logging
 import os
+import threading
+from collections.abc import Mapping
 
-import certifi
-import urllib3
-import yaml
-from yaml.error import YAMLError
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 logger.addHandler(logging.StreamHandler())
 
+CACHE_DIR_ENV = 'PYDEVHAMMER_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join('~', '.cache', 'pydevhammer')
+
+
+class LazyConfig(Mapping):
+    """
+    Read-only view of a YAML file in CONFIG_DIR. The file is only read and parsed the first time a
+    key is accessed, and the result is kept for the life of the process. A different loader can be
+    given to build some other mapping from the same file.
+    """
+
+    def __init__(self, file_name, loader=None):
+        self._file_name = file_name
+        self._loader = loader or load_config_file
+        self._config = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    config_dir = os.environ.get('CONFIG_DIR')
+                    if config_dir is None:
+                        raise GeneralError(f"CONFIG_DIR is not set, can't load {self._file_name}")
+                    with metrics.span('config.load', file=self._file_name):
+                        config = self._loader(os.path.join(config_dir, self._file_name))
+                    if config is None:
+                        raise GeneralError(f"Couldn't load config: {self._file_name}")
+                    self._config = config
+        return self._config
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
 
 def load_config_file(config_file):
     logger.info("Loading config file.")
 
+    import yaml
+    from yaml.error import YAMLError
+
     try:
         with open(config_file) as config_str:
-            config = yaml.load(config_str)
+            config = yaml.safe_load(config_str)
     except (IOError, FileNotFoundError):
         logger.error(f"Failed to open config file: {config_file}")
     except YAMLError:
@@ -31,7 +76,45 @@ def load_config_file(config_file):
         return config
 
 
+def get_cache_dir(cache_dir=None):
+    """
+    Returns cache_dir, else PYDEVHAMMER_CACHE_DIR, else ~/.cache/pydevhammer, with ~ expanded.
+    """
+    return os.path.expanduser(cache_dir or os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR))
+
+
+def atomic_write_json(file_path, data, mode=0o666, fsync=False):
+    """
+    Writes data as JSON to a temporary file beside file_path and moves it into place, so a reader
+    sees either the old file or the new one, never part of it. A missing directory is created
+    readable by the user only. With fsync, the data is on disk before the file is moved.
+    """
+    os.makedirs(os.path.dirname(file_path) or '.', mode=0o700, exist_ok=True)
+    temp_file = f'{file_path}.{os.getpid()}.tmp'
+    file_descriptor = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(file_descriptor, 'w') as file_str:
+        json.dump(data, file_str)
+        if fsync:
+            file_str.flush()
+            os.fsync(file_str.fileno())
+    os.replace(temp_file, file_path)
+
+
 def get_certs():
+    """
+    Returns the CA bundle to verify GitHub with, CERTIFICATE_FILE or certifi's. It is only worked
+    out once per CERTIFICATE_FILE for the life of the process.
+    """
+    return _get_ca_bundle(os.environ.get('CERTIFICATE_FILE'))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_ca_bundle(certificate_file):
+    import certifi
+    import urllib3
+
     pool_manager = urllib3.PoolManager(
-        cert_reqs='CERT_REQUIRED', ca_certs=os.environ.get('CERTIFICATE_FILE', certifi.where()))
+        cert_reqs='CERT_REQUIRED',
+        ca_certs=certificate_file if certificate_file is not None else certifi.where()
+    )
     return pool_manager.connection_pool_kw.get('ca_certs')
@@ -0,0 +1,278 @@
+"""
+Utilities for interacting with the GitHub API.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import json
+import logging
+import random
+import threading
+import time
+
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+RETRY_STATUS_CODES = (403, 429, 500, 502, 503, 504)
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 30.0
+MAX_WAIT_SECONDS = 60.0
+STATUSES_PER_PAGE = 100
+DEFAULT_CHECK_NAME = 'py-dev-hammer'
+FAILING_STATES = ('failure', 'error')
+
+
+class RateLimiter(object):
+    """
+    Paces requests against the quota GitHub reports in its X-RateLimit-* headers. Requests go out
+    unthrottled while the remaining quota covers those still pending; once it doesn't, they are
+    spread evenly over the time left until the quota resets. No single wait exceeds max_wait.
+    """
+
+    def __init__(self, pending=0, max_wait=MAX_WAIT_SECONDS):
+        self.pending = pending
+        self.max_wait = max_wait
+        self.remaining = None
+        self.reset_at = None
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self.pending = max(self.pending - 1, 0)
+            now = time.time()
+            if self.remaining is None or self.reset_at is None or now >= self.reset_at:
+                return 0.0
+            if self.remaining > self.pending:
+                self.remaining -= 1
+                return 0.0
+            interval = (self.reset_at - now) / max(self.remaining, 1)
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + interval
+            self.remaining = max(self.remaining - 1, 0)
+            delay = min(slot - now, self.max_wait)
+        if delay > 0:
+            logger.info(f"Pacing GitHub request by {delay:.2f}s to stay within the rate limit")
+            time.sleep(delay)
+        return delay
+
+    def update(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_at = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset_at is None:
+            return
+        with self._lock:
+            self.remaining = int(remaining)
+            self.reset_at = float(reset_at)
+
+
+def request_with_backoff(session, method, url, rate_limiter=None,
+                         max_attempts=DEFAULT_MAX_ATTEMPTS, **kwargs):
+    """
+    Sends a request, retrying rate limited (403/429) and server error responses with jittered
+    exponential backoff, or after Retry-After when GitHub sends it. The last response is returned
+    if every attempt is used up.
+    """
+    with metrics.span(f'github.{method}') as span:
+        span.add('bytes', len(kwargs.get('data') or b''))
+        for attempt in range(max_attempts):
+            if rate_limiter is not None:
+                span.add('paced_seconds', rate_limiter.acquire())
+            response = session.request(method, url, **kwargs)
+            if rate_limiter is not None:
+                rate_limiter.update(response)
+            span.set('status_code', response.status_code)
+            span.add('bytes', len(response.content or b''))
+            if not _should_retry(response) or attempt == max_attempts - 1:
+                return response
+            span.add('retries')
+            delay = _get_backoff_delay(response, attempt)
+            logger.info(f"GitHub returned {response.status_code}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+        return response
+
+
+def send_json(session, method, url, data, rate_limiter=None):
+    """
+    Sends data as a JSON body with request_with_backoff. Responses are returned whatever their
+    status code; a GeneralError is raised if the request couldn't be made at all.
+    """
+    from requests.exceptions import MissingSchema, RequestException
+
+    try:
+        return request_with_backoff(
+            session, method, url, rate_limiter, data=json.dumps(data), verify=True)
+    except MissingSchema as sch_exc:  # If URL is incorrect, other errors are HTTP codes
+        raise GeneralError(f"{method} to GitHub MissingSchema Exception: {sch_exc}")
+    except RequestException as req_exc:
+        raise GeneralError(f"{method} to GitHub RequestException: {req_exc}")
+
+
+def get_combined_status(session, url, rate_limiter=None):
+    """
+    Returns the statuses GitHub already holds for a commit, keyed by context.
+    """
+    statuses = {}
+    page = 1
+    while True:
+        response = request_with_backoff(
+            session, 'GET', url, rate_limiter, params={'per_page': STATUSES_PER_PAGE, 'page': page})
+        response.raise_for_status()
+        combined_status = response.json()
+        statuses.update({
+            status.get('context'): status for status in combined_status.get('statuses', [])})
+        if page * STATUSES_PER_PAGE >= combined_status.get('total_count', 0):
+            return statuses
+        page += 1
+
+
+def filter_unchanged_statuses(github_payloads, existing_statuses):
+    """
+    Drops payloads whose state and description match what GitHub already holds for the context.
+    """
+    return [
+        github_payload for github_payload in github_payloads
+        if not _is_unchanged(github_payload, existing_statuses.get(github_payload.get('context')))
+    ]
+
+
+def start_check_run(session, check_runs_url, name, head_sha, target_url):
+    """
+    Creates an in progress Check Run for the commit and returns its URL, or None if it couldn't be
+    created, in which case complete_check_run creates it when the build finishes.
+    """
+    logger.info("Starting GitHub Check Run")
+
+    data = {
+        'name': name,
+        'head_sha': head_sha,
+        'details_url': target_url,
+        'status': 'in_progress',
+        'started_at': _get_github_timestamp(),
+    }
+    try:
+        response = _send_check_run(session, 'POST', check_runs_url, data)
+    except GeneralError as gen_err:
+        logger.warning(
+            f"Couldn't start Check Run, creating it when the build finishes: {gen_err}")
+        return None
+    if not response.ok:
+        logger.warning(
+            f"Couldn't start Check Run, creating it when the build finishes: "
+            f"HTTP {response.status_code}: {response.reason}"
+        )
+        return None
+    return response.json().get('url')
+
+
+def complete_check_run(session, check_runs_url, data, check_run_url=None, head_sha=None):
+    """
+    Completes the Check Run started at check_run_url with data, or creates it completed for
+    head_sha if it was never started.
+    """
+    logger.info("Completing GitHub Check Run")
+
+    if check_run_url is None:
+        response = _send_check_run(session, 'POST', check_runs_url, dict(data, head_sha=head_sha))
+    else:
+        response = _send_check_run(session, 'PATCH', check_run_url, data)
+
+    if not response.ok:
+        raise GeneralError(
+            f"Failed to report GitHub Check Run: HTTP {response.status_code}: {response.reason}")
+    return response.status_code
+
+
+def create_check_run_payload(github_payloads, parse_errors, name, target_url,
+                             coverage_changes=None):
+    """
+    Summarises the statuses that would have been posted as one completed Check Run, which fails if
+    any of them would have.
+    """
+    logger.info("Creating GitHub Check Run payload")
+
+    failing = [
+        github_payload.get('context') for github_payload in github_payloads
+        if github_payload.get('state') in FAILING_STATES
+    ]
+    title = f"{len(github_payloads)} checks passed"
+    if failing:
+        title = f"{len(failing)} of {len(github_payloads)} checks failed: {', '.join(failing)}"
+
+    rows = [
+        f"| {github_payload.get('context')} | {github_payload.get('state')} | "
+        f"{github_payload.get('description')} |"
+        for github_payload in github_payloads
+    ]
+    output = {
+        'title': title,
+        'summary': '\n'.join(['| Test | State | Result |', '| --- | --- | --- |'] + rows),
+    }
+    text = []
+    for test_type, changes in (coverage_changes or {}).items():
+        if changes:
+            text += [f'### Most changed coverage: {test_type}', '| File | Coverage | Change |',
+                     '| --- | --- | --- |']
+            text += [
+                f"| {change['file']} | {change['rate']:.1f}% | {change['change']:+.1f}% |"
+                for change in changes
+            ]
+    if parse_errors:
+        text += ['### Parse errors'] + [
+            f"- **{test_type}**: {parse_error}" for test_type, parse_error in parse_errors.items()
+        ]
+    if text:
+        output['text'] = '\n'.join(text)
+
+    return {
+        'name': name,
+        'details_url': target_url,
+        'status': 'completed',
+        'conclusion': 'failure' if failing else 'success',
+        'completed_at': _get_github_timestamp(),
+        'output': output,
+    }
+
+
+def _is_unchanged(github_payload, existing_status):
+    return existing_status is not None and all(
+        github_payload.get(key) == existing_status.get(key) for key in ('state', 'description'))
+
+
+def _send_check_run(session, method, url, data):
+    logger.info(f"Starting {method} of GitHub Check Run")
+
+    if url is None:
+        raise GeneralError("github.check_runs_url must be set to report with Check Runs")
+    response = send_json(session, method, url, data, RateLimiter(pending=1))
+    logger.info(f"{method} Response Code: Check Run: {response.status_code}")
+    return response
+
+
+def _get_github_timestamp():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+def _should_retry(response):
+    if response.status_code == 403:
+        return (
+            response.headers.get('X-RateLimit-Remaining') == '0' or
+            'Retry-After' in response.headers
+        )
+    return response.status_code in RETRY_STATUS_CODES
+
+
+def _get_backoff_delay(response, attempt):
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is not None and retry_after.isdigit():
+        return min(float(retry_after), MAX_WAIT_SECONDS)
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        reset_at = response.headers.get('X-RateLimit-Reset')
+        if reset_at is not None:
+            return min(max(float(reset_at) - time.time(), 0.0), MAX_WAIT_SECONDS)
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
@@ -0,0 +1,67 @@
+"""
+Utilities for comparing a branch's builds as columns of scores. Trend figures come from the
+branch rollup instead, see utils.rollups.
+"""
+
+# pylint: disable=invalid-name, missing-docstring
+
+import math
+import operator
+from array import array
+from itertools import islice, repeat
+
+MISSING = float('nan')
+
+
+class History(object):
+    """
+    A branch's build scores held as one array of floats per test type, oldest build first, beside
+    a column of sort key values. A test type missing from a build is stored as NaN, and deltas
+    that touch it are NaN.
+    """
+
+    def __init__(self, timestamps, columns):
+        self.timestamps = timestamps
+        self.columns = columns
+
+    @classmethod
+    def from_items(cls, items, test_types, sort_key_name=None):
+        """
+        Builds the columns from DynamoDB items. Items are ordered by sort_key_name when given,
+        otherwise they are taken to be oldest first already.
+        """
+        if sort_key_name is not None:
+            items = sorted(items, key=operator.itemgetter(sort_key_name))
+            timestamps = array('d', map(float, map(operator.itemgetter(sort_key_name), items)))
+        else:
+            timestamps = array('d', range(len(items)))
+        return cls(timestamps, {
+            test_type: array('d', [
+                MISSING if value is None else float(value)
+                for value in map(operator.methodcaller('get', test_type), items)
+            ])
+            for test_type in test_types
+        })
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def column(self, test_type):
+        return self.columns.get(test_type, array('d', repeat(MISSING, len(self))))
+
+    def deltas(self, test_type, lag=1):
+        """
+        Returns each build's score minus the score `lag` builds earlier; the first `lag` are NaN.
+        """
+        column = self.column(test_type)
+        return array('d', repeat(MISSING, min(lag, len(column)))) + array(
+            'd', map(operator.sub, islice(column, lag, None), column))
+
+    def change_from_previous(self, test_type):
+        """
+        Returns the latest build's score minus the previous build's, or None if either is missing.
+        """
+        if len(self) < 2:
+            return None
+        change = self.deltas(test_type)[-1]
+        return None if math.isnan(change) else change
@@ -0,0 +1,225 @@
+"""
+Utilities for reporting build scores across every branch, from a segmented scan of the table or,
+for recent builds, from a time-ordered index of it kept by this package.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import csv
+import json
+import logging
+import time
+
+from py_dev_hammer.utils.aws import (
+    BATCH_WRITE_SIZE, batch_put_with_partition_and_sort_key, query_in_parallel, scan_in_segments,
+)
+from py_dev_hammer.utils.rollups import ROLLUP_SORT_KEY_VALUE
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+BUILD_DAY_NAME = 'build_day'
+SECONDS_PER_DAY = 24 * 60 * 60
+DEFAULT_SCAN_SEGMENTS = 8
+FORMAT_CSV = 'csv'
+FORMAT_JSON = 'json'
+FORMATS = (FORMAT_CSV, FORMAT_JSON)
+BRANCH_COLUMN = 'branch'
+BUILDS_COLUMN = 'builds'
+CHANGE_SUFFIX = '_change'
+
+
+def get_build_day(build_start_time):
+    """
+    Returns the UTC day a build started on, which partitions the history index.
+    """
+    return time.strftime('%Y-%m-%d', time.gmtime(build_start_time))
+
+
+def read_history(resource, dynamo_config, test_types, since=None, branch_prefix=None,
+                 segments=DEFAULT_SCAN_SEGMENTS, use_index=False):
+    """
+    Yields a row per build with its branch, start time and the score of each of test_types, None
+    where it has none. Rollup items are left out. With `since` and use_index, only the index's
+    partitions for the days since then are queried; otherwise the table is scanned in `segments`.
+    Rows arrive in no particular order.
+    """
+    from boto3.dynamodb.conditions import Attr, Key
+
+    table_name = dynamo_config['table_name']
+    partition_key_name = dynamo_config['partition_key_name']
+    sort_key_name = dynamo_config['sort_key_name']
+    attributes = [partition_key_name, sort_key_name, *test_types]
+
+    if since is not None and use_index:
+        first_day, last_day = int(since // SECONDS_PER_DAY), int(time.time() // SECONDS_PER_DAY)
+        items = query_in_parallel(
+            resource, table_name, [
+                Key(BUILD_DAY_NAME).eq(get_build_day(day * SECONDS_PER_DAY)) &
+                Key(sort_key_name).gte(int(since))
+                for day in range(first_day, last_day + 1)
+            ],
+            index_name=dynamo_config['history_index_name'], attributes=attributes,
+            max_workers=segments
+        )
+    else:
+        condition = Attr(sort_key_name).gt(ROLLUP_SORT_KEY_VALUE)
+        if since is not None:
+            condition = Attr(sort_key_name).gte(int(since))
+        if branch_prefix:
+            condition &= Attr(partition_key_name).begins_with(branch_prefix)
+        items = scan_in_segments(resource, table_name, segments, attributes, condition)
+
+    for item in items:
+        branch = item[partition_key_name]
+        if branch_prefix and not branch.startswith(branch_prefix):
+            continue
+        row = {BRANCH_COLUMN: branch, sort_key_name: int(item[sort_key_name])}
+        for test_type in test_types:
+            score = item.get(test_type)
+            row[test_type] = None if score is None else float(score)
+        yield row
+
+
+def summarise_branches(rows, test_types, sort_key_name):
+    """
+    Returns a row per branch holding its latest scores, how many builds it had and, for each test
+    type, the latest score minus the earliest in the rows. Only the first and last row of each
+    branch are kept, so memory grows with the number of branches rather than builds.
+    """
+    branches = {}
+    for row in rows:
+        summary = branches.get(row[BRANCH_COLUMN])
+        if summary is None:
+            branches[row[BRANCH_COLUMN]] = [row, row, 1]
+            continue
+        summary[2] += 1
+        if row[sort_key_name] < summary[0][sort_key_name]:
+            summary[0] = row
+        if row[sort_key_name] > summary[1][sort_key_name]:
+            summary[1] = row
+
+    summaries = []
+    for branch in sorted(branches):
+        earliest, latest, builds = branches[branch]
+        summary = dict(latest, **{BUILDS_COLUMN: builds})
+        for test_type in test_types:
+            if earliest[test_type] is None or latest[test_type] is None:
+                summary[f'{test_type}{CHANGE_SUFFIX}'] = None
+            else:
+                summary[f'{test_type}{CHANGE_SUFFIX}'] = latest[test_type] - earliest[test_type]
+        summaries.append(summary)
+    return summaries
+
+
+def get_columns(test_types, sort_key_name, summarised=False):
+    columns = [BRANCH_COLUMN, sort_key_name, *test_types]
+    if summarised:
+        columns.append(BUILDS_COLUMN)
+        columns.extend(f'{test_type}{CHANGE_SUFFIX}' for test_type in test_types)
+    return columns
+
+
+def write_rows(rows, output, output_format, columns):
+    """
+    Writes rows to output as they come, as CSV with a header of columns or as JSON Lines, and
+    returns how many were written.
+    """
+    count = 0
+    if output_format == FORMAT_CSV:
+        writer = csv.DictWriter(output, columns, extrasaction='ignore')
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+    else:
+        for count, row in enumerate(rows, 1):
+            output.write(json.dumps({column: row.get(column) for column in columns}) + '\n')
+    return count
+
+
+def is_history_index_active(client, dynamo_config):
+    """
+    Returns whether the table's history index exists and has finished building, so it holds
+    every build written before it was created.
+    """
+    table = client.describe_table(TableName=dynamo_config['table_name'])['Table']
+    return any(
+        index['IndexName'] == dynamo_config['history_index_name'] and
+        index.get('IndexStatus') == 'ACTIVE' and not index.get('Backfilling')
+        for index in table.get('GlobalSecondaryIndexes', [])
+    )
+
+
+def create_history_index(client, resource, dynamo_config, segments=DEFAULT_SCAN_SEGMENTS):
+    """
+    Adds the history index to the table, partitioned by the day builds started on and sorted by
+    their start time, unless it already has it. Builds written before this package recorded their
+    day are then given one, so the index covers them too. Returns how many builds were updated.
+    """
+    from boto3.dynamodb.conditions import Attr
+
+    table_name = dynamo_config['table_name']
+    index_name = dynamo_config['history_index_name']
+    sort_key_name = dynamo_config['sort_key_name']
+    table = client.describe_table(TableName=table_name)['Table']
+    if any(index['IndexName'] == index_name for index in table.get('GlobalSecondaryIndexes', [])):
+        logger.info(f"Table {table_name} already has history index {index_name}")
+    else:
+        create_index = {
+            'IndexName': index_name,
+            'KeySchema': [
+                {'AttributeName': BUILD_DAY_NAME, 'KeyType': 'HASH'},
+                {'AttributeName': sort_key_name, 'KeyType': 'RANGE'},
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+        }
+        if table.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+            throughput = table['ProvisionedThroughput']
+            create_index['ProvisionedThroughput'] = {
+                'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+                'WriteCapacityUnits': throughput['WriteCapacityUnits'],
+            }
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=[
+                {'AttributeName': BUILD_DAY_NAME, 'AttributeType': 'S'},
+                {'AttributeName': sort_key_name, 'AttributeType': 'N'},
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': create_index}]
+        )
+        logger.info(f"Creating history index {index_name} on table {table_name}")
+
+    items = scan_in_segments(
+        resource, table_name, segments, filter_condition=(
+            Attr(sort_key_name).gt(ROLLUP_SORT_KEY_VALUE) & Attr(BUILD_DAY_NAME).not_exists()))
+    updated = 0
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == BATCH_WRITE_SIZE:
+            updated += _add_build_days(resource, dynamo_config, batch)
+            batch = []
+    updated += _add_build_days(resource, dynamo_config, batch)
+    logger.info(f"Recorded the build day of {updated} earlier builds")
+    return updated
+
+
+def _add_build_days(resource, dynamo_config, items):
+    if not items:
+        return 0
+    partition_key_name = dynamo_config['partition_key_name']
+    sort_key_name = dynamo_config['sort_key_name']
+    batch_put_with_partition_and_sort_key(resource, dynamo_config['table_name'], [
+        (
+            {
+                'partition_key_name': partition_key_name,
+                'partition_key_value': item[partition_key_name],
+                'sort_key_name': sort_key_name,
+                'sort_key_value': item[sort_key_name],
+            },
+            dict(item, **{BUILD_DAY_NAME: get_build_day(int(item[sort_key_name]))})
+        )
+        for item in items
+    ])
+    return len(items)
@@ -0,0 +1,145 @@
+"""
+Utilities for analysing only the files that changed, reusing cached per-file results for the rest.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+from py_dev_hammer.utils.general import atomic_write_json, get_cache_dir
+from py_dev_hammer.utils.parsers import compile_pattern
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+RESULT_CACHE_VERSION = 1
+DEFAULT_CACHE_MAX_ENTRIES = 20000
+AGGREGATE_SUM = 'sum'
+AGGREGATE_MEAN = 'mean'
+AGGREGATE_COUNT = 'count'
+AGGREGATES = (AGGREGATE_SUM, AGGREGATE_MEAN, AGGREGATE_COUNT)
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def hash_files(paths, suffix):
+    """
+    Returns the SHA-256 of every file under paths whose name ends with suffix, by path, sorted.
+    """
+    file_paths = []
+    for path in paths:
+        if os.path.isfile(path):
+            file_paths.append(path)
+            continue
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            file_paths.extend(
+                os.path.join(dir_path, file_name) for file_name in sorted(file_names)
+                if file_name.endswith(suffix)
+            )
+    return {file_path: _hash_file(file_path) for file_path in sorted(set(file_paths))}
+
+
+def _hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file_bytes:
+        for chunk in iter(lambda: file_bytes.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_file_results(lines, file_regex, file_paths):
+    """
+    Totals a tool's output per file. A line matching file_regex with a `file` group names the file
+    that following lines belong to; one with a `value` group adds to that file's sum and count. A
+    line can carry both groups. Every one of file_paths gets a result, zero if it printed nothing.
+    """
+    pattern = compile_pattern(file_regex)
+    file_results = {file_path: {'sum': 0.0, 'count': 0} for file_path in file_paths}
+    normalised = {os.path.abspath(file_path): file_path for file_path in file_paths}
+    current_file = None
+    for line in lines:
+        line_parse = pattern.match(line.rstrip('\n'))
+        if line_parse is None:
+            continue
+        groups = line_parse.groupdict()
+        if groups.get('file') is not None:
+            current_file = normalised.get(os.path.abspath(groups['file']))
+        if current_file is not None and groups.get('value') is not None:
+            file_results[current_file]['sum'] += float(groups['value'])
+            file_results[current_file]['count'] += 1
+        elif current_file is not None and 'value' not in groups:
+            file_results[current_file]['count'] += 1
+    return file_results
+
+
+def aggregate(file_results, how):
+    """
+    Combines per-file results into the score the tool would have printed for the whole tree.
+    """
+    total = sum(file_result['sum'] for file_result in file_results)
+    count = sum(file_result['count'] for file_result in file_results)
+    if how == AGGREGATE_SUM:
+        return total
+    if how == AGGREGATE_COUNT:
+        return float(count)
+    return total / count if count else None
+
+
+class ResultCache(object):
+    """
+    Per-file results for one test type, kept in a JSON file in cache_dir and keyed on the test
+    type's incremental config, the file's path and the SHA-256 of its content. Entries not used for
+    the longest are evicted once there are more than max_entries.
+    """
+
+    def __init__(self, test_type, incremental, cache_dir=None,
+                 max_entries=DEFAULT_CACHE_MAX_ENTRIES):
+        self.cache_file = os.path.join(
+            get_cache_dir(cache_dir), f'results-v{RESULT_CACHE_VERSION}-{test_type}.json')
+        self.max_entries = max_entries
+        self._config_hash = hashlib.sha256(
+            json.dumps(incremental, sort_keys=True).encode()).hexdigest()[:16]
+        self._entries = None
+
+    def get(self, file_path, content_hash):
+        entry = self._load().get(self._key(file_path, content_hash))
+        if entry is None:
+            return None
+        entry['used'] = time.time()
+        return entry['result']
+
+    def put(self, file_path, content_hash, result):
+        self._load()[self._key(file_path, content_hash)] = {'result': result, 'used': time.time()}
+
+    def save(self):
+        entries = self._load()
+        if len(entries) > self.max_entries:
+            newest = sorted(entries.items(), key=lambda item: item[1]['used'])[-self.max_entries:]
+            logger.info(f"Evicting {len(entries) - len(newest)} cached results: {self.cache_file}")
+            entries = dict(newest)
+            self._entries = entries
+
+        try:
+            atomic_write_json(self.cache_file, entries)
+        except IOError as io_err:
+            logger.warning(f"Couldn't write result cache: {io_err}")
+
+    def _key(self, file_path, content_hash):
+        return f'{self._config_hash}:{os.path.normpath(file_path)}:{content_hash}'
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.cache_file) as cache_str:
+                    self._entries = json.load(cache_str)
+            except FileNotFoundError:
+                self._entries = {}
+            except (IOError, ValueError):
+                logger.warning(f"Ignoring unreadable result cache: {self.cache_file}")
+                self._entries = {}
+        return self._entries
@@ -0,0 +1,183 @@
+"""
+Utilities for timing pipeline stages and outbound calls, and for profiling a run.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+PROFILE_STATS_FILE = 'pydevhammer.pstats'
+PROFILE_MEMORY_FILE = 'pydevhammer-memory.txt'
+PROFILE_METRICS_FILE = 'pydevhammer-metrics.json'
+PROFILE_TOP_ALLOCATIONS = 25
+SUMMED_ATTRIBUTES = ('bytes', 'retries')
+
+
+class Metrics(object):
+    """
+    Collects spans: named, timed sections of a run with optional counters such as bytes sent and
+    retries made. While disabled, span() hands back a shared do-nothing span, so instrumented code
+    costs one attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._started_at = None
+        self._lock = threading.Lock()
+
+    def enable(self):
+        with self._lock:
+            self.enabled = True
+            self.spans = []
+            self._started_at = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, **attributes):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, attributes)
+
+    def record(self, name, seconds, **attributes):
+        """
+        Adds a span timed elsewhere, such as in a worker process.
+        """
+        if self.enabled:
+            self._add({'name': name, 'start': None, 'seconds': seconds, 'attributes': attributes})
+
+    def report(self):
+        with self._lock:
+            spans = list(self.spans)
+            started_at = self._started_at
+        summary = {}
+        for span in spans:
+            totals = summary.setdefault(
+                span['name'], {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            totals['count'] += 1
+            totals['seconds'] += span['seconds']
+            totals['max_seconds'] = max(totals['max_seconds'], span['seconds'])
+            for attribute in SUMMED_ATTRIBUTES:
+                if attribute in span['attributes']:
+                    totals[attribute] = totals.get(attribute, 0) + span['attributes'][attribute]
+        return {
+            'total_seconds': time.perf_counter() - started_at if started_at is not None else 0.0,
+            'summary': summary,
+            'spans': spans,
+        }
+
+    def write_report(self, report_file):
+        logger.info(f"Writing metrics report: {report_file}")
+
+        try:
+            with open(report_file, 'w') as report_str:
+                json.dump(self.report(), report_str, indent=2, default=str)
+        except IOError as io_err:
+            logger.warning(f"Couldn't write metrics report: {io_err}")
+
+    def _add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def _offset(self, now):
+        return now - self._started_at if self._started_at is not None else None
+
+
+class _Span(object):
+
+    __slots__ = ('_metrics', '_name', '_attributes', '_start')
+
+    def __init__(self, metrics_, name, attributes):
+        self._metrics = metrics_
+        self._name = name
+        self._attributes = attributes
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start
+        if exc_type is not None:
+            self._attributes['error'] = exc_type.__name__
+        self._metrics._add({  # pylint: disable=protected-access
+            'name': self._name,
+            'start': self._metrics._offset(self._start),  # pylint: disable=protected-access
+            'seconds': seconds,
+            'attributes': self._attributes,
+        })
+        return False
+
+    def set(self, key, value):
+        self._attributes[key] = value
+
+    def add(self, key, value=1):
+        self._attributes[key] = self._attributes.get(key, 0) + value
+
+
+class _NullSpan(object):
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, value=1):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+metrics = Metrics()
+
+
+def start_profiling():
+    """
+    Starts cProfile and tracemalloc and returns the profiler to hand to stop_profiling.
+    """
+    import cProfile
+    import tracemalloc
+
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profiling(profiler, output_dir):
+    """
+    Stops profiling and writes the cProfile stats and the largest traced allocations to
+    output_dir.
+    """
+    import tracemalloc
+
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    os.makedirs(output_dir, exist_ok=True)
+    stats_file = os.path.join(output_dir, PROFILE_STATS_FILE)
+    memory_file = os.path.join(output_dir, PROFILE_MEMORY_FILE)
+    logger.info(f"Writing profile: {stats_file}, {memory_file}")
+    profiler.dump_stats(stats_file)
+    with open(memory_file, 'w') as memory_str:
+        memory_str.write(f"Peak traced memory: {peak_memory} bytes\n")
+        for statistic in snapshot.statistics('lineno')[:PROFILE_TOP_ALLOCATIONS]:
+            memory_str.write(f"{statistic}\n")
+    return stats_file, memory_file
@@ -0,0 +1,186 @@
+"""
+Utilities for parsing test and static analysis result files.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import functools
+import logging
+import mmap
+import os
+import re
+from xml.etree.ElementTree import ParseError, iterparse
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+JUNIT_COUNTERS = ('errors', 'failures', 'skips', 'tests')
+MATCH_FIRST = 'first'
+MATCH_LAST = 'last'
+FORMAT_REGEX = 'regex'
+FORMAT_COBERTURA = 'cobertura'
+CONDITION_COVERAGE_REGEX = re.compile(r'.*\((\d+)/(\d+)\)')
+
+
+@functools.lru_cache(maxsize=None)
+def compile_pattern(regex_pattern):
+    return re.compile(regex_pattern)
+
+
+def find_last_match(input_file, regex_pattern):
+    """
+    Memory-maps the file and tries the pattern against each line from the end backwards, so the
+    summary lines that analysis tools print last are found without reading the rest of the file.
+    Returns the match object of the last matching line, or None.
+    """
+    pattern = compile_pattern(regex_pattern)
+    with open(input_file, 'rb') as results_file:
+        if os.fstat(results_file.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(results_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = len(mapped)
+            while end >= 0:
+                start = mapped.rfind(b'\n', 0, end) + 1
+                line_parse = pattern.match(mapped[start:end].decode('utf-8', errors='replace'))
+                if line_parse is not None:
+                    return line_parse
+                end = start - 1
+    return None
+
+
+def find_first_match(input_file, regex_pattern):
+    pattern = compile_pattern(regex_pattern)
+    with open(input_file, 'r', encoding='utf-8', errors='replace') as results_file:
+        for line in results_file:
+            line_parse = pattern.match(line.rstrip('\n'))
+            if line_parse is not None:
+                return line_parse
+    return None
+
+
+def match_lines(lines, matchers):
+    """
+    Tries every matcher against each line as it arrives, in one pass, and returns the match object
+    of each matcher's first or last matching line (or None) by name. matchers maps a name to a
+    (regex_pattern, match) pair. Every line is consumed, so a tool writing to a pipe is never left
+    blocked on a reader that has stopped.
+    """
+    patterns = [
+        (name, compile_pattern(regex_pattern), match)
+        for name, (regex_pattern, match) in matchers.items()
+    ]
+    line_parses = dict.fromkeys(matchers)
+    for line in lines:
+        line = line.rstrip('\n')
+        for name, pattern, match in patterns:
+            if match == MATCH_FIRST and line_parses[name] is not None:
+                continue
+            line_parse = pattern.match(line)
+            if line_parse is not None:
+                line_parses[name] = line_parse
+    return line_parses
+
+
+def parse_junit_xml(input_file, suite_timings=False):
+    """
+    Streams a JUnit XML file and totals errors, failures, skips and tests across every top-level
+    <testsuite>. Elements are discarded as soon as they close, so memory use does not grow with the
+    file. Reading stops at the opening tag of a lone <testsuite> root, or of a <testsuites> root
+    that carries its own totals unless per-suite timings were asked for.
+    """
+    totals = dict.fromkeys(JUNIT_COUNTERS, 0)
+    suites = []
+    stack = []
+    suite_depth = None
+    with open(input_file, 'rb') as results_file:
+        for event, element in iterparse(results_file, events=('start', 'end')):
+            if event == 'end':
+                stack.pop()
+                if stack:
+                    stack[-1].remove(element)
+                if suite_depth is not None and len(stack) < suite_depth:
+                    suite_depth = None
+                continue
+
+            stack.append(element)
+            if element.tag == 'testsuites' and len(stack) == 1 and 'tests' in element.attrib:
+                if not suite_timings:
+                    return {'totals': _junit_counts(element.attrib), 'suites': suites}
+            elif element.tag == 'testsuite' and suite_depth is None:
+                suite_depth = len(stack)
+                counts = _junit_counts(element.attrib)
+                totals = {name: totals[name] + counts[name] for name in JUNIT_COUNTERS}
+                suites.append({
+                    'name': element.get('name'),
+                    'tests': counts['tests'],
+                    'time': float(element.get('time', 0)),
+                })
+                if len(stack) == 1:
+                    break
+
+    if not suites:
+        raise ParseError(f"No <testsuite> element found in {input_file}")
+    return {'totals': totals, 'suites': suites}
+
+
+def parse_cobertura_xml(input_file):
+    """
+    Streams a Cobertura XML coverage report and counts, per file, the lines and branches that are
+    valid and covered, as (lines_valid, lines_covered, branches_valid, branches_covered). Counting
+    the <line> elements rather than trusting each <class>'s rates lets files split over several
+    classes add up exactly; the copies of lines some tools repeat under <methods> are skipped. Each
+    <class> is discarded once read, so memory grows with the number of files rather than lines.
+    """
+    files = {}
+    counts = None
+    in_methods = False
+    with open(input_file, 'rb') as results_file:
+        for event, element in iterparse(results_file, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == 'class':
+                    counts = files.setdefault(element.get('filename'), [0, 0, 0, 0])
+                elif element.tag == 'methods':
+                    in_methods = True
+                continue
+            if element.tag == 'methods':
+                in_methods = False
+            elif element.tag == 'line' and counts is not None and not in_methods:
+                counts[0] += 1
+                counts[1] += int(element.get('hits', 0)) > 0
+                if element.get('branch') == 'true':
+                    condition_parse = CONDITION_COVERAGE_REGEX.match(
+                        element.get('condition-coverage', ''))
+                    if condition_parse is not None:
+                        counts[2] += int(condition_parse.group(2))
+                        counts[3] += int(condition_parse.group(1))
+            elif element.tag == 'class':
+                counts = None
+                element.clear()
+            elif element.tag == 'coverage':
+                break
+
+    if not files:
+        logger.warning(f"No <class> elements found in {input_file}")
+    return {file_name: tuple(file_counts) for file_name, file_counts in files.items()}
+
+
+def parse_junit_with_regex(input_file, regex_pattern):
+    with open(input_file, 'r') as results_file:
+        line_parse = compile_pattern(regex_pattern).match(results_file.readline())
+    if line_parse is None:
+        raise ParseError(f"Regex pattern did not match {input_file}")
+    results = {
+        result.split(sep='=')[0]: int(result.split(sep='=')[1].strip('"'))
+        for result in line_parse.groups()
+    }
+    return {'totals': _junit_counts(results), 'suites': []}
+
+
+def _junit_counts(attributes):
+    return {
+        'errors': int(attributes.get('errors', 0)),
+        'failures': int(attributes.get('failures', 0)),
+        'skips': int(attributes.get('skipped', attributes.get('skips', 0))),
+        'tests': int(attributes.get('tests', 0)),
+    }
@@ -0,0 +1,223 @@
+"""
+Utilities for loading the app config and building the registry of test types from its tests_to_run
+section, both cached on disk while the config is unchanged.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import namedtuple
+from types import MappingProxyType
+
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.general import atomic_write_json, get_cache_dir
+from py_dev_hammer.utils.incremental import AGGREGATES, AGGREGATE_MEAN
+from py_dev_hammer.utils.parsers import (
+    FORMAT_COBERTURA, FORMAT_REGEX, MATCH_FIRST, MATCH_LAST,
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+REGISTRY_CACHE_VERSION = 7
+TEST_CATEGORIES = ('dynamic', 'static')
+REQUIRED_KEYS = ('input_file', 'message', 'multiplier', 'percent')
+BETTER_HIGHER = 'higher'
+BETTER_LOWER = 'lower'
+INCREMENTAL_REQUIRED_KEYS = ('command', 'paths', 'file_regex')
+INCREMENTAL_EXIT_STATUSES = (0,)
+
+TestType = namedtuple(
+    'TestType',
+    [
+        'name', 'dynamic', 'input_file', 'regex', 'message', 'multiplier', 'percent', 'match',
+        'better', 'command', 'stdout_file', 'incremental', 'format',
+    ]
+)
+
+
+def build_test_registry(tests_to_run):
+    """
+    Validates tests_to_run and returns a read-only mapping of test type name to TestType, with
+    dynamic test types first, each holding its compiled regex.
+    """
+    return MappingProxyType({
+        test_type.name: test_type for test_type in _validate_tests_to_run(tests_to_run)})
+
+
+def load_app_config(config_file, cache_dir=None):
+    """
+    Returns the parsed app config, from the cache shared with load_test_registry when the file is
+    unchanged, so the YAML is only parsed once per version of the config.
+    """
+    return _load_cached_config(config_file, cache_dir)['config']
+
+
+def load_test_registry(config_file, cache_dir=None):
+    """
+    Builds the registry for an app config file from its validated entries, which are cached with
+    the parsed config, so an unchanged config skips YAML parsing and validation next time.
+    """
+    return MappingProxyType({
+        entry['name']: TestType(**dict(
+            entry, regex=re.compile(entry['regex']) if entry['regex'] is not None else None))
+        for entry in _load_cached_config(config_file, cache_dir)['tests_to_run']
+    })
+
+
+def _load_cached_config(config_file, cache_dir=None):
+    """
+    Returns the parsed app config and its validated tests_to_run entries, cached in cache_dir under
+    the SHA-256 of the file. A config that doesn't survive a JSON round trip isn't cached.
+    """
+    import yaml
+    from yaml.error import YAMLError
+
+    try:
+        with open(config_file, 'rb') as config_bytes:
+            content = config_bytes.read()
+    except IOError as io_err:
+        raise GeneralError(f"Failed to open config file: {config_file}: {io_err}")
+    cache_file = os.path.join(
+        get_cache_dir(cache_dir),
+        f'registry-v{REGISTRY_CACHE_VERSION}-{hashlib.sha256(content).hexdigest()}.json'
+    )
+
+    cached = _read_registry_cache(cache_file)
+    if cached is None:
+        try:
+            config = yaml.safe_load(content)
+        except YAMLError:
+            raise GeneralError(f"Couldn't load config from YAML file: {config_file}")
+        cached = {
+            'config': config,
+            'tests_to_run': [
+                dict(
+                    test_type._asdict(),
+                    regex=test_type.regex.pattern if test_type.regex is not None else None
+                )
+                for test_type in _validate_tests_to_run(config['tests_to_run'])
+            ],
+        }
+        try:
+            cacheable = json.loads(json.dumps(config)) == config
+        except (TypeError, ValueError):
+            cacheable = False
+        if cacheable:
+            _write_registry_cache(cache_file, cached)
+        else:
+            logger.warning(f"Not caching {config_file}, it holds values JSON can't represent")
+    return cached
+
+
+def _validate_tests_to_run(tests_to_run):
+    seen = set()
+    for category in TEST_CATEGORIES:
+        for name, test_to_run in (tests_to_run.get(category) or {}).items():
+            if name in seen:
+                raise GeneralError(f"Test type is configured more than once: {name}")
+            seen.add(name)
+            result_format = test_to_run.get('format', FORMAT_REGEX)
+            if result_format not in (FORMAT_REGEX, FORMAT_COBERTURA):
+                raise GeneralError(f"Test type {name} has an unknown format: {result_format}")
+            if result_format == FORMAT_COBERTURA and category != 'static':
+                raise GeneralError(f"Test type {name} can only read Cobertura XML if it is static")
+            required_keys = REQUIRED_KEYS
+            if result_format == FORMAT_REGEX:
+                required_keys += ('regex_pattern',)
+            missing_keys = [key for key in required_keys if key not in test_to_run]
+            if missing_keys:
+                raise GeneralError(f"Test type {name} is missing config keys: {missing_keys}")
+            match = test_to_run.get('match', MATCH_LAST)
+            if match not in (MATCH_FIRST, MATCH_LAST):
+                raise GeneralError(f"Test type {name} has an unknown match mode: {match}")
+            better = test_to_run.get('better', BETTER_HIGHER)
+            if better not in (BETTER_HIGHER, BETTER_LOWER):
+                raise GeneralError(f"Test type {name} has an unknown better direction: {better}")
+            command = test_to_run.get('command')
+            if command is not None and not isinstance(command, str):
+                raise GeneralError(f"Test type {name} has a command that isn't a string: {command}")
+            regex = None
+            if test_to_run.get('regex_pattern') is not None:
+                try:
+                    regex = re.compile(test_to_run['regex_pattern'])
+                except re.error as reg_err:
+                    raise GeneralError(
+                        f"Test type {name} has an invalid regex_pattern: {reg_err}")
+            incremental = test_to_run.get('incremental')
+            if incremental is not None:
+                if result_format != FORMAT_REGEX:
+                    raise GeneralError(
+                        f"Test type {name} can only be incremental with format regex")
+                incremental = _validate_incremental(name, category, incremental)
+            yield TestType(
+                name=name,
+                dynamic=category == 'dynamic',
+                input_file=test_to_run['input_file'],
+                regex=regex,
+                message=test_to_run['message'],
+                multiplier=test_to_run['multiplier'],
+                percent=bool(test_to_run['percent']),
+                match=match,
+                better=better,
+                command=command,
+                stdout_file=test_to_run.get(
+                    'stdout_file',
+                    test_to_run['input_file']
+                    if command and category == 'static' and result_format == FORMAT_REGEX
+                    else None
+                ),
+                incremental=incremental,
+                format=result_format,
+            )
+
+
+def _validate_incremental(name, category, incremental):
+    if category != 'static':
+        raise GeneralError(f"Test type {name} can only be incremental if it is static")
+    missing_keys = [key for key in INCREMENTAL_REQUIRED_KEYS if key not in incremental]
+    if missing_keys:
+        raise GeneralError(f"Test type {name} is missing incremental keys: {missing_keys}")
+    aggregate = incremental.get('aggregate', AGGREGATE_MEAN)
+    if aggregate not in AGGREGATES:
+        raise GeneralError(f"Test type {name} has an unknown incremental aggregate: {aggregate}")
+    try:
+        file_regex = re.compile(incremental['file_regex'])
+    except re.error as reg_err:
+        raise GeneralError(f"Test type {name} has an invalid incremental file_regex: {reg_err}")
+    if 'file' not in file_regex.groupindex:
+        raise GeneralError(f"Test type {name} has an incremental file_regex without a file group")
+    exit_statuses = incremental.get('exit_statuses', INCREMENTAL_EXIT_STATUSES)
+    if not all(isinstance(exit_status, int) for exit_status in exit_statuses):
+        raise GeneralError(f"Test type {name} has non-integer incremental exit_statuses")
+    return {
+        'command': incremental['command'],
+        'paths': list(incremental['paths']),
+        'suffix': incremental.get('suffix', '.py'),
+        'file_regex': incremental['file_regex'],
+        'aggregate': aggregate,
+        'exit_statuses': list(exit_statuses),
+    }
+
+
+def _read_registry_cache(cache_file):
+    try:
+        with open(cache_file) as cache_str:
+            return json.load(cache_str)
+    except FileNotFoundError:
+        return None
+    except (IOError, ValueError):
+        logger.warning(f"Ignoring unreadable test registry cache: {cache_file}")
+        return None
+
+
+def _write_registry_cache(cache_file, cached):
+    try:
+        atomic_write_json(cache_file, cached)
+    except IOError as io_err:
+        logger.warning(f"Couldn't write test registry cache: {io_err}")
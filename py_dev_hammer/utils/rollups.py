@@ -0,0 +1,63 @@
+"""
+Utilities for maintaining the per-branch rollup of build scores used for trend figures.
+"""
+
+# pylint: disable=invalid-name, missing-docstring
+
+ROLLUP_PARTITION_SUFFIX = '#rollup'
+ROLLUP_SORT_KEY_VALUE = 0
+ROLLUP_VERSION_NAME = 'build_count'
+HEAD_STARTED_AT_NAME = 'head_started_at'
+HEAD_COMMIT_NAME = 'head_commit_sha'
+
+
+def get_rollup_key(partition_and_sort_key):
+    """
+    Returns the key of a branch's rollup item. It lives in its own partition so history queries on
+    the branch never see it.
+    """
+    return dict(
+        partition_and_sort_key,
+        partition_key_value=(
+            f"{partition_and_sort_key['partition_key_value']}{ROLLUP_PARTITION_SUFFIX}"),
+        sort_key_value=ROLLUP_SORT_KEY_VALUE
+    )
+
+
+def roll_up(metrics, dynamo_payload, lower_is_better, window):
+    """
+    Returns a copy of a rollup's metrics with a build's scores folded in. Each test type keeps its
+    last score, best score, the scores of the last `window` builds and how many builds in a row it
+    has got worse. Test types in `lower_is_better` improve as their score falls.
+    """
+    rolled_up = dict(metrics)
+    for test_type, score in dynamo_payload.items():
+        metric = metrics.get(test_type)
+        if metric is None:
+            rolled_up[test_type] = {'last': score, 'best': score, 'streak': 0, 'window': [score]}
+            continue
+        pick_best = min if test_type in lower_is_better else max
+        regressed = pick_best(score, metric['last']) != score
+        rolled_up[test_type] = {
+            'last': score,
+            'best': pick_best(score, metric['best']),
+            'streak': metric['streak'] + 1 if regressed else 0,
+            'window': (list(metric['window']) + [score])[-window:],
+        }
+    return rolled_up
+
+
+def get_trend(metrics, test_type):
+    """
+    Returns the rolling mean, window size, best score and regression streak for a test type, or
+    None if the rollup has never seen it.
+    """
+    metric = metrics.get(test_type)
+    if metric is None:
+        return None
+    return {
+        'mean': sum(metric['window']) / len(metric['window']),
+        'window': len(metric['window']),
+        'best': metric['best'],
+        'streak': metric['streak'],
+    }
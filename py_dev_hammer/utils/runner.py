@@ -0,0 +1,56 @@
+"""
+Utilities for running analysis tools and reading their output as it is produced.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import logging
+
+from py_dev_hammer.utils.errors import GeneralError
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+SHELL_FAILURE_STATUSES = (126, 127)  # Command found but not executable, or not found
+
+
+def run_command(command, consume, tee_file=None):
+    """
+    Runs command in a shell and hands an iterator over the lines of its stdout to consume while it
+    runs, copying each line to tee_file when given. Whatever consume leaves unread is drained so
+    the command can finish. Returns what consume returned and the exit status. Analysis tools exit
+    non-zero to report what they found, so only a status meaning the shell couldn't run the command
+    raises GeneralError.
+    """
+    import subprocess
+
+    logger.info(f"Running command: {command}")
+
+    tee = open(tee_file, 'w', encoding='utf-8') if tee_file is not None else None
+    try:
+        process = subprocess.Popen(
+            command, shell=True, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL,
+            universal_newlines=True, encoding='utf-8', errors='replace'
+        )
+        with process.stdout:
+            lines = _tee_lines(process.stdout, tee)
+            result = consume(lines)
+            for _ in lines:
+                pass
+        exit_status = process.wait()
+    finally:
+        if tee is not None:
+            tee.close()
+
+    logger.info(f"Command exited with status {exit_status}: {command}")
+    if exit_status in SHELL_FAILURE_STATUSES:
+        raise GeneralError(f"Couldn't run command, exit status {exit_status}: {command}")
+    return result, exit_status
+
+
+def _tee_lines(lines, tee):
+    for line in lines:
+        if tee is not None:
+            tee.write(line)
+        yield line
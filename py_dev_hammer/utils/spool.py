@@ -0,0 +1,187 @@
+"""
+Utilities for journalling build results on disk until they have been reported.
+"""
+
+# pylint: disable=logging-fstring-interpolation, invalid-name, missing-docstring
+
+import json
+import logging
+import os
+import re
+import uuid
+from contextlib import contextmanager
+
+from py_dev_hammer.utils.general import atomic_write_json
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler())
+
+JOURNAL_FILE = 'journal-{generation}.jsonl'
+JOURNAL_FILE_PATTERN = re.compile(r'^journal-(\d+)\.jsonl$')
+CHECKPOINT_FILE = 'checkpoint.json'
+LOCK_FILE = 'flush.lock'
+JOURNAL_LOCK_FILE = 'journal.lock'
+FLUSHED_IDS_TO_KEEP = 100
+
+
+class Spool(object):
+    """
+    An append-only journal of entries in spool_dir with a checkpoint of which generation of the
+    journal is current and how far it has been flushed. Appends are fsynced before returning and
+    the checkpoint is replaced atomically, so a crash at any point loses nothing and at worst
+    repeats the entry that was being flushed. The ids of recently flushed entries are kept so an
+    entry appended twice is only flushed once.
+    """
+
+    def __init__(self, spool_dir):
+        self.spool_dir = os.path.expanduser(spool_dir)
+        self.checkpoint_file = os.path.join(self.spool_dir, CHECKPOINT_FILE)
+
+    @property
+    def journal_file(self):
+        return self._get_journal_file(self.read_checkpoint()['generation'])
+
+    def append(self, entry):
+        entry = dict(entry, id=entry.get('id') or uuid.uuid4().hex)
+        line = json.dumps(entry, sort_keys=True) + '\n'
+        # Shared with other appends, but compact waits for it before moving to a new journal
+        with self._lock_journal(exclusive=False):
+            journal_file = self.journal_file
+            file_descriptor = os.open(journal_file, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                if _ends_with_torn_line(file_descriptor):
+                    line = '\n' + line
+                os.write(file_descriptor, line.encode())
+                os.fsync(file_descriptor)
+            finally:
+                os.close(file_descriptor)
+        logger.info(f"Spooled entry {entry['id']} to {journal_file}")
+        return entry['id']
+
+    def pending(self):
+        """
+        Yields (offset, entry) for each complete journal line past the checkpoint, where offset is
+        the position just after the line. A trailing line without a newline may still be being
+        written, so it is left for next time; a complete line that isn't JSON is skipped, and is
+        passed over for good when a later entry is committed.
+        """
+        checkpoint = self.read_checkpoint()
+        offset = checkpoint['offset']
+        try:
+            journal = open(self._get_journal_file(checkpoint['generation']), 'rb')
+        except FileNotFoundError:
+            return
+        with journal:
+            journal.seek(offset)
+            for line in journal:
+                if not line.endswith(b'\n'):
+                    return
+                offset += len(line)
+                try:
+                    entry = json.loads(line.decode())
+                except ValueError:
+                    logger.warning(f"Skipping unreadable spool entry ending at offset {offset}")
+                    continue
+                yield offset, entry
+
+    def read_checkpoint(self):
+        """
+        Without a readable checkpoint, the oldest journal on disk is flushed from its start.
+        """
+        try:
+            with open(self.checkpoint_file) as checkpoint_str:
+                checkpoint = json.load(checkpoint_str)
+        except FileNotFoundError:
+            checkpoint = {}
+        except (IOError, ValueError):
+            logger.warning(f"Ignoring unreadable spool checkpoint: {self.checkpoint_file}")
+            checkpoint = {}
+        if 'generation' not in checkpoint:
+            checkpoint = {'generation': next(iter(self._get_generations()), 0), 'offset': 0}
+        checkpoint.setdefault('flushed_ids', [])
+        return checkpoint
+
+    def commit(self, offset, entry_id=None):
+        checkpoint = self.read_checkpoint()
+        checkpoint['offset'] = offset
+        if entry_id is not None:
+            checkpoint['flushed_ids'] = (
+                checkpoint['flushed_ids'] + [entry_id])[-FLUSHED_IDS_TO_KEEP:]
+        self._write_checkpoint(checkpoint)
+
+    def compact(self):
+        """
+        Moves on to a new, empty journal once every entry in the current one has been flushed, and
+        removes the flushed journals. Only call this while holding the lock. The checkpoint naming
+        the new journal is the only write that matters: a crash before it leaves the spool as it
+        was, and one after it leaves just a flushed journal for the next compaction to remove.
+        """
+        with self._lock_journal(exclusive=True):
+            checkpoint = self.read_checkpoint()
+            try:
+                journal_size = os.path.getsize(self._get_journal_file(checkpoint['generation']))
+            except FileNotFoundError:
+                return False
+            if journal_size != checkpoint['offset']:
+                return False
+            self._write_checkpoint(
+                dict(checkpoint, generation=checkpoint['generation'] + 1, offset=0))
+        for generation in self._get_generations():
+            if generation <= checkpoint['generation']:
+                os.remove(self._get_journal_file(generation))
+        return True
+
+    @contextmanager
+    def lock(self):
+        """
+        Holds an exclusive lock on the spool while flushing. Yields False straight away if another
+        process holds it.
+        """
+        import fcntl
+
+        os.makedirs(self.spool_dir, mode=0o700, exist_ok=True)
+        with open(os.path.join(self.spool_dir, LOCK_FILE), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _lock_journal(self, exclusive):
+        import fcntl
+
+        os.makedirs(self.spool_dir, mode=0o700, exist_ok=True)
+        with open(os.path.join(self.spool_dir, JOURNAL_LOCK_FILE), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _get_journal_file(self, generation):
+        return os.path.join(self.spool_dir, JOURNAL_FILE.format(generation=generation))
+
+    def _get_generations(self):
+        try:
+            names = os.listdir(self.spool_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            int(match.group(1)) for match in map(JOURNAL_FILE_PATTERN.match, names) if match)
+
+    def _write_checkpoint(self, checkpoint):
+        atomic_write_json(self.checkpoint_file, checkpoint, fsync=True)
+
+
+def _ends_with_torn_line(file_descriptor):
+    """
+    Checks whether a crash left the journal's last line without its newline.
+    """
+    size = os.fstat(file_descriptor).st_size
+    return size > 0 and os.pread(file_descriptor, 1, size - 1) != b'\n'
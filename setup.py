@@ -40,7 +40,6 @@ setup(
         'botocore',
         'certifi',
         'coverage',
-        'dpath',
         'linecounter',
         'pylint',
         'pytest',
@@ -55,6 +54,8 @@ setup(
     entry_points={
         'console_scripts': [
             'github_status_posting=py_dev_hammer.github_status_posting:entry_point',
+            'github_status_runner=py_dev_hammer.github_status_posting:runner_entry_point',
+            'pydevhammer=py_dev_hammer.cli:main',
         ]
     },
     project_urls={
@@ -0,0 +1,6 @@
+"""The benchmarks take a minute or more, so they are only collected with PYDEVHAMMER_BENCHMARK=1."""
+
+import os
+
+if os.environ.get('PYDEVHAMMER_BENCHMARK') != '1':
+    collect_ignore_glob = ['test_*.py']
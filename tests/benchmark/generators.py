@@ -0,0 +1,122 @@
+"""This generates synthetic test and static analysis result files for benchmarks."""
+
+# pylint: disable=missing-docstring, invalid-name
+
+import random
+
+PYLINT_MESSAGE = (
+    'cool_project_bro/module_{module}.py:{line}: [C0301(line-too-long), function_{line}] '
+    'Line too long ({length}/100)\n'
+)
+FLAKE8_MESSAGES = [
+    'E501 line too long ({length} > 79 characters)',
+    'W291 trailing whitespace',
+    'F401 \'os\' imported but unused',
+    'E302 expected 2 blank lines, found 1',
+]
+RADON_BLOCK_TYPES = ['F', 'M', 'C']
+RADON_RANKS = [(5, 'A'), (10, 'B'), (20, 'C'), (30, 'D'), (40, 'E')]
+
+
+def write_junit_xml(path, tests, failures=0, errors=0, output_bytes=0, seed=0, suites=1,
+                    root_totals=False):
+    """
+    Writes a pytest JUnit XML file with `tests` test cases shared between `suites` suites, the
+    first `failures` and `errors` of which fail, each capturing `output_bytes` of stdout. With
+    root_totals the <testsuites> root carries the totals, as some runners write it.
+    """
+    rng = random.Random(seed)
+    output = 'x' * output_bytes
+    with open(path, 'w') as results_file:
+        results_file.write('<?xml version="1.0" encoding="utf-8"?>')
+        if root_totals:
+            results_file.write(
+                f'<testsuites errors="{errors}" failures="{failures}" skipped="0" '
+                f'tests="{tests}" time="1.0">'
+            )
+        else:
+            results_file.write('<testsuites>')
+        for suite in range(suites):
+            suite_cases = range(suite, tests, suites)
+            suite_failures = sum(1 for index in suite_cases if index < failures)
+            suite_errors = sum(1 for index in suite_cases if failures <= index < failures + errors)
+            suite_name = 'pytest' if suites == 1 else f'pytest_{suite}'
+            results_file.write(
+                f'<testsuite name="{suite_name}" errors="{suite_errors}" '
+                f'failures="{suite_failures}" skipped="0" tests="{len(suite_cases)}" time="1.0">'
+            )
+            for index in suite_cases:
+                results_file.write(
+                    f'<testcase classname="tests.unit.test_module_{index % 50}" '
+                    f'name="test_case_{index}" time="{rng.random():.4f}">'
+                )
+                if index < failures:
+                    results_file.write(
+                        '<failure message="AssertionError">assert False</failure>')
+                elif index < failures + errors:
+                    results_file.write('<error message="RuntimeError">boom</error>')
+                if output:
+                    results_file.write(f'<system-out>{output}</system-out>')
+                results_file.write('</testcase>')
+            results_file.write('</testsuite>')
+        results_file.write('</testsuites>')
+
+
+def write_pylint_output(path, messages, score=9.5, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w') as results_file:
+        for index in range(messages):
+            results_file.write(PYLINT_MESSAGE.format(
+                module=index % 100, line=index, length=rng.randint(101, 140)))
+        results_file.write('\n' + '-' * 36 + '\n')
+        results_file.write(f'Your code has been rated at {score:.2f}/10\n\n')
+
+
+def write_flake8_output(path, messages, modules=100, seed=0):
+    """
+    Writes `messages` flake8 violations spread over `modules` files, then the total that
+    `flake8 --count` prints last.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w') as results_file:
+        for index in range(messages):
+            message = FLAKE8_MESSAGES[index % len(FLAKE8_MESSAGES)]
+            results_file.write(
+                f'cool_project_bro/module_{index % modules}.py:{index}:{rng.randint(1, 120)}: '
+                f'{message.format(length=rng.randint(80, 140))}\n'
+            )
+        results_file.write(f'{messages}\n')
+
+
+def write_radon_cc_output(path, files, blocks_per_file, show_scores=False, seed=0):
+    """
+    Writes `radon cc` output for `files` files of `blocks_per_file` functions, methods and
+    classes each, with each block's complexity score when show_scores is set (`radon cc -s`), and
+    the average that `radon cc -a` prints last.
+    """
+    rng = random.Random(seed)
+    file_names = get_module_names(files)
+    total = 0
+    with open(path, 'w') as results_file:
+        for file_name in file_names:
+            results_file.write(f'{file_name}\n')
+            for block in range(blocks_per_file):
+                score = min(int(rng.expovariate(0.3)) + 1, 40)
+                total += score
+                rank = next(rank for bound, rank in RADON_RANKS if score <= bound)
+                block_type = RADON_BLOCK_TYPES[block % len(RADON_BLOCK_TYPES)]
+                results_file.write(
+                    f'    {block_type} {block * 10 + 1}:{4 if block_type == "M" else 0} '
+                    f'block_{block} - {rank}' + (f' ({score})' if show_scores else '') + '\n'
+                )
+        blocks = files * blocks_per_file
+        results_file.write(f'\n{blocks} blocks (classes, functions, methods) analyzed.\n')
+        average = total / blocks if blocks else 0.0
+        results_file.write(
+            f'Average complexity: {next(rank for bound, rank in RADON_RANKS if average <= bound)} '
+            f'({average:.16f})\n'
+        )
+
+
+def get_module_names(files):
+    return [f'cool_project_bro/module_{index}.py' for index in range(files)]
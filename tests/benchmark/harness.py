@@ -0,0 +1,117 @@
+"""This provides timing, reporting and baseline checks shared by the benchmarks."""
+
+# pylint: disable=missing-docstring, invalid-name
+
+import json
+import math
+import os
+import time
+import tracemalloc
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+UPDATE_BASELINE = os.environ.get('PYDEVHAMMER_BENCHMARK_UPDATE') == '1'
+SCALE = int(os.environ.get('PYDEVHAMMER_BENCHMARK_SCALE', 1))
+RUNS = int(os.environ.get('PYDEVHAMMER_BENCHMARK_RUNS', 5))
+TOLERANCE = float(os.environ.get('PYDEVHAMMER_BENCHMARK_TOLERANCE', 2.0))
+TIME_SLACK_SECONDS = 0.05
+MEMORY_SLACK_BYTES = 1024 * 1024
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def measure(function, runs, setup=None, warmup=1):
+    """
+    Calls function `runs` times, calling setup first each time when given, and returns the p50 and
+    p95 wall time in seconds. The first `warmup` calls are not measured so one-off import and
+    connection costs don't skew the percentiles. Tracing slows Python down several times over, so
+    peak traced memory comes from one extra call after the timed ones.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        function()
+    timings = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_seconds': percentile(timings, 50),
+        'p95_seconds': percentile(timings, 95),
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def report(suite, scenario, result):
+    print(f"{suite}/{scenario}: " + ', '.join(
+        f'{name}={value:.4f}' if isinstance(value, float) else f'{name}={value}'
+        for name, value in sorted(result.items())
+    ))
+    report_file = os.environ.get('PYDEVHAMMER_BENCHMARK_REPORT')
+    if report_file:
+        with open(report_file, 'a') as report_str:
+            report_str.write(json.dumps({'suite': suite, 'scenario': scenario, **result}) + '\n')
+
+
+def check_baseline(suite, scenario, result):
+    """
+    Fails when a result is worse than the stored baseline: timings and memory beyond the tolerance
+    factor (plus a small absolute slack for noise), rates below it, or request counts above the
+    baseline at all. Rates from runs quicker than the timing slack are too noisy to judge.
+    With PYDEVHAMMER_BENCHMARK_UPDATE=1 the result is stored as the new baseline instead.
+    """
+    baselines = _load_baselines()
+    baseline = baselines.get(suite, {}).get(scenario)
+    if UPDATE_BASELINE or baseline is None:
+        if UPDATE_BASELINE:
+            baselines.setdefault(suite, {})[scenario] = {
+                name: round(value, 6) if isinstance(value, float) else value
+                for name, value in result.items()
+            }
+            with open(BASELINE_FILE, 'w') as baseline_str:
+                json.dump(baselines, baseline_str, indent=2, sort_keys=True)
+                baseline_str.write('\n')
+        return
+
+    regressions = []
+    for name, value in result.items():
+        if name not in baseline:
+            continue
+        if name.endswith('_seconds'):
+            limit = baseline[name] * TOLERANCE + TIME_SLACK_SECONDS
+        elif name.endswith('_bytes'):
+            limit = baseline[name] * TOLERANCE + MEMORY_SLACK_BYTES
+        elif name.endswith('_per_second'):
+            if result.get('p50_seconds', TIME_SLACK_SECONDS) < TIME_SLACK_SECONDS:
+                continue
+            if value < baseline[name] / TOLERANCE:
+                regressions.append(f'{name}: {value:.2f} < {baseline[name]:.2f}/{TOLERANCE}')
+            continue
+        else:
+            limit = baseline[name]
+        if value > limit:
+            regressions.append(f'{name}: {value} > {limit} (baseline {baseline[name]})')
+    assert not regressions, f"{suite}/{scenario} regressed: {regressions}"
+
+
+def _load_baselines():
+    try:
+        with open(BASELINE_FILE) as baseline_str:
+            return json.load(baseline_str)
+    except FileNotFoundError:
+        return {}
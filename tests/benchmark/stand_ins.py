@@ -0,0 +1,486 @@
+"""This provides local stand-ins for the GitHub statuses API, DynamoDB and SSM for benchmarks."""
+
+# pylint: disable=missing-docstring, invalid-name, protected-access
+
+import bisect
+import json
+import threading
+import time
+import zlib
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class FakeGitHubServer(object):
+    """
+    Serves the GitHub commit status and check run endpoints on localhost. Every request waits
+    `latency` seconds; once `rate_limit` requests have been served in the current
+    `rate_limit_window` further requests get a 403 with the rate limit headers GitHub sends.
+    """
+
+    def __init__(self, latency=0.0, rate_limit=None, rate_limit_window=60):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.requests = []
+        self.statuses = defaultdict(dict)
+        self.check_runs = {}
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    @property
+    def api_url(self):
+        return f'{self.url}/repos/{{owner}}/{{repo}}/statuses/{{commit_sha}}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def combined_status_url(self):
+        return f'{self.url}/repos/{{owner}}/{{repo}}/commits/{{commit_sha}}/status'
+
+    @property
+    def check_runs_url(self):
+        return f'{self.url}/repos/{{owner}}/{{repo}}/check-runs'
+
+    def reset(self, keep_statuses=False):
+        with self._lock:
+            self.requests = []
+            if not keep_statuses:
+                self.statuses.clear()
+                self.check_runs.clear()
+            self._window_start = time.time()
+
+    def _rate_limit_headers(self):
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.rate_limit_window:
+                self._window_start = now
+                self.requests = [
+                    request for request in self.requests if request[2] >= self._window_start]
+            limit = self.rate_limit or 5000
+            used = sum(1 for request in self.requests if request[2] >= self._window_start)
+            reset = int(self._window_start + self.rate_limit_window)
+        return limit, max(limit - used, 0), reset
+
+    def _record(self, method, path):
+        with self._lock:
+            self.requests.append((method, path, time.time()))
+
+
+def _make_handler(server):
+
+    class FakeGitHubHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            self._handle('GET')
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            self._handle('POST')
+
+        def do_PATCH(self):  # pylint: disable=invalid-name
+            self._handle('PATCH')
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+        def _handle(self, method):
+            if server.latency:
+                time.sleep(server.latency)
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            limit, remaining, reset = server._rate_limit_headers()
+            if server.rate_limit is not None and remaining == 0:
+                return self._respond(
+                    403, {'message': 'API rate limit exceeded'}, limit, remaining, reset,
+                    {'Retry-After': str(max(reset - int(time.time()), 0))}
+                )
+            server._record(method, self.path)
+            remaining -= 1
+
+            parts = urlsplit(self.path).path.strip('/').split('/')
+            if method == 'POST' and len(parts) == 5 and parts[3] == 'statuses':
+                status = json.loads(body.decode())
+                server.statuses[parts[4]][status.get('context')] = status
+                return self._respond(201, status, limit, remaining, reset)
+            if method == 'GET' and len(parts) == 6 and parts[5] == 'status':
+                statuses = list(server.statuses[parts[4]].values())
+                return self._respond(
+                    200, {'sha': parts[4], 'statuses': statuses, 'total_count': len(statuses)},
+                    limit, remaining, reset
+                )
+            if method == 'POST' and len(parts) == 4 and parts[3] == 'check-runs':
+                check_run = json.loads(body.decode())
+                with server._lock:
+                    check_run_id = len(server.check_runs) + 1
+                    check_run.update({
+                        'id': check_run_id,
+                        'url': f'{server.url}{urlsplit(self.path).path}/{check_run_id}',
+                    })
+                    server.check_runs[check_run_id] = check_run
+                return self._respond(201, check_run, limit, remaining, reset)
+            if method == 'PATCH' and len(parts) == 5 and parts[3] == 'check-runs':
+                check_run = server.check_runs.get(int(parts[4]))
+                if check_run is not None:
+                    check_run.update(json.loads(body.decode()))
+                    return self._respond(200, check_run, limit, remaining, reset)
+            return self._respond(404, {'message': 'Not Found'}, limit, remaining, reset)
+
+        def _respond(self, code, payload, limit, remaining, reset, headers=None):
+            content = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.send_header('X-RateLimit-Limit', str(limit))
+            self.send_header('X-RateLimit-Remaining', str(remaining))
+            self.send_header('X-RateLimit-Reset', str(reset))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+    return FakeGitHubHandler
+
+
+class FakeDynamoResource(object):
+    """
+    In-memory stand-in for a boto3 DynamoDB service resource. Tables are keyed by a partition key
+    and a numeric sort key and support the subset of the Table API this package uses. Indexes maps
+    the name of each global secondary index to its partition key, sharing the table's sort key.
+    Queries and Scans return at most `page_items` items a page, standing in for DynamoDB's 1 MB
+    page size.
+    """
+
+    def __init__(self, partition_key_name, sort_key_name, latency=0.0, indexes=None,
+                 page_items=None):
+        self.partition_key_name = partition_key_name
+        self.sort_key_name = sort_key_name
+        self.latency = latency
+        self.indexes = indexes or {}
+        self.page_items = page_items
+        self.request_counts = defaultdict(int)
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def Table(self, table_name):
+        with self._lock:
+            if table_name not in self._tables:
+                self._tables[table_name] = FakeDynamoTable(self, table_name)
+            return self._tables[table_name]
+
+    def batch_write_item(self, RequestItems):
+        self._request('BatchWriteItem')
+        for table_name, requests in RequestItems.items():
+            table = self.Table(table_name)
+            with table._lock:
+                for request in requests:
+                    table._store(request['PutRequest']['Item'])
+        return {}
+
+    def batch_get_item(self, RequestItems):
+        self._request('BatchGetItem')
+        responses = {}
+        for table_name, request in RequestItems.items():
+            table = self.Table(table_name)
+            found = (table._find(key) for key in request['Keys'])
+            responses[table_name] = [item for item in found if item is not None]
+        return {'Responses': responses}
+
+    def _request(self, operation):
+        with self._lock:
+            self.request_counts[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeDynamoTable(object):
+
+    def __init__(self, resource, table_name):
+        self.resource = resource
+        self.table_name = table_name
+        self.partitions = defaultdict(list)
+        self._segments = {}
+        self._lock = threading.Lock()
+
+    def put_item(self, Item):
+        self.resource._request('PutItem')
+        with self._lock:
+            self._store(Item)
+        return {}
+
+    def get_item(self, Key):
+        self.resource._request('GetItem')
+        for item in self.partitions.get(Key[self.resource.partition_key_name], []):
+            if item[self.resource.sort_key_name] == Key[self.resource.sort_key_name]:
+                return {'Item': dict(item)}
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None,
+                    ExpressionAttributeNames=None, ExpressionAttributeValues=None):
+        """
+        Supports the 'SET #a = :a, ... ADD #b :b' updates and the attribute_not_exists and
+        equality conditions this package sends.
+        """
+        from botocore.exceptions import ClientError
+
+        self.resource._request('UpdateItem')
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        with self._lock:
+            current = self._find(Key) or dict(Key)
+            if ConditionExpression and not _check_condition(ConditionExpression, current, names,
+                                                            values):
+                raise ClientError(
+                    {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+            set_clause, _, add_clause = UpdateExpression.partition(' ADD ')
+            for assignment in set_clause[len('SET '):].split(','):
+                name, value = (part.strip() for part in assignment.split('='))
+                current[names.get(name, name)] = values[value]
+            for addition in filter(None, add_clause.split(',')):
+                name, value = addition.split()
+                current[names.get(name, name)] = current.get(names.get(name, name), 0) + values[
+                    value]
+            self._store(current)
+        return {}
+
+    def _find(self, key):
+        for item in self.partitions.get(key[self.resource.partition_key_name], []):
+            if item[self.resource.sort_key_name] == key[self.resource.sort_key_name]:
+                return dict(item)
+        return None
+
+    def _store(self, item):
+        self._segments.clear()
+        partition = self.partitions[item[self.resource.partition_key_name]]
+        sort_value = item[self.resource.sort_key_name]
+        sort_values = [stored[self.resource.sort_key_name] for stored in partition]
+        index = bisect.bisect_left(sort_values, sort_value)
+        if index < len(partition) and sort_values[index] == sort_value:
+            partition[index] = dict(item)
+        else:
+            partition.insert(index, dict(item))
+
+    def query(self, KeyConditionExpression, ScanIndexForward=True, Limit=None,
+              ExclusiveStartKey=None, ProjectionExpression=None, ExpressionAttributeNames=None,
+              IndexName=None, FilterExpression=None):
+        self.resource._request('Query')
+        if IndexName is None:
+            partition_value, sort_conditions = _split_key_condition(
+                KeyConditionExpression, self.resource.partition_key_name)
+            partition = self.partitions.get(partition_value, [])
+        else:
+            index_key_name = self.resource.indexes[IndexName]
+            partition_value, sort_conditions = _split_key_condition(
+                KeyConditionExpression, index_key_name)
+            partition = sorted((
+                item for items in self.partitions.values() for item in items
+                if item.get(index_key_name) == partition_value
+            ), key=self._order)
+        items = [
+            item for item in partition
+            if all(
+                condition(item.get(self.resource.sort_key_name))
+                for condition in sort_conditions
+            )
+        ]
+        if not ScanIndexForward:
+            items = items[::-1]
+        if ExclusiveStartKey is not None:
+            start = self._order(ExclusiveStartKey)
+            items = [
+                item for item in items
+                if (self._order(item) > start if ScanIndexForward else self._order(item) < start)
+            ]
+        return self._page(
+            items, Limit, FilterExpression, ProjectionExpression, ExpressionAttributeNames)
+
+    def scan(self, Segment=0, TotalSegments=1, Limit=None, ExclusiveStartKey=None,
+             FilterExpression=None, ProjectionExpression=None, ExpressionAttributeNames=None):
+        """
+        Shares partitions between segments by a hash of their key. As in DynamoDB, Limit caps the
+        items read for a page before FilterExpression drops any of them.
+        """
+        self.resource._request('Scan')
+        with self._lock:
+            if (Segment, TotalSegments) not in self._segments:
+                segment_items = [
+                    item for partition_value in sorted(self.partitions)
+                    if zlib.crc32(str(partition_value).encode()) % TotalSegments == Segment
+                    for item in self.partitions[partition_value]
+                ]
+                self._segments[Segment, TotalSegments] = (
+                    segment_items, [self._scan_order(item) for item in segment_items])
+            items, orders = self._segments[Segment, TotalSegments]
+        start = 0
+        if ExclusiveStartKey is not None:
+            start = bisect.bisect_right(orders, self._scan_order(ExclusiveStartKey))
+        limit = Limit or self.resource.page_items
+        items = items[start:] if limit is None else items[start:start + limit + 1]
+        return self._page(
+            items, Limit, FilterExpression, ProjectionExpression, ExpressionAttributeNames)
+
+    def _order(self, item):
+        return item[self.resource.sort_key_name], item[self.resource.partition_key_name]
+
+    def _scan_order(self, item):
+        return str(item[self.resource.partition_key_name]), item[self.resource.sort_key_name]
+
+    def _page(self, items, limit, filter_expression, projection_expression, attribute_names):
+        response = {}
+        limit = limit or self.resource.page_items
+        if limit is not None and len(items) > limit:
+            items = items[:limit]
+            response['LastEvaluatedKey'] = dict(
+                zip((self.resource.sort_key_name, self.resource.partition_key_name),
+                    self._order(items[-1])),
+                **{
+                    name: items[-1][name] for name in self.resource.indexes.values()
+                    if name in items[-1]
+                }
+            )
+        if filter_expression is not None:
+            items = [item for item in items if _evaluate_filter(filter_expression, item)]
+        if projection_expression:
+            names = [
+                (attribute_names or {}).get(name.strip(), name.strip())
+                for name in projection_expression.split(',')
+            ]
+            items = [{name: item[name] for name in names if name in item} for item in items]
+        response['Items'] = [dict(item) for item in items]
+        response['Count'] = len(items)
+        return response
+
+
+_SORT_OPERATORS = {
+    '<': lambda value, bound: value < bound,
+    '<=': lambda value, bound: value <= bound,
+    '>': lambda value, bound: value > bound,
+    '>=': lambda value, bound: value >= bound,
+    '=': lambda value, bound: value == bound,
+}
+
+
+def _check_condition(condition, item, names, values):
+    if ' OR ' in condition:
+        return any(
+            _check_condition(part, item, names, values) for part in condition.split(' OR '))
+    if condition.startswith('attribute_not_exists('):
+        name = condition[len('attribute_not_exists('):-1]
+        return names.get(name, name) not in item
+    if '<=' in condition:
+        name, value = (part.strip() for part in condition.split('<='))
+        return names.get(name, name) in item and item[names.get(name, name)] <= values[value]
+    name, value = (part.strip() for part in condition.split('='))
+    return item.get(names.get(name, name)) == values[value]
+
+
+_FILTER_OPERATORS = dict(_SORT_OPERATORS, **{
+    '<>': lambda value, bound: value != bound,
+    'begins_with': lambda value, prefix: isinstance(value, str) and value.startswith(prefix),
+})
+
+
+def _evaluate_filter(condition, item):
+    expression = condition.get_expression()
+    if expression['operator'] == 'AND':
+        return all(_evaluate_filter(sub_condition, item) for sub_condition in expression['values'])
+    if expression['operator'] == 'OR':
+        return any(_evaluate_filter(sub_condition, item) for sub_condition in expression['values'])
+    attribute, *bounds = expression['values']
+    if expression['operator'] == 'attribute_not_exists':
+        return attribute.name not in item
+    if expression['operator'] == 'attribute_exists':
+        return attribute.name in item
+    value = item.get(attribute.name)
+    return value is not None and _FILTER_OPERATORS[expression['operator']](value, bounds[0])
+
+
+def _split_key_condition(condition, partition_key_name):
+    expression = condition.get_expression()
+    if expression['operator'] == 'AND':
+        partition_value = None
+        sort_conditions = []
+        for sub_condition in expression['values']:
+            sub_partition, sub_sorts = _split_key_condition(sub_condition, partition_key_name)
+            partition_value = sub_partition if sub_partition is not None else partition_value
+            sort_conditions.extend(sub_sorts)
+        return partition_value, sort_conditions
+
+    key, *bounds = expression['values']
+    if key.name == partition_key_name:
+        return bounds[0], []
+    if expression['operator'] == 'BETWEEN':
+        return None, [lambda value: bounds[0] <= value <= bounds[1]]
+    compare = _SORT_OPERATORS[expression['operator']]
+    return None, [lambda value: value is not None and compare(value, bounds[0])]
+
+
+class FakeSsmClient(object):
+    """
+    Stand-in for a boto3 SSM client serving fixed parameters, each call waiting `latency` seconds.
+    """
+
+    def __init__(self, parameters, latency=0.0):
+        self.parameters = parameters
+        self.latency = latency
+        self.request_count = 0
+
+    def get_parameters(self, Names, WithDecryption=False):  # pylint: disable=unused-argument
+        self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            'Parameters': [
+                {'Name': name, 'Value': self.parameters[name]}
+                for name in Names if name in self.parameters
+            ],
+            'InvalidParameters': [name for name in Names if name not in self.parameters],
+        }
+
+
+class FakeAwsSession(object):
+    """
+    Stand-in for a boto3 session handing out the given stand-in clients and resources by service
+    name, each creation waiting `latency` seconds as building a real client from its service model
+    does.
+    """
+
+    def __init__(self, clients=None, resources=None, latency=0.0):
+        self.clients = clients or {}
+        self.resources = resources or {}
+        self.latency = latency
+
+    def client(self, service, **kwargs):  # pylint: disable=unused-argument
+        if self.latency:
+            time.sleep(self.latency)
+        return self.clients[service]
+
+    def resource(self, service, **kwargs):  # pylint: disable=unused-argument
+        if self.latency:
+            time.sleep(self.latency)
+        return self.resources[service]
+
+
+def run_event_loop(handler, events):
+    """
+    Feeds events to a handler one at a time, as Lambda does a warm container, and returns how long
+    each took in seconds.
+    """
+    timings = []
+    for event in events:
+        start = time.perf_counter()
+        handler(event)
+        timings.append(time.perf_counter() - start)
+    return timings
@@ -0,0 +1,135 @@
+"""This benchmarks event_handler cold and warm against local GitHub, DynamoDB and SSM stand-ins."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name, protected-access
+
+import os
+from unittest.mock import patch
+
+import yaml
+
+from py_dev_hammer import github_status_posting
+from py_dev_hammer.github_status_posting import event_handler
+from py_dev_hammer.utils import aws
+from py_dev_hammer.utils.general import _get_ca_bundle
+from tests.benchmark.generators import write_junit_xml, write_pylint_output
+from tests.benchmark.harness import RUNS, check_baseline, percentile, report
+from tests.benchmark.stand_ins import (
+    FakeAwsSession, FakeDynamoResource, FakeGitHubServer, FakeSsmClient, run_event_loop,
+)
+from tests.data_factory import (
+    APP_CONFIG, USER_CONFIG, CODEBUILD_BUILD_ARN, CODEBUILD_GIT_BRANCH, GITHUB_OWNER, GITHUB_TOKEN,
+)
+
+EVENTS = RUNS + 1
+STATIC_TYPES = 4
+GITHUB_LATENCY_SECONDS = 0.02
+SSM_LATENCY_SECONDS = 0.05
+CLIENT_CREATION_SECONDS = 0.05
+DYNAMO_LATENCY_SECONDS = 0.005
+
+
+def _write_configs(config_dir, github_server):
+    tests_to_run = {
+        'dynamic': {'pytest': APP_CONFIG['tests_to_run']['dynamic']['pytest']},
+        'static': {
+            f'pylint_{index}': dict(
+                APP_CONFIG['tests_to_run']['static']['pylint'], input_file=f'pylint_{index}.static')
+            for index in range(STATIC_TYPES)
+        },
+    }
+    app_config = dict(APP_CONFIG, tests_to_run=tests_to_run, github={
+        'api_url': github_server.api_url,
+        'combined_status_url': github_server.combined_status_url,
+        'check_runs_url': github_server.check_runs_url,
+    })
+    for file_name, config in (('app_config.yml', app_config), ('user_config.yml', USER_CONFIG)):
+        with open(os.path.join(config_dir, file_name), 'w') as config_str:
+            yaml.safe_dump(config, config_str)
+    return tests_to_run
+
+
+def _write_results(source_dir, tests_to_run):
+    results_dir = os.path.join(
+        source_dir, APP_CONFIG['static_analysis']['root_dir'],
+        APP_CONFIG['static_analysis']['results_dir']
+    )
+    os.makedirs(results_dir)
+    write_junit_xml(os.path.join(results_dir, 'pytest.xml'), 100, output_bytes=200)
+    for index, test_type in enumerate(tests_to_run['static']):
+        write_pylint_output(
+            os.path.join(results_dir, tests_to_run['static'][test_type]['input_file']), 100,
+            seed=index
+        )
+
+
+def _go_cold():
+    """
+    Drops everything a warm process keeps between events, as a new Lambda container starts with.
+    """
+    for config in (
+            github_status_posting.APP_CONFIG, github_status_posting.TEST_REGISTRY,
+            github_status_posting.USER_CONFIG):
+        config._config = None
+    aws._AWS_SESSION = None
+    aws._AWS_CLIENTS.clear()
+    aws._SSM_PARAMETERS.clear()
+    github_status_posting._GITHUB_SESSIONS.clear()
+    _get_ca_bundle.cache_clear()
+
+
+class TestHandlerBenchmark(object):
+
+    def test_cold_and_warm(self, tmp_path):
+        config_dir = str(tmp_path / 'config')
+        os.makedirs(config_dir)
+        resource = FakeDynamoResource(
+            APP_CONFIG['dynamo']['partition_key_name'], APP_CONFIG['dynamo']['sort_key_name'],
+            latency=DYNAMO_LATENCY_SECONDS
+        )
+        ssm_client = FakeSsmClient(
+            {'github_owner': GITHUB_OWNER, 'github_token': GITHUB_TOKEN},
+            latency=SSM_LATENCY_SECONDS
+        )
+        aws_session = FakeAwsSession(
+            clients={'ssm': ssm_client}, resources={'dynamodb': resource},
+            latency=CLIENT_CREATION_SECONDS
+        )
+        events = [
+            {
+                'build_arn': CODEBUILD_BUILD_ARN,
+                'git_branch': CODEBUILD_GIT_BRANCH,
+                'source_version': f'{index:040x}',
+                'results_dir': str(tmp_path / 'source'),
+            }
+            for index in range(EVENTS)
+        ]
+
+        with FakeGitHubServer(latency=GITHUB_LATENCY_SECONDS) as github_server, \
+                patch.dict(os.environ, {
+                    'CONFIG_DIR': config_dir,
+                    'PYDEVHAMMER_CACHE_DIR': str(tmp_path / 'cache'),
+                }), \
+                patch('boto3.session.Session', return_value=aws_session):
+            tests_to_run = _write_configs(config_dir, github_server)
+            _write_results(events[0]['results_dir'], tests_to_run)
+            _go_cold()
+            try:
+                timings = run_event_loop(event_handler, events)
+            finally:
+                _go_cold()
+            github_requests = len(github_server.requests)
+
+        test_types = 1 + STATIC_TYPES
+        assert len(github_server.statuses) == EVENTS
+        assert all(len(statuses) == test_types for statuses in github_server.statuses.values())
+        assert ssm_client.request_count == 1
+        result = {
+            'cold_seconds': timings[0],
+            'warm_p50_seconds': percentile(timings[1:], 50),
+            'warm_p95_seconds': percentile(timings[1:], 95),
+            'github_requests': github_requests,
+            'dynamo_requests': sum(resource.request_counts.values()),
+        }
+        assert result['warm_p50_seconds'] < result['cold_seconds']
+        report('handler', 'cold_and_warm', result)
+        check_baseline('handler', 'cold_and_warm', result)
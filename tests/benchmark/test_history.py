@@ -0,0 +1,56 @@
+"""This benchmarks building and analysing long branch histories with utils.history."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import decimal
+import random
+
+import pytest
+
+from py_dev_hammer.utils.history import History
+from tests.benchmark.harness import RUNS, SCALE, check_baseline, measure, report
+
+TEST_TYPES = ['pytest', 'pylint', 'coverage', 'radon_cc', 'line_counter']
+SCENARIOS = {
+    'builds_1k': {'builds': 1000 * SCALE, 'missing': 0.0},
+    'builds_50k': {'builds': 50000 * SCALE, 'missing': 0.0},
+    'builds_50k_sparse': {'builds': 50000 * SCALE, 'missing': 0.2},
+}
+
+
+def _create_items(builds, missing, seed=0):
+    generator = random.Random(seed)
+    return [
+        {
+            'build_start_time': index,
+            **{
+                test_type: decimal.Decimal(str(generator.randint(50, 100)))
+                for test_type in TEST_TYPES if generator.random() >= missing
+            }
+        }
+        for index in range(builds)
+    ]
+
+
+def _analyse(items):
+    history = History.from_items(items, TEST_TYPES, 'build_start_time')
+    for test_type in TEST_TYPES:
+        history.deltas(test_type)
+        history.change_from_previous(test_type)
+    return history
+
+
+class TestHistoryBenchmark(object):
+
+    @pytest.mark.parametrize('scenario_name', list(SCENARIOS))
+    def test_analyse(self, scenario_name):
+        scenario = SCENARIOS[scenario_name]
+        items = _create_items(scenario['builds'], scenario['missing'])
+        assert len(_analyse(items)) == scenario['builds']
+
+        result = measure(lambda: _analyse(items), RUNS)
+        result['builds_per_second'] = scenario['builds'] / result['p50_seconds']
+
+        scenario_key = f'{scenario_name}-x{SCALE}'
+        report('history', scenario_key, result)
+        check_baseline('history', scenario_key, result)
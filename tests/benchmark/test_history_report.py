@@ -0,0 +1,105 @@
+"""This benchmarks exporting every branch's build history with utils.history_report."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import decimal
+import os
+import random
+import time
+
+import pytest
+
+from py_dev_hammer.utils.history_report import (
+    BUILD_DAY_NAME, SECONDS_PER_DAY, get_build_day, get_columns, read_history, summarise_branches,
+    write_rows,
+)
+from tests.benchmark.harness import RUNS, SCALE, check_baseline, measure, report
+from tests.benchmark.stand_ins import FakeDynamoResource
+from tests.data_factory import APP_CONFIG
+
+DYNAMO_LATENCY_SECONDS = 0.005
+PAGE_ITEMS = 250
+TEST_TYPES = ['pytest', 'pylint', 'coverage']
+DYNAMO_CONFIG = dict(APP_CONFIG['dynamo'])
+SCENARIOS = {
+    'scan_1_segment': {'builds': 20000 * SCALE, 'segments': 1},
+    'scan_8_segments': {'builds': 20000 * SCALE, 'segments': 8},
+    'latest_8_segments': {'builds': 20000 * SCALE, 'segments': 8, 'latest': True},
+    'index_7_days': {'builds': 20000 * SCALE, 'segments': 8, 'days': 7},
+}
+BRANCHES = 200
+HISTORY_DAYS = 90
+
+
+def _create_dynamo_resource(builds, seed=0):
+    generator = random.Random(seed)
+    resource = FakeDynamoResource(
+        DYNAMO_CONFIG['partition_key_name'], DYNAMO_CONFIG['sort_key_name'],
+        latency=DYNAMO_LATENCY_SECONDS,
+        indexes={DYNAMO_CONFIG['history_index_name']: BUILD_DAY_NAME}, page_items=PAGE_ITEMS
+    )
+    table = resource.Table(DYNAMO_CONFIG['table_name'])
+    now = int(time.time())
+    for build in range(builds):
+        build_start_time = now - generator.randrange(HISTORY_DAYS * SECONDS_PER_DAY)
+        table._store({  # pylint: disable=protected-access
+            DYNAMO_CONFIG['partition_key_name']: f'branch-{build % BRANCHES}',
+            DYNAMO_CONFIG['sort_key_name']: build_start_time,
+            BUILD_DAY_NAME: get_build_day(build_start_time),
+            **{
+                test_type: decimal.Decimal(str(generator.randint(50, 100)))
+                for test_type in TEST_TYPES
+            },
+        })
+    return resource
+
+
+def _export(resource, scenario, output, counts):
+    """
+    Writes the scenario's rows to output, counting the builds read and the rows written.
+    """
+    since = None
+    if scenario.get('days'):
+        since = time.time() - scenario['days'] * SECONDS_PER_DAY
+    counts['read'] = 0
+
+    def counted(rows):
+        for row in rows:
+            counts['read'] += 1
+            yield row
+
+    rows = counted(read_history(
+        resource, DYNAMO_CONFIG, TEST_TYPES, since, segments=scenario['segments'],
+        use_index=since is not None
+    ))
+    if scenario.get('latest'):
+        rows = summarise_branches(rows, TEST_TYPES, DYNAMO_CONFIG['sort_key_name'])
+    columns = get_columns(TEST_TYPES, DYNAMO_CONFIG['sort_key_name'], scenario.get('latest'))
+    counts['written'] = write_rows(rows, output, 'csv', columns)
+
+
+class TestHistoryReportBenchmark(object):
+
+    @pytest.mark.parametrize('scenario_name', list(SCENARIOS))
+    def test_export(self, scenario_name):
+        scenario = SCENARIOS[scenario_name]
+        resource = _create_dynamo_resource(scenario['builds'])
+        counts = {}
+
+        def setup():
+            resource.request_counts.clear()
+
+        with open(os.devnull, 'w') as output:
+            result = measure(
+                lambda: _export(resource, scenario, output, counts), RUNS, setup=setup)
+        if scenario.get('days'):
+            assert 0 < counts['read'] < scenario['builds']
+        else:
+            assert counts['read'] == scenario['builds']
+        assert counts['written'] == (BRANCHES if scenario.get('latest') else counts['read'])
+        result['builds_per_second'] = counts['read'] / result['p50_seconds']
+        result['dynamo_requests'] = sum(resource.request_counts.values())
+
+        scenario_key = f'{scenario_name}-x{SCALE}'
+        report('history_report', scenario_key, result)
+        check_baseline('history_report', scenario_key, result)
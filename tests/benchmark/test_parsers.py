@@ -0,0 +1,186 @@
+"""This benchmarks the result file parsers on large synthetic test and static analysis outputs."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import json
+import os
+import subprocess
+import sys
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from py_dev_hammer.github_status_posting import (
+    _create_test_parameters_dict, _get_quality_indicator_score, _parse_test_parameter,
+)
+from py_dev_hammer.utils.incremental import aggregate, parse_file_results
+from py_dev_hammer.utils.parsers import match_lines
+from py_dev_hammer.utils.registry import build_test_registry
+from tests.benchmark.generators import (
+    get_module_names, write_flake8_output, write_junit_xml, write_pylint_output,
+    write_radon_cc_output,
+)
+from tests.benchmark.harness import RUNS, SCALE, check_baseline, measure, report
+from tests.data_factory import APP_CONFIG
+
+MODULE_UNDER_TEST = 'py_dev_hammer.github_status_posting'
+MODE_STREAMED = 'streamed'
+MODE_PER_FILE = 'per_file'
+REGISTRY = build_test_registry({
+    'dynamic': APP_CONFIG['tests_to_run']['dynamic'],
+    'static': dict(APP_CONFIG['tests_to_run']['static'], flake8={
+        'input_file': 'flake8.static',
+        'command': 'flake8 --count cool_project_bro',
+        'regex_pattern': r'^(\d+)$',
+        'message': 'Flake8 violations',
+        'multiplier': 1,
+        'percent': False,
+        'better': 'lower',
+    }),
+})
+RADON_FILES = 2500 * SCALE
+SCENARIOS = {
+    'junit': {
+        'test_type': 'pytest',
+        'write': partial(
+            write_junit_xml, tests=20000 * SCALE, failures=50, errors=10, output_bytes=300),
+    },
+    'junit_many_suites': {
+        'test_type': 'pytest',
+        'write': partial(
+            write_junit_xml, tests=20000 * SCALE, failures=50, errors=10, output_bytes=300,
+            suites=500),
+    },
+    'junit_root_totals': {
+        'test_type': 'pytest',
+        'write': partial(
+            write_junit_xml, tests=20000 * SCALE, failures=50, errors=10, output_bytes=300,
+            root_totals=True),
+    },
+    'pylint': {
+        'test_type': 'pylint',
+        'write': partial(write_pylint_output, messages=100000 * SCALE),
+    },
+    'pylint_streamed': {
+        'test_type': 'pylint',
+        'write': partial(write_pylint_output, messages=100000 * SCALE),
+        'mode': MODE_STREAMED,
+    },
+    'flake8': {
+        'test_type': 'flake8',
+        'write': partial(write_flake8_output, messages=100000 * SCALE),
+    },
+    'radon_cc': {
+        'test_type': 'radon_cc',
+        'write': partial(write_radon_cc_output, files=RADON_FILES, blocks_per_file=100),
+    },
+    'radon_cc_per_file': {
+        'test_type': 'radon_cc',
+        'write': partial(
+            write_radon_cc_output, files=RADON_FILES, blocks_per_file=100, show_scores=True),
+        'mode': MODE_PER_FILE,
+    },
+}
+# Resetting the kernel's peak RSS mark first means imports don't hide what the parse itself used
+COLD_SCRIPT = """
+import json, sys, time
+from tests.benchmark.test_parsers import SCENARIOS, _create_test_parameter, _parse, _read_rss
+scenario = SCENARIOS[sys.argv[1]]
+test_parameter = _create_test_parameter(scenario, sys.argv[2])
+with open('/proc/self/clear_refs', 'w') as clear_refs:
+    clear_refs.write('5')
+rss_before = _read_rss('VmRSS')
+start = time.perf_counter()
+_parse(scenario, test_parameter)
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'rss_growth': _read_rss('VmHWM') - rss_before}))
+"""
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _create_test_parameter(scenario, input_file):
+    with patch(f'{MODULE_UNDER_TEST}.TEST_REGISTRY', REGISTRY):
+        test_parameter = _create_test_parameters_dict(
+            scenario['test_type'], os.path.dirname(input_file))
+    return dict(test_parameter, input_file=input_file)
+
+
+def _parse(scenario, test_parameter):
+    """
+    Parses the file the way the build would: as a result file left by an earlier step, as tool
+    output streamed through the matchers of `pydevhammer run`, or per file as the incremental mode
+    does. Returns the score, with the pytest state for JUnit XML.
+    """
+    input_file = test_parameter['input_file']
+    mode = scenario.get('mode')
+    if mode == MODE_STREAMED:
+        with open(input_file, encoding='utf-8', errors='replace') as lines:
+            line_parses = match_lines(lines, {
+                test_parameter['test_type']: (
+                    test_parameter['regex_pattern'], test_parameter['match']),
+            })
+        return _get_quality_indicator_score(line_parses[test_parameter['test_type']])
+    if mode == MODE_PER_FILE:
+        incremental = test_parameter['incremental']
+        with open(input_file, encoding='utf-8', errors='replace') as lines:
+            file_results = parse_file_results(
+                lines, incremental['file_regex'], get_module_names(RADON_FILES))
+        return aggregate(file_results.values(), incremental['aggregate'])
+    state, score, _ = _parse_test_parameter(test_parameter)
+    return score if state is None else (state, score)
+
+
+def _read_rss(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1]) * 1024
+    raise ValueError(f"No {field} in /proc/self/status")
+
+
+def _parse_cold(scenario_name, input_file):
+    """
+    Parses the file once in a fresh interpreter, as a build does, and returns how long the first
+    result took, regex compiling and first reads included, and how far the parse raised peak RSS.
+    """
+    environment = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    completed = subprocess.run(
+        [sys.executable, '-c', COLD_SCRIPT, scenario_name, input_file], env=environment,
+        cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    )
+    cold = json.loads(completed.stdout.decode().splitlines()[-1])
+    return cold['seconds'], cold['rss_growth']
+
+
+class TestParsersBenchmark(object):
+
+    @pytest.mark.skipif(
+        not os.path.exists('/proc/self/clear_refs'), reason="peak RSS is read from Linux's /proc")
+    @pytest.mark.parametrize('scenario_name', list(SCENARIOS))
+    def test_parse(self, scenario_name, tmp_path):
+        scenario = SCENARIOS[scenario_name]
+        input_file = str(tmp_path / REGISTRY[scenario['test_type']].input_file)
+        scenario['write'](input_file)
+        test_parameter = _create_test_parameter(scenario, input_file)
+
+        score = _parse(scenario, test_parameter)
+        if scenario['test_type'] == 'pytest':
+            assert score == ('failure', pytest.approx(1 - 60 / (20000 * SCALE)))
+        elif scenario['test_type'] == 'pylint':
+            assert score == 9.5
+        elif scenario['test_type'] == 'flake8':
+            assert score == 100000 * SCALE
+        else:
+            assert 1 < score < 10
+
+        result = measure(lambda: _parse(scenario, test_parameter), RUNS)
+        file_megabytes = os.path.getsize(input_file) / (1024 * 1024)
+        result['file_megabytes'] = round(file_megabytes, 2)
+        result['mb_per_second'] = file_megabytes / result['p50_seconds']
+        result['first_result_seconds'], result['peak_rss_bytes'] = _parse_cold(
+            scenario_name, input_file)
+
+        scenario_key = f'{scenario_name}-x{SCALE}'
+        report('parsers', scenario_key, result)
+        check_baseline('parsers', scenario_key, result)
@@ -0,0 +1,210 @@
+"""This benchmarks the full _execute pipeline against local GitHub and DynamoDB stand-ins."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name, redefined-outer-name
+
+import decimal
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from py_dev_hammer.github_status_posting import (
+    _execute, _execute_subprojects, _create_test_parameters_dict, flush_spool,
+)
+from py_dev_hammer.utils.metrics import metrics
+from py_dev_hammer.utils.registry import BETTER_LOWER, build_test_registry
+from py_dev_hammer.utils.rollups import get_rollup_key, roll_up
+from tests.benchmark.generators import write_junit_xml, write_pylint_output
+from tests.benchmark.harness import RUNS, SCALE, check_baseline, measure, report
+from tests.benchmark.stand_ins import FakeDynamoResource, FakeGitHubServer
+from tests.data_factory import (
+    APP_CONFIG, USER_CONFIG, CODE_BUILD_BUILD_URL, CODEBUILD_GIT_BRANCH, CODEBUILD_SOURCE_VERSION,
+    GITHUB_OWNER, GITHUB_TOKEN, BUILD_START_TIME_FIRST_RUN,
+)
+
+MODULE_UNDER_TEST = 'py_dev_hammer.github_status_posting'
+GITHUB_LATENCY_SECONDS = 0.02
+SCENARIOS = {
+    'baseline': {'static_types': 2, 'tests': 100, 'messages': 100, 'history': 10},
+    'many_test_types': {'static_types': 12, 'tests': 100, 'messages': 100, 'history': 10},
+    'large_result_files': {
+        'static_types': 4, 'tests': 5000 * SCALE, 'messages': 50000 * SCALE, 'history': 10},
+    'deep_history': {'static_types': 4, 'tests': 100, 'messages': 100, 'history': 5000 * SCALE},
+    'unchanged_rerun': {
+        'static_types': 4, 'tests': 100, 'messages': 100, 'history': 10, 'rerun': True},
+    'instrumented': {
+        'static_types': 2, 'tests': 100, 'messages': 100, 'history': 10, 'metrics': True},
+    'check_run': {
+        'static_types': 12, 'tests': 100, 'messages': 100, 'history': 10, 'reporter': 'checks'},
+    'spooled': {
+        'static_types': 12, 'tests': 100, 'messages': 100, 'history': 10, 'spool': True},
+    'monorepo': {
+        'static_types': 2, 'tests': 100, 'messages': 100, 'history': 10, 'subprojects': 20},
+}
+
+
+@pytest.fixture(scope='module')
+def github_server():
+    with FakeGitHubServer(latency=GITHUB_LATENCY_SECONDS) as server:
+        yield server
+
+
+def _create_synthetic_repo(results_dir, scenario):
+    write_junit_xml(
+        os.path.join(results_dir, 'pytest.xml'), scenario['tests'], output_bytes=200)
+    tests_to_run = {'dynamic': {'pytest': APP_CONFIG['tests_to_run']['dynamic']['pytest']}}
+    tests_to_run['static'] = {}
+    for index in range(scenario['static_types']):
+        input_file = f'pylint_{index}.static'
+        write_pylint_output(os.path.join(results_dir, input_file), scenario['messages'], seed=index)
+        tests_to_run['static'][f'pylint_{index}'] = dict(
+            APP_CONFIG['tests_to_run']['static']['pylint'], input_file=input_file)
+    return build_test_registry(tests_to_run)
+
+
+def _create_dynamo_resource(history, registry, branches):
+    resource = FakeDynamoResource(
+        APP_CONFIG['dynamo']['partition_key_name'], APP_CONFIG['dynamo']['sort_key_name'])
+    for branch in branches:
+        _create_branch_history(resource, history, registry, branch)
+    resource.request_counts.clear()
+    return resource
+
+
+def _create_branch_history(resource, history, registry, branch):
+    table = resource.Table(APP_CONFIG['dynamo']['table_name'])
+    lower_is_better = {
+        test_type for test_type, test_to_run in registry.items()
+        if test_to_run.better == BETTER_LOWER
+    }
+    metrics = {}
+    for index in range(history):
+        scores = {
+            test_type: decimal.Decimal(str(90 + (index + offset) % 10))
+            for offset, test_type in enumerate(registry)
+        }
+        metrics = roll_up(metrics, scores, lower_is_better, APP_CONFIG['dynamo']['rollup_window'])
+        table.put_item(Item=dict(
+            scores, branch_name=branch,
+            build_start_time=BUILD_START_TIME_FIRST_RUN - history + index
+        ))
+    rollup_key = get_rollup_key({
+        'partition_key_name': APP_CONFIG['dynamo']['partition_key_name'],
+        'partition_key_value': branch,
+        'sort_key_name': APP_CONFIG['dynamo']['sort_key_name'],
+    })
+    table.put_item(Item={
+        rollup_key['partition_key_name']: rollup_key['partition_key_value'],
+        rollup_key['sort_key_name']: rollup_key['sort_key_value'],
+        'metrics': metrics,
+        'build_count': history,
+    })
+
+
+def _report_first_build(run, github_server, resource, app_config):
+    """
+    Reports the commit's first build so the measured runs are re-runs of it. It is dated before
+    them so that they aren't treated as superseded; tests/unit checks a re-run POSTs nothing.
+    """
+    real_time = time.time
+    github_server.reset()
+    with patch(f'{MODULE_UNDER_TEST}.APP_CONFIG', app_config), \
+            patch(f'{MODULE_UNDER_TEST}.connect_to_aws_resource', return_value=resource), \
+            patch('time.time', side_effect=lambda: real_time() - 10):
+        run()
+
+
+class TestPipelineBenchmark(object):
+
+    @pytest.mark.parametrize('scenario_name', list(SCENARIOS))
+    def test_execute(self, scenario_name, github_server, tmp_path):
+        scenario = SCENARIOS[scenario_name]
+        subprojects = [f'project{index}' for index in range(scenario.get('subprojects', 0))]
+        results_dirs = {subproject: str(tmp_path / subproject) for subproject in subprojects}
+        for results_dir in results_dirs.values():
+            os.makedirs(results_dir)
+            registry = _create_synthetic_repo(results_dir, scenario)
+        if not subprojects:
+            registry = _create_synthetic_repo(str(tmp_path), scenario)
+        resource = _create_dynamo_resource(
+            scenario['history'], registry,
+            [f'{subproject}#{CODEBUILD_GIT_BRANCH}' for subproject in subprojects] or
+            [CODEBUILD_GIT_BRANCH]
+        )
+        app_config = dict(APP_CONFIG, github={
+            'api_url': github_server.api_url,
+            'combined_status_url': github_server.combined_status_url,
+            'check_runs_url': github_server.check_runs_url,
+        })
+        user_config = dict(
+            USER_CONFIG, parsing={'executor': 'thread'},
+            github=dict(USER_CONFIG['github'], reporter=scenario.get('reporter', 'statuses'))
+        )
+        if scenario.get('spool'):
+            user_config['reporting'] = {
+                'mode': 'spool', 'spool_dir': str(tmp_path / 'spool'), 'background_flush': False}
+
+        def setup():
+            github_server.reset(keep_statuses=scenario.get('rerun', False))
+            resource.request_counts.clear()
+            if scenario.get('metrics'):
+                metrics.enable()
+
+        with patch(f'{MODULE_UNDER_TEST}.APP_CONFIG', app_config), \
+                patch(f'{MODULE_UNDER_TEST}.TEST_REGISTRY', registry), \
+                patch(f'{MODULE_UNDER_TEST}.connect_to_aws_resource', return_value=resource), \
+                patch(f'{MODULE_UNDER_TEST}.get_ssm_parameters', return_value={
+                    'github_owner': GITHUB_OWNER, 'github_token': GITHUB_TOKEN}), \
+                patch.dict(os.environ, {
+                    'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH,
+                    'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION,
+                }):
+            if subprojects:
+                test_parameters = [
+                    dict(
+                        _create_test_parameters_dict(test_type, results_dirs[subproject]),
+                        subproject=subproject
+                    )
+                    for subproject in subprojects for test_type in registry
+                ]
+                execute = _execute_subprojects
+            else:
+                test_parameters = [
+                    _create_test_parameters_dict(test_type, str(tmp_path))
+                    for test_type in registry
+                ]
+                execute = _execute
+            if scenario.get('rerun'):
+                _report_first_build(
+                    lambda: execute(user_config, test_parameters, CODE_BUILD_BUILD_URL),
+                    github_server, resource, app_config
+                )
+            result = measure(
+                lambda: execute(user_config, test_parameters, CODE_BUILD_BUILD_URL),
+                RUNS, setup=setup
+            )
+            result['github_requests'] = len(github_server.requests)
+            result['dynamo_requests'] = sum(resource.request_counts.values())
+            if scenario.get('spool'):
+                # Every run spooled the same results, so the flush reports them once
+                assert flush_spool(user_config) == 1
+
+        if scenario.get('metrics'):
+            summary = metrics.report()['summary']
+            metrics.disable()
+            assert summary['stage.parse']['count'] == 1
+            assert summary['dynamodb.UpdateItem']['count'] == 2
+            assert summary['github.POST']['count'] == len(registry)
+
+        if scenario.get('reporter') == 'checks':
+            check_run = github_server.check_runs[1]
+            assert check_run['status'] == 'completed'
+            assert check_run['output']['summary'].count('\n') == len(registry) + 1
+        else:
+            assert len(github_server.statuses[CODEBUILD_SOURCE_VERSION]) == len(registry) * max(
+                1, len(subprojects))
+
+        scenario_key = f'{scenario_name}-x{SCALE}'
+        report('pipeline', scenario_key, result)
+        check_baseline('pipeline', scenario_key, result)
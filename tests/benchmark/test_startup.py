@@ -0,0 +1,46 @@
+"""This benchmarks the time from importing github_status_posting to entry_point being ready."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ['boto3', 'botocore', 'certifi', 'dpath', 'requests', 'urllib3', 'yaml']
+STARTUP_RUNS = int(os.environ.get('PYDEVHAMMER_STARTUP_RUNS', 5))
+STARTUP_BUDGET_SECONDS = float(os.environ.get('PYDEVHAMMER_STARTUP_BUDGET_SECONDS', 0.25))
+STARTUP_SCRIPT = f"""
+import json, sys, time
+preloaded = set(sys.modules)
+start = time.perf_counter()
+from py_dev_hammer.github_status_posting import entry_point
+elapsed = time.perf_counter() - start
+heavy_modules = [
+    module for module in {HEAVY_MODULES!r} if module in set(sys.modules) - preloaded]
+print(json.dumps({{'seconds': elapsed, 'heavy_modules': heavy_modules}}))
+"""
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _time_startup():
+    environment = {key: value for key, value in os.environ.items() if key != 'CONFIG_DIR'}
+    environment['PYTHONPATH'] = ROOT_DIR
+    completed = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT], env=environment, cwd=ROOT_DIR,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    )
+    return json.loads(completed.stdout.decode().splitlines()[-1])
+
+
+class TestStartup(object):
+
+    def test_import_to_entry_point_ready(self):
+        runs = [_time_startup() for _ in range(STARTUP_RUNS)]
+        median_seconds = statistics.median(run['seconds'] for run in runs)
+        print(f"Import to entry_point ready: median {median_seconds * 1000:.1f}ms "
+              f"over {STARTUP_RUNS} runs")
+
+        assert runs[0]['heavy_modules'] == []
+        assert median_seconds < STARTUP_BUDGET_SECONDS
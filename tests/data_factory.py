@@ -2,12 +2,15 @@
 
 import decimal
 import os
+import re
 
 from tests import TEST_RESOURCES_DIR
 from py_dev_hammer.utils.general import load_config_file
+from py_dev_hammer.utils.registry import build_test_registry
 
 APP_CONFIG = load_config_file(os.path.join(TEST_RESOURCES_DIR, 'app_config_test.yml'))
 USER_CONFIG = load_config_file(os.path.join(TEST_RESOURCES_DIR, 'user_config_test.yml'))
+TEST_REGISTRY = build_test_registry(APP_CONFIG['tests_to_run'])
 REGION = 'ap-southeast-2'
 GITHUB_TOKEN = '297045966567'
 PROJECT_NAME = 'some-cool-name'
@@ -21,38 +24,97 @@ CODE_BUILD_BUILD_URL = (
 )
 CODEBUILD_GIT_BRANCH = 'COOL-NAME-8-unit-tests'
 CODEBUILD_SOURCE_VERSION = '41db5ed82c0f19ab460efeb30ec116e2bf3a210b'
+GITHUB_OWNER = 'declankeyesbevan'
+SSM_PARAMETERS_RESPONSE = {
+    'Parameters': [
+        {'Name': 'github_owner', 'Value': GITHUB_OWNER},
+        {'Name': 'github_token', 'Value': GITHUB_TOKEN},
+    ],
+    'InvalidParameters': [],
+}
+GITHUB_STATUS_URL = 'https://api.github.com/repos/{}/{}/statuses/{}'.format(
+    GITHUB_OWNER, USER_CONFIG['github']['repo'], CODEBUILD_SOURCE_VERSION)
+GITHUB_URLS = {
+    'statuses': GITHUB_STATUS_URL,
+    'combined_status': 'https://api.github.com/repos/{}/{}/commits/{}/status'.format(
+        GITHUB_OWNER, USER_CONFIG['github']['repo'], CODEBUILD_SOURCE_VERSION),
+    'check_runs': 'https://api.github.com/repos/{}/{}/check-runs'.format(
+        GITHUB_OWNER, USER_CONFIG['github']['repo']),
+}
+GITHUB_CHECK_RUN_URL = '{}/4'.format(GITHUB_URLS['check_runs'])
+PYTEST_REGEX_PATTERN = re.compile(
+    r'.*(errors="\d") (failures="\d").*(skips="\d").*(tests="\d")')
 TEST_PARAM_DICT_PYTEST_PASS = {
     'test_type': 'pytest',
+    'dynamic': True,
     'input_file': os.path.join(TEST_RESOURCES_DIR, 'pytest_pass.xml'),
-    'regex_pattern': r'.*(errors="\d") (failures="\d").*(skips="\d").*(tests="\d")',
+    'regex_pattern': PYTEST_REGEX_PATTERN,
     'message': 'Pytest score',
     'multiplier': 100,
     'percent': True,
 }
 TEST_PARAM_DICT_PYTEST_FAIL = {
     'test_type': 'pytest',
+    'dynamic': True,
     'input_file': os.path.join(TEST_RESOURCES_DIR, 'pytest_fail.xml'),
-    'regex_pattern': r'.*(errors="\d") (failures="\d").*(skips="\d").*(tests="\d")',
+    'regex_pattern': PYTEST_REGEX_PATTERN,
     'message': 'Pytest score',
     'multiplier': 100,
     'percent': True,
 }
 TEST_PARAM_DICT_PYLINT = {
     'test_type': 'pylint',
+    'dynamic': False,
     'input_file': os.path.join(TEST_RESOURCES_DIR, 'pylint.static'),
-    'regex_pattern': '.*?(\\d+.\\d+)/10$',
+    'regex_pattern': re.compile('.*?(\\d+.\\d+)/10$'),
     'message': 'Pylint score',
     'multiplier': 10,
     'percent': True,
+    'match': 'last',
+    'command': 'pylint -f parseable cool_project_bro',
+    'stdout_file': os.path.join(TEST_RESOURCES_DIR, 'pylint.static'),
+    'incremental': None,
+    'format': 'regex',
+}
+TEST_PARAM_DICT_COBERTURA = {
+    'test_type': 'coverage',
+    'dynamic': False,
+    'input_file': os.path.join(TEST_RESOURCES_DIR, 'coverage.xml'),
+    'regex_pattern': None,
+    'message': 'Coverage score',
+    'multiplier': 1,
+    'percent': True,
+    'format': 'cobertura',
+}
+COBERTURA_FILES = {
+    'cool_project_bro/bro.py': (5, 4, 4, 1),
+    'cool_project_bro/__init__.py': (4, 2, 0, 0),
 }
 TEST_PARAM_DICT_MISSING_FILE = {
     'test_type': 'pytest',
+    'dynamic': True,
     'input_file': 'canny_find_it_captain',
-    'regex_pattern': r'.*(errors="\d") (failures="\d").*(skips="\d").*(tests="\d")',
+    'regex_pattern': PYTEST_REGEX_PATTERN,
     'message': 'Pytest score',
     'multiplier': 100,
     'percent': True,
 }
+JUNIT_XML_MULTIPLE_SUITES = (
+    '<?xml version="1.0" encoding="utf-8"?><testsuites>'
+    '<testsuite name="unit" tests="6" failures="1" errors="0" skipped="2" time="1.5">'
+    '<testcase name="test_one"><system-out>lots of output</system-out></testcase>'
+    '<testsuite name="nested" tests="99" failures="99"/>'
+    '</testsuite>'
+    '<testsuite time="2.5" skipped="1" errors="1" tests="4" failures="1" name="functional">'
+    '<testcase name="test_two"><failure message="boom"/></testcase>'
+    '</testsuite></testsuites>'
+)
+JUNIT_XML_TOTALS_ROOT = (
+    '<testsuites tests="4" failures="1" errors="0">'
+    '<testsuite name="a" tests="2" failures="1" time="0.5"/>'
+    '<testsuite name="b" tests="2" failures="0" time="0.5"/>'
+    '</testsuites>'
+)
 GITHUB_PAYLOAD = {
     'state': 'success',
     'target_url': CODE_BUILD_BUILD_URL,
@@ -67,12 +129,26 @@ BUILD_START_TIME_SECOND_RUN = 1520334089
 DYNAMO_ITEMS = [
     {
         'branch_name': CODEBUILD_GIT_BRANCH,
-        'build_start_time': decimal.Decimal('{}'.format(BUILD_START_TIME_FIRST_RUN)),
-        'pylint': decimal.Decimal('100')
+        'build_start_time': decimal.Decimal('{}'.format(BUILD_START_TIME_SECOND_RUN)),
+        'pylint': decimal.Decimal('90')
     },
     {
         'branch_name': CODEBUILD_GIT_BRANCH,
-        'build_start_time': decimal.Decimal('{}'.format(BUILD_START_TIME_SECOND_RUN)),
-        'pylint': decimal.Decimal('90')
-    }
+        'build_start_time': decimal.Decimal('{}'.format(BUILD_START_TIME_FIRST_RUN)),
+        'pylint': decimal.Decimal('100')
+    },
 ]
+ROLLUP_METRICS = {
+    'pylint': {
+        'last': decimal.Decimal('90'),
+        'best': decimal.Decimal('100'),
+        'streak': 1,
+        'window': [decimal.Decimal('100'), decimal.Decimal('90')],
+    },
+}
+PARTITION_AND_SORT_KEY = {
+    'partition_key_name': 'branch_name',
+    'partition_key_value': CODEBUILD_GIT_BRANCH,
+    'sort_key_name': 'build_start_time',
+    'sort_key_value': BUILD_START_TIME_SECOND_RUN,
+}
@@ -0,0 +1,307 @@
+"""This unit tests utils.aws."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name, protected-access
+
+import os
+from unittest.mock import patch, MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from py_dev_hammer.utils import aws
+from py_dev_hammer.utils.aws import (
+    connect_to_aws_resource, get_boto_client, get_ssm_parameters, get_latest_items_by_partition_key,
+    get_with_partition_and_sort_key, update_if_version_matches, update_if_not_newer,
+    batch_put_with_partition_and_sort_key, batch_get_with_partition_and_sort_key, scan_in_segments,
+    query_in_parallel,
+)
+from py_dev_hammer.utils.errors import GeneralError
+from tests.data_factory import (
+    GITHUB_OWNER, GITHUB_TOKEN, SSM_PARAMETERS_RESPONSE, DYNAMO_ITEMS, PARTITION_AND_SORT_KEY,
+    USER_CONFIG, REGION,
+)
+
+MODULE_UNDER_TEST = 'py_dev_hammer.utils.aws'
+
+
+@pytest.fixture(autouse=True)
+def clear_process_state():
+    aws._SSM_PARAMETERS.clear()
+    aws._AWS_CLIENTS.clear()
+    yield
+    aws._SSM_PARAMETERS.clear()
+    aws._AWS_CLIENTS.clear()
+
+
+class TestAws(object):
+
+    @patch('{}.get_aws_session'.format(MODULE_UNDER_TEST))
+    def test_get_boto_client(self, mock_session):
+        mock_session.return_value.client.side_effect = lambda *args, **kwargs: MagicMock()
+        client = get_boto_client('ssm', USER_CONFIG)
+        assert get_boto_client('ssm', USER_CONFIG) is client
+        assert get_boto_client('ssm') is not client
+        assert get_boto_client('dynamodb', USER_CONFIG) is not client
+        assert mock_session.return_value.client.call_count == 3
+
+        _, kwargs = mock_session.return_value.client.call_args_list[0]
+        assert kwargs['region_name'] == REGION
+        assert kwargs['config'].max_pool_connections == 20
+        assert kwargs['config'].retries == {'mode': 'adaptive', 'max_attempts': 5}
+
+    @patch('{}.get_aws_session'.format(MODULE_UNDER_TEST))
+    def test_connect_to_aws_resource(self, mock_session):
+        resource = connect_to_aws_resource('dynamodb', USER_CONFIG)
+        assert connect_to_aws_resource('dynamodb', USER_CONFIG) is resource
+        assert mock_session.return_value.resource.call_count == 1
+
+    @patch('{}.get_boto_client'.format(MODULE_UNDER_TEST))
+    def test_get_ssm_parameters(self, mock_client):
+        mock_client.return_value.get_parameters.return_value = SSM_PARAMETERS_RESPONSE
+        names = ['github_owner', 'github_token']
+        expected = {'github_owner': GITHUB_OWNER, 'github_token': GITHUB_TOKEN}
+        assert get_ssm_parameters(names) == expected
+        assert get_ssm_parameters(names) == expected
+        assert mock_client.return_value.get_parameters.call_count == 1
+
+        aws._SSM_PARAMETERS.clear()
+        mock_client.return_value.get_parameters.return_value = {
+            'Parameters': [], 'InvalidParameters': names}
+        with pytest.raises(GeneralError):
+            get_ssm_parameters(names)
+
+    @patch('{}.get_boto_client'.format(MODULE_UNDER_TEST))
+    def test_get_ssm_parameters_expire(self, mock_client):
+        get_parameters = mock_client.return_value.get_parameters
+        get_parameters.return_value = SSM_PARAMETERS_RESPONSE
+        names = ['github_owner', 'github_token']
+        with patch('{}.time.time'.format(MODULE_UNDER_TEST), return_value=1000):
+            get_ssm_parameters(names, cache_ttl=60)
+        with patch('{}.time.time'.format(MODULE_UNDER_TEST), return_value=1059):
+            get_ssm_parameters(names, cache_ttl=60)
+        assert get_parameters.call_count == 1
+
+        get_parameters.return_value = {'Parameters': [
+            {'Name': 'github_owner', 'Value': GITHUB_OWNER},
+            {'Name': 'github_token', 'Value': 'rotated-token'},
+        ]}
+        with patch('{}.time.time'.format(MODULE_UNDER_TEST), return_value=1060):
+            assert get_ssm_parameters(names, cache_ttl=60)['github_token'] == 'rotated-token'
+        assert get_parameters.call_count == 2
+
+        with patch('{}.time.time'.format(MODULE_UNDER_TEST), return_value=1060 + 15 * 60):
+            get_ssm_parameters(names)
+        assert get_parameters.call_count == 3
+
+    @patch('{}.get_boto_client'.format(MODULE_UNDER_TEST))
+    def test_get_ssm_parameters_cache_file(self, mock_client, tmp_path):
+        mock_client.return_value.get_parameters.return_value = SSM_PARAMETERS_RESPONSE
+        names = ['github_owner', 'github_token']
+        cache_file = str(tmp_path / 'ssm' / 'cache.json')
+        get_ssm_parameters(names, cache_file=cache_file, cache_ttl=60)
+        assert os.stat(cache_file).st_mode & 0o777 == 0o600
+
+        aws._SSM_PARAMETERS.clear()
+        assert get_ssm_parameters(names, cache_file=cache_file, cache_ttl=60)[
+            'github_token'] == GITHUB_TOKEN
+        assert mock_client.return_value.get_parameters.call_count == 1
+
+        aws._SSM_PARAMETERS.clear()
+        os.chmod(cache_file, 0o644)
+        get_ssm_parameters(names, cache_file=cache_file, cache_ttl=60)
+        assert mock_client.return_value.get_parameters.call_count == 2
+
+        aws._SSM_PARAMETERS.clear()
+        with patch('{}.time.time'.format(MODULE_UNDER_TEST), return_value=2 ** 40):
+            get_ssm_parameters(names, cache_file=cache_file, cache_ttl=60)
+        assert mock_client.return_value.get_parameters.call_count == 3
+
+    def test_get_latest_items_by_partition_key(self):
+        resource = MagicMock()
+        query = resource.Table.return_value.query
+        query.side_effect = [
+            {'Items': DYNAMO_ITEMS[:1], 'LastEvaluatedKey': {'page': 1}},
+            {'Items': DYNAMO_ITEMS[1:], 'LastEvaluatedKey': {'page': 2}},
+        ]
+        items = get_latest_items_by_partition_key(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, 2, attributes=['pylint'],
+            page_size=1
+        )
+        assert items == DYNAMO_ITEMS
+        assert query.call_count == 2
+        first_call, second_call = query.call_args_list
+        assert first_call[1]['ScanIndexForward'] is False
+        assert first_call[1]['Limit'] == 1
+        assert sorted(first_call[1]['ExpressionAttributeNames'].values()) == [
+            'branch_name', 'build_start_time', 'pylint']
+        assert second_call[1]['ExclusiveStartKey'] == {'page': 1}
+
+        query.reset_mock(side_effect=True)
+        query.return_value = {'Items': DYNAMO_ITEMS[1:]}
+        assert get_latest_items_by_partition_key(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, 5) == DYNAMO_ITEMS[1:]
+        assert query.call_count == 1
+        assert 'ProjectionExpression' not in query.call_args[1]
+        assert 'FilterExpression' not in query.call_args[1]
+
+        get_latest_items_by_partition_key(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, 1, filter_condition='condition')
+        assert query.call_args[1]['FilterExpression'] == 'condition'
+
+    def test_get_with_partition_and_sort_key(self):
+        resource = MagicMock()
+        resource.Table.return_value.get_item.return_value = {'Item': DYNAMO_ITEMS[0]}
+        assert get_with_partition_and_sort_key(
+            resource, 'build-status', PARTITION_AND_SORT_KEY) == DYNAMO_ITEMS[0]
+        assert resource.Table.return_value.get_item.call_args[1]['Key'] == {
+            'branch_name': PARTITION_AND_SORT_KEY['partition_key_value'],
+            'build_start_time': PARTITION_AND_SORT_KEY['sort_key_value'],
+        }
+
+        resource.Table.return_value.get_item.return_value = {}
+        assert get_with_partition_and_sort_key(
+            resource, 'build-status', PARTITION_AND_SORT_KEY) is None
+
+    @patch('{}.time.sleep'.format(MODULE_UNDER_TEST), new=MagicMock())
+    def test_batch_put_with_partition_and_sort_key(self):
+        resource = MagicMock()
+        keys_and_data = [
+            (dict(PARTITION_AND_SORT_KEY, partition_key_value=f'project{index}#branch'),
+             {'pylint': index})
+            for index in range(30)
+        ]
+        unprocessed = {'build-status': [{'PutRequest': {'Item': {'pylint': 0}}}]}
+        resource.batch_write_item.side_effect = [
+            {'UnprocessedItems': unprocessed}, {'UnprocessedItems': {}}, {}]
+        items = batch_put_with_partition_and_sort_key(resource, 'build-status', keys_and_data)
+        assert items[29] == {
+            'branch_name': 'project29#branch',
+            'build_start_time': PARTITION_AND_SORT_KEY['sort_key_value'],
+            'pylint': 29,
+        }
+        requests = [call[1]['RequestItems'] for call in resource.batch_write_item.call_args_list]
+        assert [len(request['build-status']) for request in requests] == [25, 1, 5]
+        assert requests[1] == unprocessed
+
+        resource.batch_write_item.side_effect = None
+        resource.batch_write_item.return_value = {'UnprocessedItems': unprocessed}
+        with pytest.raises(GeneralError):
+            batch_put_with_partition_and_sort_key(resource, 'build-status', keys_and_data)
+
+    @patch('{}.time.sleep'.format(MODULE_UNDER_TEST), new=MagicMock())
+    def test_batch_get_with_partition_and_sort_key(self):
+        resource = MagicMock()
+        keys = [
+            dict(PARTITION_AND_SORT_KEY, partition_key_value=partition_key_value)
+            for partition_key_value in ('api#branch', 'worker#branch', 'missing#branch')
+        ]
+        sort_key_value = PARTITION_AND_SORT_KEY['sort_key_value']
+        resource.batch_get_item.side_effect = [
+            {
+                'Responses': {'build-status': [
+                    {'branch_name': 'worker#branch', 'build_start_time': sort_key_value}]},
+                'UnprocessedKeys': {'build-status': {'Keys': [
+                    {'branch_name': 'api#branch', 'build_start_time': sort_key_value}]}},
+            },
+            {'Responses': {'build-status': [
+                {'branch_name': 'api#branch', 'build_start_time': sort_key_value, 'pylint': 9}]}},
+        ]
+        items = batch_get_with_partition_and_sort_key(resource, 'build-status', keys)
+        assert [item and item['branch_name'] for item in items] == [
+            'api#branch', 'worker#branch', None]
+        assert items[0]['pylint'] == 9
+        assert len(resource.batch_get_item.call_args_list[0][1]['RequestItems'][
+            'build-status']['Keys']) == 3
+
+    def test_scan_in_segments(self):
+        resource = MagicMock()
+
+        def scan(Segment, TotalSegments, **kwargs):
+            assert TotalSegments == 3
+            if 'ExclusiveStartKey' not in kwargs:
+                return {'Items': [{'segment': Segment, 'page': 0}], 'LastEvaluatedKey': {}}
+            return {'Items': [{'segment': Segment, 'page': 1}]}
+
+        resource.Table.return_value.scan.side_effect = scan
+        items = list(scan_in_segments(
+            resource, 'build-status', 3, ['branch_name'], filter_condition='condition',
+            page_size=50
+        ))
+        assert sorted((item['segment'], item['page']) for item in items) == [
+            (0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 1)]
+        kwargs = resource.Table.return_value.scan.call_args[1]
+        assert kwargs['ProjectionExpression'] == '#attr0'
+        assert kwargs['FilterExpression'] == 'condition'
+        assert kwargs['Limit'] == 50
+
+        resource.Table.return_value.scan.side_effect = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'Scan')
+        with pytest.raises(ClientError):
+            list(scan_in_segments(resource, 'build-status', 3))
+
+    def test_scan_in_segments_stops_with_consumer(self):
+        resource = MagicMock()
+        resource.Table.return_value.scan.return_value = {
+            'Items': [{'page': 'endless'}], 'LastEvaluatedKey': {}}
+        items = scan_in_segments(resource, 'build-status', 4)
+        assert next(items) == {'page': 'endless'}
+        items.close()
+        # The queue fills, then each segment stops once the page it holds can't be handed over
+        assert resource.Table.return_value.scan.call_count <= 4 * (aws.STREAM_PAGES_PER_READER + 2)
+
+    def test_query_in_parallel(self):
+        resource = MagicMock()
+        resource.Table.return_value.query.side_effect = lambda **kwargs: {
+            'Items': [{'day': kwargs['KeyConditionExpression']}]}
+        items = query_in_parallel(
+            resource, 'build-status', ['monday', 'tuesday'], index_name='build-day-index',
+            max_workers=1
+        )
+        assert sorted(item['day'] for item in items) == ['monday', 'tuesday']
+        assert resource.Table.return_value.query.call_args[1]['IndexName'] == 'build-day-index'
+        assert list(query_in_parallel(resource, 'build-status', [])) == []
+
+    def test_update_if_version_matches(self):
+        resource = MagicMock()
+        update_item = resource.Table.return_value.update_item
+        assert update_if_version_matches(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, {'metrics': {}}, 'build_count', None)
+        kwargs = update_item.call_args[1]
+        assert kwargs['UpdateExpression'] == 'SET #attr0 = :attr0 ADD #version :one'
+        assert kwargs['ConditionExpression'] == 'attribute_not_exists(#version)'
+
+        assert update_if_version_matches(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, {'metrics': {}}, 'build_count', 4)
+        kwargs = update_item.call_args[1]
+        assert kwargs['ConditionExpression'] == '#version = :version'
+        assert kwargs['ExpressionAttributeValues'][':version'] == 4
+
+        update_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        assert not update_if_version_matches(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, {'metrics': {}}, 'build_count', 4)
+
+        update_item.side_effect = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'UpdateItem')
+        with pytest.raises(ClientError):
+            update_if_version_matches(
+                resource, 'build-status', PARTITION_AND_SORT_KEY, {'metrics': {}}, 'build_count', 4)
+
+    def test_update_if_not_newer(self):
+        resource = MagicMock()
+        update_item = resource.Table.return_value.update_item
+        assert update_if_not_newer(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, {'head_commit_sha': 'abc'},
+            'head_started_at', 1000
+        )
+        kwargs = update_item.call_args[1]
+        assert kwargs['UpdateExpression'] == 'SET #attr0 = :attr0, #attr1 = :attr1'
+        assert kwargs['ConditionExpression'] == (
+            'attribute_not_exists(#order) OR #order <= :order')
+        assert kwargs['ExpressionAttributeNames']['#attr1'] == 'head_started_at'
+        assert kwargs['ExpressionAttributeValues'][':order'] == 1000
+
+        update_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        assert not update_if_not_newer(
+            resource, 'build-status', PARTITION_AND_SORT_KEY, {}, 'head_started_at', 1000)
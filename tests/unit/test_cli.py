@@ -0,0 +1,111 @@
+"""This unit tests cli."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import json
+from unittest.mock import patch, MagicMock
+
+from botocore.exceptions import ClientError
+
+from py_dev_hammer.cli import main
+from py_dev_hammer.utils.errors import GeneralError
+from tests.data_factory import APP_CONFIG, USER_CONFIG, TEST_REGISTRY
+
+MODULE_UNDER_TEST = 'py_dev_hammer.github_status_posting'
+HISTORY_MODULE = 'py_dev_hammer.utils.history_report'
+AWS_MODULE = 'py_dev_hammer.utils.aws'
+
+
+class TestCli(object):
+
+    @patch('{}.entry_point'.format(MODULE_UNDER_TEST))
+    def test_report(self, mock_entry_point):
+        assert main(['report', '--profile', 'profile']) == 0
+        mock_entry_point.assert_called_once_with(['--profile', 'profile'])
+
+    @patch('{}.runner_entry_point'.format(MODULE_UNDER_TEST))
+    def test_run(self, mock_runner_entry_point):
+        assert main(['run']) == 0
+        mock_runner_entry_point.assert_called_once_with([])
+
+    @patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), USER_CONFIG)
+    @patch('{}.flush_spool'.format(MODULE_UNDER_TEST))
+    def test_flush(self, mock_flush):
+        assert main(['flush', '--spool-dir', 'spool']) == 0
+        mock_flush.assert_called_once_with(USER_CONFIG, 'spool')
+
+        mock_flush.side_effect = GeneralError("GitHub is down")
+        assert main(['flush']) == 1
+
+    @patch('{}.event_handler'.format(MODULE_UNDER_TEST))
+    def test_serve(self, mock_handler, tmp_path, capsys):
+        events_file = tmp_path / 'events.jsonl'
+        events_file.write_text('{"build_arn": "first"}\n\n{"build_arn": "second"}\nnot json\n')
+        mock_handler.side_effect = [{'build_arn': 'first'}, GeneralError("boom")]
+        assert main(['serve', str(events_file)]) == 1
+        assert [call[0][0] for call in mock_handler.call_args_list] == [
+            {'build_arn': 'first'}, {'build_arn': 'second'}]
+        assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [
+            {'build_arn': 'first'}, {'error': 'boom'},
+            {'error': 'Expecting value: line 1 column 1 (char 0)'},
+        ]
+
+    @patch('{}.event_handler'.format(MODULE_UNDER_TEST))
+    def test_serve_survives_client_errors(self, mock_handler, tmp_path, capsys):
+        events_file = tmp_path / 'events.jsonl'
+        events_file.write_text('{"build_arn": "first"}\n{"build_arn": "second"}\n')
+        mock_handler.side_effect = [
+            ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'PutItem'),
+            {'build_arn': 'second'},
+        ]
+        assert main(['serve', str(events_file)]) == 1
+        first, second = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert 'ProvisionedThroughputExceededException' in first['error']
+        assert second == {'build_arn': 'second'}
+
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), USER_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    @patch('{}.connect_to_aws_resource'.format(AWS_MODULE), new=MagicMock())
+    @patch('{}.get_boto_client'.format(AWS_MODULE), new=MagicMock())
+    @patch('{}.is_history_index_active'.format(HISTORY_MODULE))
+    @patch('{}.read_history'.format(HISTORY_MODULE))
+    def test_history(self, mock_read, mock_active, tmp_path, capsys):
+        rows = [
+            {'branch': 'master', 'build_start_time': 100, 'pylint': 90.0},
+            {'branch': 'master', 'build_start_time': 200, 'pylint': 80.0},
+        ]
+        mock_read.side_effect = lambda *args: iter(rows)
+        assert main(['history', '--test-type', 'pylint']) == 0
+        assert capsys.readouterr().out.splitlines() == [
+            'branch,build_start_time,pylint', 'master,100,90.0', 'master,200,80.0']
+        _, _, test_types, since, branch_prefix, segments, use_index = mock_read.call_args[0]
+        assert (test_types, since, branch_prefix, segments, use_index) == (
+            ['pylint'], None, None, 8, False)
+        assert not mock_active.called
+
+        mock_active.return_value = True
+        output_file = tmp_path / 'history.jsonl'
+        assert main([
+            'history', '--test-type', 'pylint', '--days', '7', '--branch', 'mas', '--latest',
+            '--format', 'json', '--output', str(output_file),
+        ]) == 0
+        assert [json.loads(line) for line in output_file.read_text().splitlines()] == [
+            dict(rows[1], builds=2, pylint_change=-10.0)]
+        assert mock_read.call_args[0][3] is not None
+        assert mock_read.call_args[0][-1]
+
+        assert main(['history', '--test-type', 'not_a_test_type']) == 1
+
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), USER_CONFIG)
+    @patch('{}.connect_to_aws_resource'.format(AWS_MODULE), new=MagicMock())
+    @patch('{}.get_boto_client'.format(AWS_MODULE), new=MagicMock())
+    @patch('{}.create_history_index'.format(HISTORY_MODULE))
+    def test_history_create_index(self, mock_create):
+        assert main(['history', '--create-index', '--segments', '4']) == 0
+        assert mock_create.call_args[0][2] == APP_CONFIG['dynamo']
+        assert mock_create.call_args[0][3] == 4
+
+    def test_no_command(self):
+        assert main([]) == 2
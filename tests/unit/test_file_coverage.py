@@ -0,0 +1,62 @@
+"""This unit tests utils.file_coverage."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import zlib
+
+import pytest
+
+from py_dev_hammer.utils.file_coverage import (
+    get_coverage_changes, get_coverage_rate, get_total_coverage_rate, pack_file_coverage,
+    unpack_file_coverage,
+)
+from tests.data_factory import COBERTURA_FILES
+
+
+class Binary(object):  # Stands in for boto3.dynamodb.types.Binary
+
+    def __init__(self, value):
+        self.value = value
+
+
+class TestFileCoverage(object):
+
+    def test_pack_file_coverage(self):
+        data = pack_file_coverage(COBERTURA_FILES)
+        assert unpack_file_coverage(data) == COBERTURA_FILES
+        assert unpack_file_coverage(Binary(data)) == COBERTURA_FILES
+        assert unpack_file_coverage(pack_file_coverage({})) == {}
+
+        files = {
+            f'cool_project_bro/package_{index // 100}/module_{index}.py': (
+                index % 500, index % 400, index % 30, index % 20)
+            for index in range(10000)
+        }
+        data = pack_file_coverage(files)
+        assert len(data) < 100 * 1024
+        assert unpack_file_coverage(data) == files
+
+    def test_unpack_file_coverage_invalid(self):
+        with pytest.raises(ValueError):
+            unpack_file_coverage(b'not coverage')
+        with pytest.raises(ValueError):
+            unpack_file_coverage(zlib.compress(b'\x09\x00\x00\x00\x00'))
+
+    def test_get_coverage_rate(self):
+        assert get_coverage_rate((5, 4, 4, 1)) == pytest.approx(55.56, abs=0.01)
+        assert get_coverage_rate((0, 0, 0, 0)) is None
+        assert get_total_coverage_rate(COBERTURA_FILES) == pytest.approx(53.85, abs=0.01)
+        assert get_total_coverage_rate({}) is None
+
+    def test_get_coverage_changes(self):
+        previous_files = dict(
+            COBERTURA_FILES, **{
+                'cool_project_bro/__init__.py': (4, 4, 0, 0),
+                'cool_project_bro/gone.py': (1, 1, 0, 0),
+            }
+        )
+        files = dict(COBERTURA_FILES, **{'cool_project_bro/new.py': (1, 0, 0, 0)})
+        assert get_coverage_changes(files, previous_files) == [
+            {'file': 'cool_project_bro/__init__.py', 'rate': 50.0, 'change': -50.0}]
+        assert get_coverage_changes(files, previous_files, limit=0) == []
+        assert get_coverage_changes(COBERTURA_FILES, COBERTURA_FILES) == []
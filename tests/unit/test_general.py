@@ -0,0 +1,65 @@
+"""This unit tests utils.general."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import json
+import os
+import stat
+from unittest.mock import patch
+
+import pytest
+
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.general import LazyConfig, atomic_write_json, get_cache_dir, get_certs
+from tests import TEST_RESOURCES_DIR
+from tests.data_factory import USER_CONFIG
+
+MODULE_UNDER_TEST = 'py_dev_hammer.utils.general'
+
+
+class TestGeneral(object):
+
+    @patch.dict(os.environ, {'CONFIG_DIR': TEST_RESOURCES_DIR})
+    @patch('{}.load_config_file'.format(MODULE_UNDER_TEST), return_value=USER_CONFIG)
+    def test_lazy_config(self, mock_load):
+        config = LazyConfig('user_config_test.yml')
+        assert not mock_load.called
+
+        assert config['github'] == USER_CONFIG['github']
+        assert dict(config) == USER_CONFIG
+        assert mock_load.call_count == 1
+        mock_load.assert_called_with(os.path.join(TEST_RESOURCES_DIR, 'user_config_test.yml'))
+
+    def test_lazy_config_errors(self):
+        with patch.dict(os.environ, clear=True):
+            with pytest.raises(GeneralError):
+                LazyConfig('user_config_test.yml').get('github')
+        with patch.dict(os.environ, {'CONFIG_DIR': TEST_RESOURCES_DIR}):
+            with pytest.raises(GeneralError):
+                LazyConfig('canny_find_it_captain.yml').get('github')
+
+    def test_get_certs(self, tmp_path):
+        certificate_file = str(tmp_path / 'cert.pem')
+        with patch.dict(os.environ, {'CERTIFICATE_FILE': certificate_file}):
+            assert get_certs() == certificate_file
+            with patch('urllib3.PoolManager') as mock_pool_manager:
+                assert get_certs() == certificate_file
+            assert not mock_pool_manager.called
+
+    def test_get_cache_dir(self):
+        with patch.dict(os.environ, {'PYDEVHAMMER_CACHE_DIR': '/tmp/pydevhammer'}):
+            assert get_cache_dir() == '/tmp/pydevhammer'
+            assert get_cache_dir('cache') == 'cache'
+        with patch.dict(os.environ, {'HOME': '/home/bro'}):
+            os.environ.pop('PYDEVHAMMER_CACHE_DIR', None)
+            assert get_cache_dir() == '/home/bro/.cache/pydevhammer'
+
+    def test_atomic_write_json(self, tmp_path):
+        file_path = str(tmp_path / 'cache' / 'data.json')
+        atomic_write_json(file_path, {'a': 1}, mode=0o600)
+        atomic_write_json(file_path, {'b': 2}, mode=0o600, fsync=True)
+        with open(file_path) as file_str:
+            assert json.load(file_str) == {'b': 2}
+        assert os.listdir(str(tmp_path / 'cache')) == ['data.json']
+        assert stat.S_IMODE(os.stat(str(tmp_path / 'cache')).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o600
@@ -0,0 +1,165 @@
+"""This unit tests utils.github."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import json
+from unittest.mock import patch, MagicMock
+
+import pytest
+from requests.exceptions import MissingSchema
+
+from py_dev_hammer.github_status_posting import _create_parse_error_payloads
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.github import (
+    RateLimiter, complete_check_run, create_check_run_payload, filter_unchanged_statuses,
+    get_combined_status, request_with_backoff, send_json, start_check_run,
+)
+from tests.data_factory import (
+    CODE_BUILD_BUILD_URL, CODEBUILD_SOURCE_VERSION, GITHUB_CHECK_RUN_URL, GITHUB_PAYLOAD,
+    GITHUB_STATUS_URL, GITHUB_URLS,
+)
+
+MODULE_UNDER_TEST = 'py_dev_hammer.utils.github'
+NOW = 1520333673.0
+
+
+def _response(status_code, headers=None, payload=None):
+    return MagicMock(status_code=status_code, headers=headers or {}, json=lambda: payload)
+
+
+class TestGithub(object):
+
+    @patch('{}.time'.format(MODULE_UNDER_TEST))
+    def test_rate_limiter(self, mock_time):
+        mock_time.time.return_value = NOW
+        rate_limiter = RateLimiter(pending=4, max_wait=30)
+        assert rate_limiter.acquire() == 0
+
+        rate_limiter.update(_response(201, {
+            'X-RateLimit-Remaining': '100', 'X-RateLimit-Reset': str(NOW + 60)}))
+        assert rate_limiter.acquire() == 0
+        assert not mock_time.sleep.called
+
+        rate_limiter.update(_response(201, {
+            'X-RateLimit-Remaining': '2', 'X-RateLimit-Reset': str(NOW + 60)}))
+        rate_limiter.pending = 4
+        assert rate_limiter.acquire() == 0
+        assert rate_limiter.acquire() == 30
+        mock_time.sleep.assert_called_with(30)
+
+    @patch('{}.time.sleep'.format(MODULE_UNDER_TEST))
+    def test_request_with_backoff(self, mock_sleep):
+        session = MagicMock()
+        session.request.side_effect = [
+            _response(502),
+            _response(429, {'Retry-After': '3'}),
+            _response(403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '0'}),
+            _response(201),
+        ]
+        assert request_with_backoff(session, 'POST', GITHUB_URLS['statuses']).status_code == 201
+        assert session.request.call_count == 4
+        assert mock_sleep.call_args_list[1][0] == (3.0,)
+        assert mock_sleep.call_args_list[2][0] == (0.0,)
+
+        session.request.reset_mock(side_effect=True)
+        session.request.return_value = _response(403)
+        assert request_with_backoff(session, 'POST', GITHUB_URLS['statuses']).status_code == 403
+        assert session.request.call_count == 1
+
+        session.request.reset_mock()
+        session.request.return_value = _response(503)
+        request_with_backoff(session, 'POST', GITHUB_URLS['statuses'], max_attempts=3)
+        assert session.request.call_count == 3
+
+    def test_get_combined_status(self):
+        session = MagicMock()
+        session.request.side_effect = [
+            _response(200, payload={
+                'statuses': [dict(GITHUB_PAYLOAD, context=str(index)) for index in range(100)],
+                'total_count': 101
+            }),
+            _response(200, payload={'statuses': [GITHUB_PAYLOAD], 'total_count': 101}),
+        ]
+        statuses = get_combined_status(session, GITHUB_URLS['combined_status'])
+        assert len(statuses) == 101
+        assert statuses['pylint'] == GITHUB_PAYLOAD
+        assert session.request.call_args[1]['params'] == {'per_page': 100, 'page': 2}
+
+    def test_filter_unchanged_statuses(self):
+        changed = dict(GITHUB_PAYLOAD, description='Pylint score: 90%, Change from previous: -10')
+        new = dict(GITHUB_PAYLOAD, context='coverage')
+        existing = {'pylint': dict(GITHUB_PAYLOAD, id=1)}
+        assert filter_unchanged_statuses([GITHUB_PAYLOAD, new], existing) == [new]
+        assert filter_unchanged_statuses([changed], existing) == [changed]
+
+    def test_send_json(self):
+        session = MagicMock()
+        session.request.return_value.status_code = 201
+        send_json(session, 'POST', GITHUB_STATUS_URL, GITHUB_PAYLOAD)
+        assert session.request.call_args[0] == ('POST', GITHUB_STATUS_URL)
+        assert json.loads(session.request.call_args[1]['data']) == GITHUB_PAYLOAD
+
+        session.request.side_effect = MissingSchema
+        with pytest.raises(GeneralError):
+            send_json(session, 'PATCH', GITHUB_STATUS_URL, GITHUB_PAYLOAD)
+
+    def test_start_check_run(self):
+        session = MagicMock()
+        session.request.return_value = MagicMock(
+            ok=True, status_code=201, json=lambda: {'url': GITHUB_CHECK_RUN_URL})
+        assert start_check_run(
+            session, GITHUB_URLS['check_runs'], 'py-dev-hammer', CODEBUILD_SOURCE_VERSION,
+            CODE_BUILD_BUILD_URL
+        ) == GITHUB_CHECK_RUN_URL
+        assert session.request.call_args[0] == ('POST', GITHUB_URLS['check_runs'])
+        assert json.loads(session.request.call_args[1]['data'])['status'] == 'in_progress'
+
+        session.request.return_value = MagicMock(ok=False, status_code=403)
+        assert start_check_run(
+            session, GITHUB_URLS['check_runs'], 'py-dev-hammer', CODEBUILD_SOURCE_VERSION,
+            CODE_BUILD_BUILD_URL
+        ) is None
+        assert start_check_run(
+            session, None, 'py-dev-hammer', CODEBUILD_SOURCE_VERSION, CODE_BUILD_BUILD_URL) is None
+
+    def test_complete_check_run(self):
+        session = MagicMock()
+        session.request.return_value = MagicMock(ok=True, status_code=200)
+        data = create_check_run_payload([GITHUB_PAYLOAD], {}, 'py-dev-hammer', CODE_BUILD_BUILD_URL)
+        assert complete_check_run(
+            session, GITHUB_URLS['check_runs'], data, GITHUB_CHECK_RUN_URL) == 200
+        assert session.request.call_args[0] == ('PATCH', GITHUB_CHECK_RUN_URL)
+        assert 'head_sha' not in json.loads(session.request.call_args[1]['data'])
+
+        session.request.return_value = MagicMock(ok=True, status_code=201)
+        complete_check_run(
+            session, GITHUB_URLS['check_runs'], data, head_sha=CODEBUILD_SOURCE_VERSION)
+        assert session.request.call_args[0] == ('POST', GITHUB_URLS['check_runs'])
+        assert json.loads(
+            session.request.call_args[1]['data'])['head_sha'] == CODEBUILD_SOURCE_VERSION
+
+        session.request.return_value = MagicMock(ok=False, status_code=422)
+        with pytest.raises(GeneralError):
+            complete_check_run(session, GITHUB_URLS['check_runs'], data)
+
+    def test_create_check_run_payload(self):
+        data = create_check_run_payload([GITHUB_PAYLOAD], {}, 'py-dev-hammer', CODE_BUILD_BUILD_URL)
+        assert data['conclusion'] == 'success'
+        assert data['name'] == 'py-dev-hammer'
+        assert GITHUB_PAYLOAD['description'] in data['output']['summary']
+        assert 'text' not in data['output']
+
+        error_payloads = _create_parse_error_payloads(CODE_BUILD_BUILD_URL, {'coverage': 'boom'})
+        data = create_check_run_payload(
+            [GITHUB_PAYLOAD] + error_payloads, {'coverage': 'boom'}, 'py-dev-hammer',
+            CODE_BUILD_BUILD_URL
+        )
+        assert data['conclusion'] == 'failure'
+        assert data['output']['title'] == '1 of 2 checks failed: coverage'
+        assert '**coverage**: boom' in data['output']['text']
+
+        data = create_check_run_payload(
+            [GITHUB_PAYLOAD], {}, 'py-dev-hammer', CODE_BUILD_BUILD_URL,
+            {'coverage': [{'file': 'cool_project_bro/bro.py', 'rate': 50.0, 'change': -12.5}]}
+        )
+        assert '| cool_project_bro/bro.py | 50.0% | -12.5% |' in data['output']['text']
@@ -2,27 +2,48 @@
 
 # pylint: disable=missing-docstring, no-self-use, invalid-name
 
+import decimal
+import json
 import os
+import re
+import time
 from unittest.mock import patch, MagicMock
 
 import pytest
-from requests.exceptions import MissingSchema
+from botocore.exceptions import ClientError
+from requests.exceptions import HTTPError, MissingSchema
 
 from py_dev_hammer.github_status_posting import (
     entry_point, _execute, _parse_url_from_arn, _create_test_parameters_dict,
     _update_dynamo_payload, _maintain_state_in_dynamo, _create_github_payloads,
+    _parse_test_results, _create_parse_error_payloads,
     _get_change_from_previous, _parse_pytest, _parse_quality_indicator_tests,
-    _post_to_github_status,
+    _post_github_payloads, _create_github_session, _drop_unchanged_statuses,
+    _post_to_github_status, _start_check_run,
+    _update_rollup_in_dynamo, _spool_results, flush_spool, _run_test_results,
+    _get_coverage_changes, _execute_subprojects, _create_subproject_test_parameters,
+    _parse_subproject_results, _maintain_subproject_state_in_dynamo, event_handler,
+    _claim_branch_head, _select_superseded_payloads,
 )
+from py_dev_hammer.utils.registry import build_test_registry
 from tests import TEST_RESOURCES_DIR
+from tests.benchmark.generators import write_junit_xml, write_pylint_output
+from tests.benchmark.stand_ins import FakeDynamoResource, FakeGitHubServer
 from tests.data_factory import (
-    APP_CONFIG, USER_CONFIG, CODEBUILD_BUILD_ARN, CODE_BUILD_BUILD_URL, CODEBUILD_GIT_BRANCH,
-    CODEBUILD_SOURCE_VERSION, TEST_PARAM_DICT_PYTEST_PASS, TEST_PARAM_DICT_PYTEST_FAIL,
-    TEST_PARAM_DICT_PYLINT, TEST_PARAM_DICT_MISSING_FILE, GITHUB_PAYLOAD, DYNAMO_PAYLOAD,
-    BUILD_START_TIME_FIRST_RUN, DYNAMO_ITEMS,
+    APP_CONFIG, USER_CONFIG, TEST_REGISTRY, CODEBUILD_BUILD_ARN, CODE_BUILD_BUILD_URL,
+    CODEBUILD_GIT_BRANCH, CODEBUILD_SOURCE_VERSION, TEST_PARAM_DICT_PYTEST_PASS,
+    TEST_PARAM_DICT_PYTEST_FAIL, TEST_PARAM_DICT_PYLINT, TEST_PARAM_DICT_MISSING_FILE,
+    GITHUB_PAYLOAD, DYNAMO_PAYLOAD,
+    BUILD_START_TIME_FIRST_RUN, DYNAMO_ITEMS, GITHUB_STATUS_URL,
+    GITHUB_OWNER, GITHUB_TOKEN, GITHUB_URLS, GITHUB_CHECK_RUN_URL, ROLLUP_METRICS,
+    PARTITION_AND_SORT_KEY, TEST_PARAM_DICT_COBERTURA, COBERTURA_FILES,
 )
 from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.file_coverage import pack_file_coverage
 from py_dev_hammer.utils.general import get_certs
+from py_dev_hammer.utils.history_report import get_build_day
+from py_dev_hammer.utils.metrics import metrics
+from py_dev_hammer.utils.spool import Spool
 
 MODULE_UNDER_TEST = 'py_dev_hammer.github_status_posting'
 
@@ -31,6 +52,7 @@ class TestGithubStatusPosting(object):
 
     @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
     @patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), USER_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
     @patch('{}._create_test_parameters_dict'.format(MODULE_UNDER_TEST))
     @patch(
         '{}._parse_url_from_arn'.format(MODULE_UNDER_TEST),
@@ -39,15 +61,117 @@ class TestGithubStatusPosting(object):
     @patch('{}._execute'.format(MODULE_UNDER_TEST))
     @patch('logging.Logger.error')
     def test_entry_point(self, mock_logger, mock_execute, mock_parameters_dict):
-        entry_point()
+        entry_point([])
         assert mock_parameters_dict.called
         assert os.environ['REQUESTS_CA_BUNDLE'] == get_certs()
         assert mock_execute.called
 
         mock_execute.side_effect = GeneralError()
-        entry_point()
+        entry_point([])
         assert "GeneralError in GitHub Status Posting" in str(mock_logger.mock_calls)
 
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    @patch(
+        '{}._parse_url_from_arn'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=CODE_BUILD_BUILD_URL)
+    )
+    @patch('{}._execute'.format(MODULE_UNDER_TEST))
+    @patch('{}._execute_subprojects'.format(MODULE_UNDER_TEST))
+    @patch('logging.Logger.error')
+    def test_entry_point_subprojects(self, mock_logger, mock_subprojects, mock_execute):
+        user_config = dict(USER_CONFIG, subprojects=[{'name': 'api'}, {'name': 'worker'}])
+        with patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), user_config):
+            entry_point([])
+            test_parameters = mock_subprojects.call_args[0][1]
+            assert len(test_parameters) == 2 * len(TEST_REGISTRY)
+            assert not mock_execute.called
+
+            mock_subprojects.reset_mock()
+            entry_point([], run_tools=True)
+            assert not mock_subprojects.called
+            assert "isn't supported with subprojects" in str(mock_logger.mock_calls)
+
+    @patch.dict(os.environ, {'CODEBUILD_GIT_BRANCH': 'master'}, clear=True)
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), USER_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    @patch('{}._execute'.format(MODULE_UNDER_TEST))
+    def test_event_handler(self, mock_execute, tmp_path):
+        event = {
+            'build_arn': CODEBUILD_BUILD_ARN,
+            'git_branch': CODEBUILD_GIT_BRANCH,
+            'source_version': CODEBUILD_SOURCE_VERSION,
+            'results_dir': str(tmp_path),
+        }
+
+        def execute(user_config, test_parameters, target_url):
+            assert os.environ['CODEBUILD_GIT_BRANCH'] == CODEBUILD_GIT_BRANCH
+            assert user_config['parsing'] == {'executor': 'thread'}
+            assert test_parameters[0]['input_file'].startswith(
+                os.path.join(str(tmp_path), 'build', 'static_analysis'))
+            assert target_url == CODE_BUILD_BUILD_URL
+
+        mock_execute.side_effect = execute
+        assert event_handler(event) == {
+            'build_arn': CODEBUILD_BUILD_ARN, 'test_types': len(TEST_REGISTRY)}
+        assert os.environ['CODEBUILD_GIT_BRANCH'] == 'master'
+        assert 'CODEBUILD_BUILD_ARN' not in os.environ
+
+        with pytest.raises(GeneralError) as gen_err:
+            event_handler(dict(event, source_version=None))
+        assert "['source_version']" in str(gen_err.value)
+        with pytest.raises(GeneralError):
+            event_handler([event])
+
+    @patch.dict(os.environ, {})
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), USER_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    @patch('{}._execute'.format(MODULE_UNDER_TEST))
+    @patch('{}.get_boto_client'.format(MODULE_UNDER_TEST))
+    def test_event_handler_s3(self, mock_client, mock_execute):
+        downloaded = {}
+
+        def download_file(bucket, key, input_file):
+            if key.endswith('coverage.xml'):
+                raise ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+            downloaded[key] = os.path.isdir(os.path.dirname(input_file))
+
+        mock_client.return_value.download_file.side_effect = download_file
+        event_handler({
+            'build_arn': CODEBUILD_BUILD_ARN,
+            'git_branch': CODEBUILD_GIT_BRANCH,
+            'source_version': CODEBUILD_SOURCE_VERSION,
+            's3_bucket': 'build-results',
+            's3_prefix': '/builds/4/',
+        })
+        assert mock_execute.called
+        assert downloaded == {
+            f'builds/4/build/static_analysis/{TEST_REGISTRY[test_type].input_file}': True
+            for test_type in TEST_REGISTRY if test_type != 'coverage'
+        }
+
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.USER_CONFIG'.format(MODULE_UNDER_TEST), USER_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    @patch(
+        '{}._parse_url_from_arn'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=CODE_BUILD_BUILD_URL)
+    )
+    @patch('{}._execute'.format(MODULE_UNDER_TEST), new=MagicMock())
+    def test_entry_point_metrics_and_profile(self, tmp_path):
+        report_file = str(tmp_path / 'metrics.json')
+        entry_point(['--metrics-report', report_file])
+        with open(report_file) as report_str:
+            assert 'stage.config' in json.load(report_str)['summary']
+        assert not metrics.enabled
+
+        profile_dir = str(tmp_path / 'profile')
+        entry_point(['--profile', profile_dir])
+        assert sorted(os.listdir(profile_dir)) == [
+            'pydevhammer-memory.txt', 'pydevhammer-metrics.json', 'pydevhammer.pstats']
+
     @patch('{}._parse_pytest'.format(MODULE_UNDER_TEST), new=MagicMock(return_value=('success', 1)))
     @patch(
         '{}._update_dynamo_payload'.format(MODULE_UNDER_TEST),
@@ -59,30 +183,323 @@ class TestGithubStatusPosting(object):
     )
     @patch(
         '{}._maintain_state_in_dynamo'.format(MODULE_UNDER_TEST),
-        new=MagicMock(return_value=DYNAMO_ITEMS)
+        new=MagicMock(return_value=(DYNAMO_ITEMS, None))
     )
     @patch(
         '{}._create_github_payloads'.format(MODULE_UNDER_TEST),
         new=MagicMock(return_value=[GITHUB_PAYLOAD])
     )
-    @patch('{}._post_to_github_status'.format(MODULE_UNDER_TEST))
+    @patch(
+        '{}._claim_branch_head'.format(MODULE_UNDER_TEST), new=MagicMock(return_value=True))
+    @patch('{}._post_github_payloads'.format(MODULE_UNDER_TEST))
     @pytest.mark.parametrize('param_dict, url', [
         (TEST_PARAM_DICT_PYTEST_PASS, CODE_BUILD_BUILD_URL),
         (TEST_PARAM_DICT_PYLINT, CODE_BUILD_BUILD_URL),
     ])
     def test_execute(self, mock_github, param_dict, url):
-        _execute(
-            USER_CONFIG, [param_dict], url, APP_CONFIG['tests_to_run']['dynamic'],
-            APP_CONFIG['tests_to_run']['static']
-        )
+        _execute(USER_CONFIG, [param_dict], url)
         assert mock_github.called
 
+    @patch('{}._parse_test_results'.format(MODULE_UNDER_TEST))
+    @patch(
+        '{}._maintain_state_in_dynamo'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=(DYNAMO_ITEMS, None))
+    )
+    @patch(
+        '{}._create_github_payloads'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=[GITHUB_PAYLOAD])
+    )
+    @patch('{}._post_github_payloads'.format(MODULE_UNDER_TEST))
+    @patch(
+        '{}._start_check_run'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=GITHUB_CHECK_RUN_URL)
+    )
+    @patch(
+        '{}._claim_branch_head'.format(MODULE_UNDER_TEST), new=MagicMock(return_value=True))
+    @patch(
+        '{}._create_github_session'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=(MagicMock(), GITHUB_URLS))
+    )
+    @patch('{}.complete_check_run'.format(MODULE_UNDER_TEST))
+    def test_execute_with_check_run(self, mock_complete, mock_statuses, mock_parse):
+        mock_parse.return_value = ('success', DYNAMO_PAYLOAD, {}, {})
+        user_config = dict(USER_CONFIG, github=dict(USER_CONFIG['github'], reporter='checks'))
+        _execute(user_config, [TEST_PARAM_DICT_PYLINT], CODE_BUILD_BUILD_URL)
+        assert not mock_statuses.called
+        assert mock_complete.call_args[0][1] == GITHUB_URLS['check_runs']
+        assert mock_complete.call_args[0][3] == GITHUB_CHECK_RUN_URL
+
+    @patch('{}._parse_subproject_results'.format(MODULE_UNDER_TEST))
+    @patch('{}._maintain_subproject_state_in_dynamo'.format(MODULE_UNDER_TEST))
+    @patch('{}._post_github_payloads'.format(MODULE_UNDER_TEST))
+    @patch(
+        '{}._claim_branch_head'.format(MODULE_UNDER_TEST), new=MagicMock(return_value=True))
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    def test_execute_subprojects(self, mock_post, mock_dynamo, mock_parse):
+        mock_parse.return_value = {
+            'api': ('failure', {'pytest': decimal.Decimal('50')}, {}, {}),
+            'worker': ('failure', DYNAMO_PAYLOAD, {'pytest': 'boom'}, {}),
+        }
+        mock_dynamo.return_value = {'api': (DYNAMO_ITEMS, None), 'worker': (DYNAMO_ITEMS, None)}
+        _execute_subprojects(USER_CONFIG, [], CODE_BUILD_BUILD_URL)
+
+        github_payloads = mock_post.call_args[0][0]
+        assert [payload['context'] for payload in github_payloads] == [
+            'api/pytest', 'worker/pylint', 'worker/pytest']
+        assert [payload['state'] for payload in github_payloads] == [
+            'failure', 'success', 'error']
+        assert mock_post.call_count == 1
+
+    @patch.dict(os.environ, {})
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    def test_create_subproject_test_parameters(self):
+        test_parameters = _create_subproject_test_parameters([
+            {'name': 'api', 'path': 'packages/api'},
+            {'name': 'worker', 'tests_to_run': ['pylint']},
+        ])
+        assert [
+            (test_parameter['subproject'], test_parameter['test_type'])
+            for test_parameter in test_parameters
+        ] == [('api', test_type) for test_type in TEST_REGISTRY] + [('worker', 'pylint')]
+        assert test_parameters[0]['input_file'].startswith(
+            os.path.join('packages', 'api', 'build', 'static_analysis'))
+        assert test_parameters[-1]['input_file'] == os.path.join(
+            'worker', 'build', 'static_analysis', 'pylint.static')
+
+        with pytest.raises(GeneralError):
+            _create_subproject_test_parameters([{'name': 'api'}, {'name': 'api'}])
+        with pytest.raises(GeneralError):
+            _create_subproject_test_parameters([{'name': 'api', 'tests_to_run': ['flake8']}])
+
+    def test_parse_subproject_results(self):
+        missing_pylint = dict(
+            TEST_PARAM_DICT_MISSING_FILE, test_type='pylint', dynamic=False, subproject='worker')
+        subproject_results = _parse_subproject_results(
+            dict(USER_CONFIG, parsing={'executor': 'thread'}), [
+                dict(TEST_PARAM_DICT_PYTEST_PASS, subproject='api'),
+                dict(TEST_PARAM_DICT_PYLINT, subproject='worker'),
+                dict(TEST_PARAM_DICT_PYTEST_FAIL, subproject='worker'),
+                missing_pylint,
+            ]
+        )
+        assert list(subproject_results) == ['api', 'worker']
+        assert subproject_results['api'][:3] == ('success', {'pytest': decimal.Decimal('100')}, {})
+        pytest_state, dynamo_payload, parse_errors, _ = subproject_results['worker']
+        assert pytest_state == 'failure'
+        assert list(dynamo_payload) == ['pylint', 'pytest']
+        assert list(parse_errors) == ['pylint']
+
+    @patch('{}._parse_test_results'.format(MODULE_UNDER_TEST))
+    @patch('{}._start_check_run'.format(MODULE_UNDER_TEST))
+    @patch('{}._report_results'.format(MODULE_UNDER_TEST))
+    @patch('{}._spool_results'.format(MODULE_UNDER_TEST))
+    def test_execute_spooled(self, mock_spool, mock_report, mock_start, mock_parse):
+        mock_parse.return_value = ('success', DYNAMO_PAYLOAD, {}, {})
+        user_config = dict(
+            USER_CONFIG, github=dict(USER_CONFIG['github'], reporter='checks'),
+            reporting={'mode': 'spool'}
+        )
+        _execute(user_config, [TEST_PARAM_DICT_PYLINT], CODE_BUILD_BUILD_URL)
+        assert mock_spool.called
+        assert not mock_report.called
+        assert not mock_start.called
+
+    @patch.dict(os.environ, {
+        'CODEBUILD_BUILD_ARN': CODEBUILD_BUILD_ARN,
+        'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH,
+        'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION,
+    })
+    @patch('{}._start_background_flush'.format(MODULE_UNDER_TEST))
+    def test_spool_results(self, mock_background, tmp_path):
+        user_config = dict(USER_CONFIG, reporting={'spool_dir': str(tmp_path)})
+        for build_start_time in (BUILD_START_TIME_FIRST_RUN, BUILD_START_TIME_FIRST_RUN + 1):
+            _spool_results(
+                user_config, CODE_BUILD_BUILD_URL, build_start_time, 'success', DYNAMO_PAYLOAD, {})
+        entries = [entry for _, entry in Spool(str(tmp_path)).pending()]
+        assert entries[0]['dynamo_payload'] == {'pylint': '100.0'}
+        assert entries[0]['environment']['CODEBUILD_SOURCE_VERSION'] == CODEBUILD_SOURCE_VERSION
+        assert entries[0]['id'] == entries[1]['id']
+        assert mock_background.call_count == 2
+
+    @patch.dict(os.environ, {'CODEBUILD_SOURCE_VERSION': 'later-commit'})
+    @patch('{}.time.sleep'.format(MODULE_UNDER_TEST), new=MagicMock())
+    @patch('{}._report_results'.format(MODULE_UNDER_TEST))
+    def test_flush_spool(self, mock_report, tmp_path):
+        spool = Spool(str(tmp_path))
+        environment = {
+            'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH,
+            'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION,
+        }
+        for entry_id in ('first', 'first', 'second', 'third'):
+            spool.append({
+                'id': entry_id,
+                'build_start_time': BUILD_START_TIME_FIRST_RUN,
+                'target_url': CODE_BUILD_BUILD_URL,
+                'pytest_state': 'success',
+                'dynamo_payload': {'pylint': '100.0'},
+                'parse_errors': {},
+                'environment': environment,
+            })
+        commit_shas = []
+        mock_report.side_effect = lambda *args, **kwargs: commit_shas.append(
+            os.environ['CODEBUILD_SOURCE_VERSION'])
+        user_config = dict(USER_CONFIG, reporting={'spool_dir': str(tmp_path), 'max_attempts': 2})
+
+        assert flush_spool(user_config) == 3
+        assert commit_shas == [CODEBUILD_SOURCE_VERSION] * 3
+        assert os.environ['CODEBUILD_SOURCE_VERSION'] == 'later-commit'
+        assert mock_report.call_args[0][4] == DYNAMO_PAYLOAD
+        assert not os.path.exists(spool.journal_file)
+
+        spool.append({'id': 'second', 'environment': {}})
+        spool.append(dict(
+            id='fourth', build_start_time=BUILD_START_TIME_FIRST_RUN,
+            target_url=CODE_BUILD_BUILD_URL, pytest_state='success',
+            dynamo_payload={'pylint': '90.0'}, parse_errors={}, environment=environment
+        ))
+        mock_report.side_effect = GeneralError("GitHub is down")
+        with pytest.raises(GeneralError):
+            flush_spool(user_config)
+        assert mock_report.call_count == 5
+        assert [entry['id'] for _, entry in spool.pending()] == ['fourth']
+
+        mock_report.side_effect = None
+        assert flush_spool(user_config) == 1
+        with spool.lock():
+            assert flush_spool(user_config) == 0
+
+    @pytest.mark.parametrize('executor', ['process', 'thread'])
+    def test_parse_test_results(self, executor):
+        missing_pylint = dict(TEST_PARAM_DICT_MISSING_FILE, test_type='pylint', dynamic=False)
+        pytest_state, dynamo_payload, parse_errors, _ = _parse_test_results(
+            dict(USER_CONFIG, parsing={'executor': executor}),
+            [TEST_PARAM_DICT_PYTEST_FAIL, missing_pylint]
+        )
+        assert pytest_state == 'failure'
+        assert dynamo_payload == {'pytest': decimal.Decimal('87.5')}
+        assert list(parse_errors) == ['pylint']
+
+        pytest_state, dynamo_payload, parse_errors, _ = _parse_test_results(
+            dict(USER_CONFIG, parsing={'executor': executor}),
+            [TEST_PARAM_DICT_PYLINT, TEST_PARAM_DICT_PYTEST_PASS]
+        )
+        assert pytest_state == 'success'
+        assert list(dynamo_payload) == ['pylint', 'pytest']
+        assert not parse_errors
+
+    def test_parse_test_results_cobertura(self):
+        _, dynamo_payload, parse_errors, file_coverage = _parse_test_results(
+            dict(USER_CONFIG, parsing={'executor': 'thread'}), [TEST_PARAM_DICT_COBERTURA])
+        assert round(dynamo_payload['coverage'], 2) == decimal.Decimal('53.85')
+        assert file_coverage == {'coverage': COBERTURA_FILES}
+        assert not parse_errors
+
+    def test_run_test_results(self, tmp_path):
+        results_dir = str(tmp_path)
+        pytest_parameter = dict(
+            TEST_PARAM_DICT_PYTEST_PASS, input_file=os.path.join(results_dir, 'pytest.xml'),
+            command='cp {} {{input_file}}; echo "TOTAL  120  30  75%"'.format(
+                TEST_PARAM_DICT_PYTEST_PASS['input_file']),
+            stdout_file=os.path.join(results_dir, 'pytest.static')
+        )
+        coverage_parameter = dict(
+            TEST_PARAM_DICT_PYLINT, test_type='coverage', multiplier=1, command=None,
+            regex_pattern=re.compile(r'.*?(\d+)%'), stdout_file=None,
+            input_file=os.path.join(results_dir, 'pytest.static')
+        )
+        pylint_parameter = dict(
+            TEST_PARAM_DICT_PYLINT, command='echo "rated at 9.50/10"; exit 16',
+            input_file=os.path.join(results_dir, 'pylint.static'),
+            stdout_file=os.path.join(results_dir, 'pylint.static')
+        )
+        line_counter_parameter = dict(
+            TEST_PARAM_DICT_PYLINT, test_type='line_counter', multiplier=1, command=None,
+            stdout_file=None
+        )
+        missing_parameter = dict(
+            TEST_PARAM_DICT_PYLINT, test_type='radon_cc', command='canny_find_it_captain',
+            stdout_file=os.path.join(results_dir, 'radon_cc.static')
+        )
+
+        pytest_state, dynamo_payload, parse_errors, _ = _run_test_results(USER_CONFIG, [
+            pytest_parameter, coverage_parameter, pylint_parameter, line_counter_parameter,
+            missing_parameter,
+        ])
+        assert pytest_state == 'success'
+        assert dynamo_payload == {
+            'pytest': decimal.Decimal('100'),
+            'coverage': decimal.Decimal('75.0'),
+            'pylint': decimal.Decimal('95.0'),
+            'line_counter': decimal.Decimal('10.0'),
+        }
+        assert list(parse_errors) == ['radon_cc']
+        with open(os.path.join(results_dir, 'pylint.static')) as pylint_static:
+            assert pylint_static.read() == 'rated at 9.50/10\n'
+
+    def test_run_test_results_incremental(self, tmp_path):
+        (tmp_path / 'package').mkdir()
+        for name, lines in (('one', 3), ('two', 5)):
+            (tmp_path / 'package' / f'{name}.py').write_text('x = 1\n\n' * lines)
+        runs_file = tmp_path / 'runs.log'
+        line_counter_parameter = dict(
+            TEST_PARAM_DICT_PYLINT, test_type='line_counter', multiplier=1,
+            command='canny_find_it_captain', stdout_file=None,
+            incremental=dict(
+                TEST_REGISTRY['line_counter'].incremental,
+                command=f'echo {{files}} >> {runs_file}; ' +
+                TEST_REGISTRY['line_counter'].incremental['command'],
+                paths=[str(tmp_path / 'package')]
+            )
+        )
+        user_config = dict(
+            USER_CONFIG, running={'incremental': True, 'cache_dir': str(tmp_path / 'cache')})
+
+        _, dynamo_payload, parse_errors, _ = _run_test_results(
+            user_config, [line_counter_parameter])
+        assert dynamo_payload == {'line_counter': decimal.Decimal('8.0')}
+        assert not parse_errors
+
+        (tmp_path / 'package' / 'two.py').write_text('x = 1\n')
+        _, dynamo_payload, _, _ = _run_test_results(user_config, [line_counter_parameter])
+        assert dynamo_payload == {'line_counter': decimal.Decimal('4.0')}
+        runs = runs_file.read_text().splitlines()
+        assert len(runs) == 2
+        assert runs[1] == str(tmp_path / 'package' / 'two.py')
+
+    def test_run_test_results_incremental_failure(self, tmp_path):
+        (tmp_path / 'package').mkdir()
+        (tmp_path / 'package' / 'one.py').write_text('x = 1\n')
+        line_counter_parameter = dict(
+            TEST_PARAM_DICT_PYLINT, test_type='line_counter', multiplier=1,
+            command='canny_find_it_captain', stdout_file=None,
+            incremental=dict(
+                TEST_REGISTRY['line_counter'].incremental,
+                command=TEST_REGISTRY['line_counter'].incremental['command'] + '; exit 2',
+                paths=[str(tmp_path / 'package')]
+            )
+        )
+        user_config = dict(
+            USER_CONFIG, running={'incremental': True, 'cache_dir': str(tmp_path / 'cache')})
+
+        _, dynamo_payload, parse_errors, _ = _run_test_results(
+            user_config, [line_counter_parameter])
+        assert dynamo_payload == {}
+        assert 'exited with status 2' in parse_errors['line_counter']
+        assert not (tmp_path / 'cache').exists()
+
+    def test_create_parse_error_payloads(self):
+        payloads = _create_parse_error_payloads(CODE_BUILD_BUILD_URL, {'pylint': 'x' * 200})
+        assert payloads[0]['state'] == 'error'
+        assert payloads[0]['context'] == 'pylint'
+        assert len(payloads[0]['description']) == 140
+
     @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
     @patch.dict(os.environ, {'CODEBUILD_BUILD_ARN': CODEBUILD_BUILD_ARN})
     def test_parse_url_from_arn(self):
         assert _parse_url_from_arn(USER_CONFIG) == CODE_BUILD_BUILD_URL
 
-    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
     def test_create_test_parameters_dict(self):
         for key, value in _create_test_parameters_dict('pylint', TEST_RESOURCES_DIR).items():
             assert TEST_PARAM_DICT_PYLINT.get(key) == value
@@ -93,21 +510,259 @@ class TestGithubStatusPosting(object):
     @patch.dict(os.environ, {'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH})
     @patch('{}.connect_to_aws_resource'.format(MODULE_UNDER_TEST), new=MagicMock())
     @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
-    @patch('{}.put_with_partition_and_sort_key'.format(MODULE_UNDER_TEST), new=MagicMock())
-    @patch('{}.get_items_by_partition_key'.format(MODULE_UNDER_TEST))
-    def test_maintain_state_in_dynamo(self, mock_items_partition_key):
-        _maintain_state_in_dynamo(USER_CONFIG, BUILD_START_TIME_FIRST_RUN, DYNAMO_PAYLOAD)
-        assert mock_items_partition_key.called
+    @patch(
+        '{}.put_with_partition_and_sort_key'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=DYNAMO_ITEMS[0])
+    )
+    @patch('{}._update_rollup_in_dynamo'.format(MODULE_UNDER_TEST))
+    @patch('{}.get_latest_items_by_partition_key'.format(MODULE_UNDER_TEST))
+    def test_maintain_state_in_dynamo(self, mock_latest_items, mock_rollup):
+        mock_latest_items.return_value = DYNAMO_ITEMS[1:]
+        mock_rollup.return_value = ({}, ROLLUP_METRICS)
+        assert _maintain_state_in_dynamo(
+            USER_CONFIG, BUILD_START_TIME_FIRST_RUN, DYNAMO_PAYLOAD) == (
+                DYNAMO_ITEMS, ROLLUP_METRICS)
+        _, _, partition_and_sort_key, limit = mock_latest_items.call_args[0]
+        assert partition_and_sort_key['sort_key_value'] == BUILD_START_TIME_FIRST_RUN
+        assert limit == 1
+        assert mock_latest_items.call_args[1]['attributes'] == list(DYNAMO_PAYLOAD.keys())
 
+        mock_latest_items.reset_mock()
+        mock_rollup.return_value = (ROLLUP_METRICS, ROLLUP_METRICS)
+        dynamo_items, _ = _maintain_state_in_dynamo(
+            USER_CONFIG, BUILD_START_TIME_FIRST_RUN, DYNAMO_PAYLOAD)
+        assert dynamo_items[1] == {'pylint': decimal.Decimal('90')}
+        assert not mock_latest_items.called
+
+        coverage_data = pack_file_coverage(COBERTURA_FILES)
+        mock_latest_items.return_value = [{'coverage#files': coverage_data}]
+        with patch('{}.put_with_partition_and_sort_key'.format(MODULE_UNDER_TEST)) as mock_put:
+            _maintain_state_in_dynamo(
+                USER_CONFIG, BUILD_START_TIME_FIRST_RUN, DYNAMO_PAYLOAD,
+                {'coverage': COBERTURA_FILES}
+            )
+            assert mock_put.call_args[0][-1]['coverage#files'] == coverage_data
+        assert mock_latest_items.call_args[1]['attributes'] == ['coverage#files']
+
+        mock_latest_items.reset_mock()
+        mock_rollup.reset_mock()
+        assert _maintain_state_in_dynamo(
+            USER_CONFIG, BUILD_START_TIME_FIRST_RUN, DYNAMO_PAYLOAD, superseded=True) == (
+                DYNAMO_ITEMS[:1], None)
+        assert not mock_latest_items.called
+        assert not mock_rollup.called
+
+    @patch.dict(os.environ, {
+        'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH,
+        'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION,
+    })
+    @patch('{}.connect_to_aws_resource'.format(MODULE_UNDER_TEST), new=MagicMock())
+    @patch(
+        '{}.APP_CONFIG'.format(MODULE_UNDER_TEST),
+        dict(APP_CONFIG, dynamo=dict(APP_CONFIG['dynamo'], rollup_window=None))
+    )
+    @patch('{}.put_with_partition_and_sort_key'.format(MODULE_UNDER_TEST))
+    @patch('{}.get_latest_items_by_partition_key'.format(MODULE_UNDER_TEST))
+    def test_maintain_state_in_dynamo_rerun(self, mock_latest_items, mock_put):
+        mock_put.return_value = DYNAMO_ITEMS[0]
+        mock_latest_items.return_value = DYNAMO_ITEMS[1:]
+        assert _maintain_state_in_dynamo(
+            USER_CONFIG, BUILD_START_TIME_FIRST_RUN, DYNAMO_PAYLOAD) == (DYNAMO_ITEMS, None)
+        assert mock_put.call_args[0][-1]['commit_sha'] == CODEBUILD_SOURCE_VERSION
+        condition = mock_latest_items.call_args[1]['filter_condition'].get_expression()
+        assert condition['operator'] == 'OR'
+        not_exists, other_commit = condition['values']
+        assert not_exists.get_expression()['operator'] == 'attribute_not_exists'
+        assert other_commit.get_expression()['operator'] == '<>'
+        assert other_commit.get_expression()['values'][1] == CODEBUILD_SOURCE_VERSION
+
+    @patch.dict(os.environ, {'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH})
+    @patch('{}.connect_to_aws_resource'.format(MODULE_UNDER_TEST), new=MagicMock())
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.batch_put_with_partition_and_sort_key'.format(MODULE_UNDER_TEST))
+    @patch('{}.batch_get_with_partition_and_sort_key'.format(MODULE_UNDER_TEST))
+    @patch('{}._get_previous_state'.format(MODULE_UNDER_TEST))
+    def test_maintain_subproject_state_in_dynamo(self, mock_previous, mock_get, mock_put):
+        mock_put.side_effect = lambda resource, table_name, keys_and_data: [
+            dict(data, branch_name=key['partition_key_value']) for key, data in keys_and_data]
+        mock_get.return_value = [None, {'metrics': ROLLUP_METRICS}]
+        mock_previous.return_value = (DYNAMO_ITEMS[1:], ROLLUP_METRICS)
+        subproject_state = _maintain_subproject_state_in_dynamo(
+            USER_CONFIG, BUILD_START_TIME_FIRST_RUN, {
+                'api': ('success', DYNAMO_PAYLOAD, {}, {'coverage': COBERTURA_FILES}),
+                'worker': ('success', DYNAMO_PAYLOAD, {}, {}),
+            }
+        )
+
+        assert mock_put.call_count == 1
+        (api_key, api_data), (worker_key, _) = mock_put.call_args[0][2]
+        assert api_key['partition_key_value'] == f'api#{CODEBUILD_GIT_BRANCH}'
+        assert worker_key['partition_key_value'] == f'worker#{CODEBUILD_GIT_BRANCH}'
+        assert 'coverage#files' in api_data
+        assert api_data['build_day'] == get_build_day(BUILD_START_TIME_FIRST_RUN)
+        assert [key['partition_key_value'] for key in mock_get.call_args[0][2]] == [
+            f'api#{CODEBUILD_GIT_BRANCH}#rollup', f'worker#{CODEBUILD_GIT_BRANCH}#rollup']
+        assert sorted(call[0][-1] for call in mock_previous.call_args_list if call[0][-1]) == [
+            {'metrics': ROLLUP_METRICS}]
+        dynamo_items, rollup_metrics = subproject_state['worker']
+        assert dynamo_items[0]['branch_name'] == f'worker#{CODEBUILD_GIT_BRANCH}'
+        assert dynamo_items[1:] == DYNAMO_ITEMS[1:]
+        assert rollup_metrics == ROLLUP_METRICS
+
+        mock_get.reset_mock()
+        subproject_state = _maintain_subproject_state_in_dynamo(
+            USER_CONFIG, BUILD_START_TIME_FIRST_RUN,
+            {'api': ('success', DYNAMO_PAYLOAD, {}, {})}, superseded=True
+        )
+        assert subproject_state['api'][0][0]['branch_name'] == f'api#{CODEBUILD_GIT_BRANCH}'
+        assert subproject_state['api'][1] is None
+        assert not mock_get.called
+
+    @patch.dict(os.environ, {'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION})
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    @patch('{}.get_with_partition_and_sort_key'.format(MODULE_UNDER_TEST))
+    @patch('{}.update_if_version_matches'.format(MODULE_UNDER_TEST))
+    def test_update_rollup_in_dynamo(self, mock_update, mock_get):
+        mock_get.return_value = {'metrics': ROLLUP_METRICS, 'build_count': 3}
+        mock_update.side_effect = [False, True]
+        previous_metrics, rollup_metrics = _update_rollup_in_dynamo(
+            MagicMock(), 'build-status', PARTITION_AND_SORT_KEY, DYNAMO_PAYLOAD, 20)
+        assert previous_metrics == ROLLUP_METRICS
+        assert rollup_metrics['pylint']['window'][-1] == DYNAMO_PAYLOAD['pylint']
+        assert mock_update.call_count == 2
+        _, _, rollup_key, rollup_data, version_name, version = mock_update.call_args[0]
+        assert rollup_key['partition_key_value'] == f'{CODEBUILD_GIT_BRANCH}#rollup'
+        assert rollup_data['commit_sha'] == CODEBUILD_SOURCE_VERSION
+        assert (version_name, version) == ('build_count', 3)
+
+        mock_get.return_value = dict(rollup_data, build_count=4)
+        mock_update.side_effect = None
+        mock_update.return_value = True
+        assert _update_rollup_in_dynamo(
+            MagicMock(), 'build-status', PARTITION_AND_SORT_KEY, DYNAMO_PAYLOAD, 20) == (
+                ROLLUP_METRICS, rollup_metrics)
+
+        mock_update.return_value = False
+        assert _update_rollup_in_dynamo(
+            MagicMock(), 'build-status', PARTITION_AND_SORT_KEY, DYNAMO_PAYLOAD, 20)[1] is None
+
+        mock_update.reset_mock()
+        mock_get.return_value = dict(
+            rollup_data, head_started_at=rollup_data['head_started_at'] + 1)
+        assert _update_rollup_in_dynamo(
+            MagicMock(), 'build-status', PARTITION_AND_SORT_KEY, DYNAMO_PAYLOAD, 20) == ({}, None)
+        assert not mock_update.called
+
+    @patch.dict(os.environ, {
+        'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH,
+        'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION,
+        'CODEBUILD_START_TIME': '1550000000123',
+    })
+    @patch('{}.connect_to_aws_resource'.format(MODULE_UNDER_TEST), new=MagicMock())
     @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    @patch('{}.update_if_not_newer'.format(MODULE_UNDER_TEST))
+    def test_claim_branch_head(self, mock_update):
+        mock_update.return_value = True
+        assert _claim_branch_head(USER_CONFIG, BUILD_START_TIME_FIRST_RUN)
+        _, _, head_key, head_data, order_name, order_value = mock_update.call_args[0]
+        assert head_key['partition_key_value'] == f'{CODEBUILD_GIT_BRANCH}#rollup'
+        assert head_data == {'head_commit_sha': CODEBUILD_SOURCE_VERSION}
+        assert (order_name, order_value) == ('head_started_at', 1550000000123)
+
+        mock_update.return_value = False
+        with patch.dict(os.environ, {'CODEBUILD_START_TIME': ''}):
+            assert not _claim_branch_head(USER_CONFIG, BUILD_START_TIME_FIRST_RUN)
+        assert mock_update.call_args[0][-1] == BUILD_START_TIME_FIRST_RUN * 1000
+
+    @patch.dict(os.environ, {'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH})
+    @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
+    def test_claim_branch_head_retry(self):
+        resource = FakeDynamoResource(
+            APP_CONFIG['dynamo']['partition_key_name'], APP_CONFIG['dynamo']['sort_key_name'])
+
+        def claim(commit_sha, started_at):
+            with patch.dict(os.environ, {
+                    'CODEBUILD_SOURCE_VERSION': commit_sha, 'CODEBUILD_START_TIME': started_at}), \
+                    patch(f'{MODULE_UNDER_TEST}.connect_to_aws_resource', return_value=resource):
+                claimed = _claim_branch_head(USER_CONFIG, BUILD_START_TIME_FIRST_RUN)
+            head, = resource.Table(APP_CONFIG['dynamo']['table_name']).partitions[
+                f'{CODEBUILD_GIT_BRANCH}#rollup']
+            return claimed, head['head_commit_sha']
+
+        assert claim('new', '2000') == (True, 'new')
+        assert claim('old', '1000') == (False, 'new')
+        # A retry of the older commit's build starts later, so it takes the head back
+        assert claim('old', '3000') == (True, 'old')
+        assert claim('new', '4000') == (True, 'new')
+
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
+    def test_select_superseded_payloads(self):
+        github_payloads = [
+            dict(GITHUB_PAYLOAD, context='pytest'), GITHUB_PAYLOAD,
+            dict(GITHUB_PAYLOAD, context='unregistered'),
+        ]
+        assert _select_superseded_payloads(USER_CONFIG, github_payloads) == github_payloads[:1]
+
+        def with_github(**github):
+            return dict(USER_CONFIG, github=dict(USER_CONFIG['github'], **github))
+
+        assert _select_superseded_payloads(with_github(superseded='skip'), github_payloads) == []
+        assert _select_superseded_payloads(
+            with_github(superseded='all'), github_payloads) == github_payloads
+        assert _select_superseded_payloads(
+            with_github(reporter='checks', superseded='skip'), github_payloads) == github_payloads
+
+    @patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), TEST_REGISTRY)
     @patch(
         '{}._get_change_from_previous'.format(MODULE_UNDER_TEST), new=MagicMock(return_value=-10))
     def test_create_github_payloads(self):
         assert _create_github_payloads(
             'success', CODE_BUILD_BUILD_URL, DYNAMO_PAYLOAD, DYNAMO_ITEMS) == [GITHUB_PAYLOAD]
 
+        github_payload, = _create_github_payloads(
+            'success', CODE_BUILD_BUILD_URL, DYNAMO_PAYLOAD, DYNAMO_ITEMS, ROLLUP_METRICS)
+        assert github_payload['description'] == (
+            'Pylint score: 100%, Change from previous: -10, Mean of last 2: 95.0%, Best: 100%, '
+            'Regression streak: 1'
+        )
+
+        github_payload, = _create_github_payloads(
+            'success', CODE_BUILD_BUILD_URL, DYNAMO_PAYLOAD, DYNAMO_ITEMS,
+            coverage_changes={'pylint': [
+                {'file': 'cool_project_bro/bro.py', 'rate': 50.0, 'change': -12.5}]}
+        )
+        assert github_payload['description'].endswith(
+            ', Most changed: cool_project_bro/bro.py -12.5%')
+
+        github_payload, = _create_github_payloads(
+            'success', CODE_BUILD_BUILD_URL, DYNAMO_PAYLOAD, DYNAMO_ITEMS, ROLLUP_METRICS,
+            coverage_changes={'pylint': [
+                {'file': 'cool_project_bro/bro.py', 'rate': 50.0, 'change': -12.5}]}
+        )
+        assert github_payload['description'].endswith('Regression streak: 1')
+
+        github_payload, = _create_github_payloads(
+            'success', CODE_BUILD_BUILD_URL, DYNAMO_PAYLOAD, DYNAMO_ITEMS[:1], superseded=True)
+        assert github_payload['description'] == (
+            'Pylint score: 100%, Change from previous: N/A - superseded by a later build')
+
+    def test_get_coverage_changes(self):
+        previous_files = dict(COBERTURA_FILES, **{'cool_project_bro/__init__.py': (4, 4, 0, 0)})
+        dynamo_items = [
+            dict(DYNAMO_ITEMS[0], **{'coverage#files': pack_file_coverage(COBERTURA_FILES)}),
+            dict(DYNAMO_ITEMS[1], **{'coverage#files': pack_file_coverage(previous_files)}),
+        ]
+        assert _get_coverage_changes(dynamo_items) == {'coverage': [
+            {'file': 'cool_project_bro/__init__.py', 'rate': 50.0, 'change': -50.0}]}
+        assert _get_coverage_changes(dynamo_items[:1]) == {}
+        assert _get_coverage_changes([dynamo_items[0], DYNAMO_ITEMS[1]]) == {}
+
+        dynamo_items[1]['coverage#files'] = b'corrupt'
+        assert _get_coverage_changes(dynamo_items) == {}
+
     def test_get_change_from_previous(self):
         assert _get_change_from_previous('pylint', DYNAMO_ITEMS) == -10
+        assert _get_change_from_previous('coverage', DYNAMO_ITEMS) == 'N/A - first build'
 
     @pytest.mark.parametrize('param_dict, state, score', [
         (TEST_PARAM_DICT_PYTEST_PASS, 'success', 1),
@@ -120,17 +775,139 @@ class TestGithubStatusPosting(object):
 
     def test_parse_quality_indicator_tests(self):
         assert _parse_quality_indicator_tests(TEST_PARAM_DICT_PYLINT) == 10.0
+        assert _parse_quality_indicator_tests(dict(TEST_PARAM_DICT_PYLINT, match='first')) == 10.0
         with pytest.raises(GeneralError):
             _parse_quality_indicator_tests(TEST_PARAM_DICT_MISSING_FILE)
 
+    @patch(
+        '{}._create_github_session'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value=(MagicMock(), GITHUB_URLS))
+    )
+    @patch(
+        '{}._drop_unchanged_statuses'.format(MODULE_UNDER_TEST),
+        new=MagicMock(side_effect=lambda payloads, *args: payloads)
+    )
+    @patch('{}._post_to_github_status'.format(MODULE_UNDER_TEST))
+    def test_post_github_payloads(self, mock_post):
+        payloads = [dict(GITHUB_PAYLOAD, context=context) for context in ['pylint', 'coverage']]
+        mock_post.return_value = MagicMock(ok=True, status_code=201)
+        assert _post_github_payloads(payloads, USER_CONFIG) == {'pylint': 201, 'coverage': 201}
+
+        mock_post.side_effect = [GeneralError('boom'), MagicMock(ok=True, status_code=201)]
+        with pytest.raises(GeneralError) as gen_err:
+            _post_github_payloads(payloads, USER_CONFIG)
+        assert mock_post.call_count == 4
+        assert "Failed to POST 1 of 2" in str(gen_err.value)
+
     @patch.dict(os.environ, {'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION})
-    @patch('{}.get_boto_client'.format(MODULE_UNDER_TEST), new=MagicMock())
+    @patch(
+        '{}.get_ssm_parameters'.format(MODULE_UNDER_TEST),
+        new=MagicMock(return_value={'github_owner': GITHUB_OWNER, 'github_token': GITHUB_TOKEN})
+    )
     @patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), APP_CONFIG)
-    @patch('{}.requests.post'.format(MODULE_UNDER_TEST))
-    def test_post_to_github_status(self, mock_requests):
-        _post_to_github_status(GITHUB_PAYLOAD, USER_CONFIG)
-        assert mock_requests.called
+    def test_create_github_session(self):
+        session, github_urls = _create_github_session(USER_CONFIG, 2)
+        assert github_urls == GITHUB_URLS
+        assert session.headers['Authorization'] == f"token {GITHUB_TOKEN}"
+        assert session.headers['Accept'] == 'application/vnd.github+json'
+        assert _create_github_session(USER_CONFIG, 2)[0] is session
+        assert _create_github_session(USER_CONFIG, 1)[0] is not session
 
-        mock_requests.side_effect = MissingSchema
+    @patch('{}.get_combined_status'.format(MODULE_UNDER_TEST))
+    def test_drop_unchanged_statuses(self, mock_combined_status):
+        payloads = [GITHUB_PAYLOAD, dict(GITHUB_PAYLOAD, context='coverage')]
+        mock_combined_status.return_value = {'pylint': GITHUB_PAYLOAD}
+        assert _drop_unchanged_statuses(
+            payloads, GITHUB_URLS['combined_status'], MagicMock(), None) == payloads[1:]
+        assert _drop_unchanged_statuses(payloads, None, MagicMock(), None) == payloads
+
+        mock_combined_status.side_effect = HTTPError
+        assert _drop_unchanged_statuses(
+            payloads, GITHUB_URLS['combined_status'], MagicMock(), None) == payloads
+
+    def test_post_to_github_status(self):
+        session = MagicMock()
+        session.request.return_value.status_code = 201
+        _post_to_github_status(GITHUB_PAYLOAD, GITHUB_STATUS_URL, session)
+        assert session.request.call_args[0] == ('POST', GITHUB_STATUS_URL)
+
+        session.request.side_effect = MissingSchema
         with pytest.raises(GeneralError):
-            _post_to_github_status(GITHUB_PAYLOAD, USER_CONFIG)
+            _post_to_github_status(GITHUB_PAYLOAD, GITHUB_STATUS_URL, session)
+
+    @patch.dict(os.environ, {'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION})
+    @patch('{}._create_github_session'.format(MODULE_UNDER_TEST))
+    def test_start_check_run(self, mock_session):
+        session = MagicMock()
+        session.request.return_value = MagicMock(
+            ok=True, status_code=201, json=lambda: {'url': GITHUB_CHECK_RUN_URL})
+        mock_session.return_value = (session, GITHUB_URLS)
+        assert _start_check_run(USER_CONFIG, CODE_BUILD_BUILD_URL) == GITHUB_CHECK_RUN_URL
+        assert session.request.call_args[0] == ('POST', GITHUB_URLS['check_runs'])
+        data = json.loads(session.request.call_args[1]['data'])
+        assert (data['name'], data['head_sha']) == ('py-dev-hammer', CODEBUILD_SOURCE_VERSION)
+
+    @pytest.mark.parametrize('rollup_window, dynamo_requests', [
+        (
+            APP_CONFIG['dynamo']['rollup_window'],
+            {'PutItem': 1, 'UpdateItem': 2, 'GetItem': 1, 'Query': 1},
+        ),
+        (None, {'PutItem': 1, 'UpdateItem': 1, 'Query': 1}),
+    ])
+    def test_execute_request_counts(self, rollup_window, dynamo_requests, tmp_path):
+        """
+        Reports a build and then a re-run of its commit against the local GitHub and DynamoDB
+        stand-ins, counting the requests each makes. The re-run posts nothing, as its statuses
+        are unchanged.
+        """
+        registry = build_test_registry({
+            'dynamic': {'pytest': APP_CONFIG['tests_to_run']['dynamic']['pytest']},
+            'static': {'pylint': APP_CONFIG['tests_to_run']['static']['pylint']},
+        })
+        write_junit_xml(str(tmp_path / registry['pytest'].input_file), 10)
+        write_pylint_output(str(tmp_path / registry['pylint'].input_file), 10)
+        resource = FakeDynamoResource(
+            APP_CONFIG['dynamo']['partition_key_name'], APP_CONFIG['dynamo']['sort_key_name'])
+        user_config = dict(USER_CONFIG, parsing={'executor': 'thread'})
+        real_time = time.time
+
+        with FakeGitHubServer() as github_server:
+            app_config = dict(
+                APP_CONFIG, dynamo=dict(APP_CONFIG['dynamo'], rollup_window=rollup_window),
+                github={
+                    'api_url': github_server.api_url,
+                    'combined_status_url': github_server.combined_status_url,
+                }
+            )
+            with patch('{}.APP_CONFIG'.format(MODULE_UNDER_TEST), app_config), \
+                    patch('{}.TEST_REGISTRY'.format(MODULE_UNDER_TEST), registry), \
+                    patch(
+                        '{}.connect_to_aws_resource'.format(MODULE_UNDER_TEST),
+                        return_value=resource
+                    ), \
+                    patch('{}.get_ssm_parameters'.format(MODULE_UNDER_TEST), return_value={
+                        'github_owner': GITHUB_OWNER, 'github_token': GITHUB_TOKEN}), \
+                    patch.dict(os.environ, {
+                        'CODEBUILD_GIT_BRANCH': CODEBUILD_GIT_BRANCH,
+                        'CODEBUILD_SOURCE_VERSION': CODEBUILD_SOURCE_VERSION,
+                    }):
+                test_parameters = [
+                    _create_test_parameters_dict(test_type, str(tmp_path))
+                    for test_type in registry
+                ]
+                requests = []
+                for offset in (0, 10):
+                    github_server.reset(keep_statuses=True)
+                    resource.request_counts.clear()
+                    with patch('time.time', side_effect=lambda offset=offset: (
+                            real_time() + offset)):
+                        _execute(user_config, test_parameters, CODE_BUILD_BUILD_URL)
+                    requests.append((
+                        [method for method, _, _ in github_server.requests],
+                        dict(resource.request_counts),
+                    ))
+
+        assert requests == [
+            (['GET', 'POST', 'POST'], dynamo_requests),
+            (['GET'], dynamo_requests),
+        ]
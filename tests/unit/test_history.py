@@ -0,0 +1,49 @@
+"""This unit tests utils.history."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import decimal
+import math
+
+from py_dev_hammer.utils.history import History
+from tests.data_factory import DYNAMO_ITEMS
+
+HISTORY_ITEMS = [
+    {'build_start_time': 4, 'pylint': decimal.Decimal('80'), 'radon_cc': decimal.Decimal('3')},
+    {'build_start_time': 1, 'pylint': decimal.Decimal('90')},
+    {'build_start_time': 3, 'pylint': decimal.Decimal('85'), 'radon_cc': decimal.Decimal('2')},
+    {'build_start_time': 2, 'pylint': decimal.Decimal('95'), 'radon_cc': decimal.Decimal('2')},
+]
+
+
+def _values(column):
+    return [None if math.isnan(value) else value for value in column]
+
+
+class TestHistory(object):
+
+    def test_from_items(self):
+        history = History.from_items(HISTORY_ITEMS, ['pylint', 'radon_cc'], 'build_start_time')
+        assert len(history) == 4
+        assert list(history.timestamps) == [1, 2, 3, 4]
+        assert list(history.column('pylint')) == [90, 95, 85, 80]
+        assert _values(history.column('radon_cc')) == [None, 2, 2, 3]
+        assert _values(history.column('coverage')) == [None] * 4
+
+        history = History.from_items(DYNAMO_ITEMS[::-1], ['pylint'])
+        assert list(history.timestamps) == [0, 1]
+        assert history.change_from_previous('pylint') == -10
+
+    def test_deltas(self):
+        history = History.from_items(HISTORY_ITEMS, ['pylint', 'radon_cc'], 'build_start_time')
+        assert _values(history.deltas('pylint')) == [None, 5, -10, -5]
+        assert _values(history.deltas('pylint', lag=2)) == [None, None, -5, -15]
+        assert _values(history.deltas('radon_cc')) == [None, None, 0, 1]
+        assert _values(History.from_items([], ['pylint']).deltas('pylint')) == []
+
+    def test_change_from_previous(self):
+        history = History.from_items(HISTORY_ITEMS, ['pylint', 'coverage'], 'build_start_time')
+        assert history.change_from_previous('pylint') == -5
+        assert history.change_from_previous('coverage') is None
+        assert History.from_items(HISTORY_ITEMS[:1], ['pylint']).change_from_previous(
+            'pylint') is None
@@ -0,0 +1,137 @@
+"""This unit tests utils.history_report."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import decimal
+import io
+import json
+from unittest.mock import patch, MagicMock
+
+from py_dev_hammer.utils.history_report import (
+    get_build_day, read_history, summarise_branches, get_columns, write_rows,
+    is_history_index_active, create_history_index,
+)
+from tests.data_factory import APP_CONFIG
+
+MODULE_UNDER_TEST = 'py_dev_hammer.utils.history_report'
+DYNAMO_CONFIG = APP_CONFIG['dynamo']
+ROWS = [
+    {'branch': 'master', 'build_start_time': 300, 'pylint': 90.0, 'pytest': None},
+    {'branch': 'feature', 'build_start_time': 200, 'pylint': 80.0, 'pytest': 100.0},
+    {'branch': 'master', 'build_start_time': 100, 'pylint': 95.0, 'pytest': 100.0},
+    {'branch': 'master', 'build_start_time': 200, 'pylint': 85.0, 'pytest': 100.0},
+]
+
+
+class TestHistoryReport(object):
+
+    def test_get_build_day(self):
+        assert get_build_day(0) == '1970-01-01'
+        assert get_build_day(1550000000) == '2019-02-12'
+
+    @patch('{}.scan_in_segments'.format(MODULE_UNDER_TEST))
+    def test_read_history_scan(self, mock_scan):
+        mock_scan.return_value = [
+            {'branch_name': 'master', 'build_start_time': decimal.Decimal('100'),
+             'pylint': decimal.Decimal('9.5')},
+            {'branch_name': 'release', 'build_start_time': decimal.Decimal('200')},
+        ]
+        assert list(read_history(MagicMock(), DYNAMO_CONFIG, ['pylint'], segments=4)) == [
+            {'branch': 'master', 'build_start_time': 100, 'pylint': 9.5},
+            {'branch': 'release', 'build_start_time': 200, 'pylint': None},
+        ]
+        _, table_name, segments, attributes, condition = mock_scan.call_args[0]
+        assert (table_name, segments) == (DYNAMO_CONFIG['table_name'], 4)
+        assert attributes == ['branch_name', 'build_start_time', 'pylint']
+        assert condition.get_expression()['operator'] == '>'
+
+        rows = read_history(
+            MagicMock(), DYNAMO_CONFIG, ['pylint'], since=150, branch_prefix='rel', use_index=False)
+        assert [row['branch'] for row in rows] == ['release']
+        condition = mock_scan.call_args[0][-1].get_expression()
+        assert condition['operator'] == 'AND'
+        assert condition['values'][0].get_expression()['values'][1] == 150
+
+    @patch('{}.time.time'.format(MODULE_UNDER_TEST), new=MagicMock(return_value=1550000000))
+    @patch('{}.query_in_parallel'.format(MODULE_UNDER_TEST))
+    def test_read_history_index(self, mock_query):
+        mock_query.return_value = [{'branch_name': 'master', 'build_start_time': 100}]
+        since = 1550000000 - 2.5 * 24 * 60 * 60
+        assert len(list(read_history(
+            MagicMock(), DYNAMO_CONFIG, ['pylint'], since=since, use_index=True))) == 1
+        key_conditions = mock_query.call_args[0][2]
+        assert len(key_conditions) == 3
+        day_condition, time_condition = key_conditions[0].get_expression()['values']
+        assert day_condition.get_expression()['values'][1] == get_build_day(since)
+        assert time_condition.get_expression()['values'][1] == int(since)
+        assert mock_query.call_args[1]['index_name'] == DYNAMO_CONFIG['history_index_name']
+
+    def test_summarise_branches(self):
+        assert summarise_branches(iter(ROWS), ['pylint', 'pytest'], 'build_start_time') == [
+            dict(ROWS[1], builds=1, pylint_change=0.0, pytest_change=0.0),
+            dict(ROWS[0], builds=3, pylint_change=-5.0, pytest_change=None),
+        ]
+
+    def test_write_rows(self):
+        columns = get_columns(['pylint'], 'build_start_time')
+        assert columns == ['branch', 'build_start_time', 'pylint']
+        output = io.StringIO()
+        assert write_rows(iter(ROWS[:2]), output, 'csv', columns) == 2
+        assert output.getvalue().splitlines() == [
+            'branch,build_start_time,pylint', 'master,300,90.0', 'feature,200,80.0']
+
+        columns = get_columns(['pylint'], 'build_start_time', summarised=True)
+        assert columns[-2:] == ['builds', 'pylint_change']
+        output = io.StringIO()
+        assert write_rows(iter(ROWS[:1]), output, 'json', columns) == 1
+        assert json.loads(output.getvalue()) == {
+            'branch': 'master', 'build_start_time': 300, 'pylint': 90.0, 'builds': None,
+            'pylint_change': None,
+        }
+        assert write_rows(iter([]), io.StringIO(), 'json', columns) == 0
+
+    def test_is_history_index_active(self):
+        client = MagicMock()
+        index = {'IndexName': DYNAMO_CONFIG['history_index_name'], 'IndexStatus': 'CREATING'}
+        client.describe_table.return_value = {'Table': {'GlobalSecondaryIndexes': [index]}}
+        assert not is_history_index_active(client, DYNAMO_CONFIG)
+        index['IndexStatus'] = 'ACTIVE'
+        assert is_history_index_active(client, DYNAMO_CONFIG)
+        client.describe_table.return_value = {'Table': {}}
+        assert not is_history_index_active(client, DYNAMO_CONFIG)
+
+    @patch('{}.batch_put_with_partition_and_sort_key'.format(MODULE_UNDER_TEST))
+    @patch('{}.scan_in_segments'.format(MODULE_UNDER_TEST))
+    def test_create_history_index(self, mock_scan, mock_put):
+        client = MagicMock()
+        client.describe_table.return_value = {'Table': {
+            'BillingModeSummary': {'BillingMode': 'PROVISIONED'},
+            'ProvisionedThroughput': {
+                'ReadCapacityUnits': 5, 'WriteCapacityUnits': 2, 'NumberOfDecreasesToday': 0},
+        }}
+        mock_scan.return_value = iter([
+            {'branch_name': 'master', 'build_start_time': decimal.Decimal(index), 'pylint': 9}
+            for index in range(30)
+        ])
+        assert create_history_index(client, MagicMock(), DYNAMO_CONFIG) == 30
+
+        create = client.update_table.call_args[1]['GlobalSecondaryIndexUpdates'][0]['Create']
+        assert create['IndexName'] == DYNAMO_CONFIG['history_index_name']
+        assert [key['AttributeName'] for key in create['KeySchema']] == [
+            'build_day', 'build_start_time']
+        assert create['ProvisionedThroughput'] == {
+            'ReadCapacityUnits': 5, 'WriteCapacityUnits': 2}
+        assert [len(call[0][2]) for call in mock_put.call_args_list] == [25, 5]
+        key, item = mock_put.call_args[0][2][0]
+        assert key['partition_key_value'] == 'master'
+        assert item == {
+            'branch_name': 'master', 'build_start_time': 25, 'pylint': 9,
+            'build_day': '1970-01-01',
+        }
+
+        client.reset_mock()
+        client.describe_table.return_value = {'Table': {
+            'GlobalSecondaryIndexes': [{'IndexName': DYNAMO_CONFIG['history_index_name']}]}}
+        mock_scan.return_value = iter([])
+        assert create_history_index(client, MagicMock(), DYNAMO_CONFIG) == 0
+        assert not client.update_table.called
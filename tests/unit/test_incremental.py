@@ -0,0 +1,77 @@
+"""This unit tests utils.incremental."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import os
+
+from py_dev_hammer.utils.incremental import (
+    ResultCache, aggregate, hash_files, parse_file_results,
+)
+from tests.data_factory import TEST_REGISTRY
+
+RADON_INCREMENTAL = TEST_REGISTRY['radon_cc'].incremental
+
+
+class TestIncremental(object):
+
+    def test_hash_files(self, tmp_path):
+        (tmp_path / 'package').mkdir()
+        (tmp_path / 'package' / 'one.py').write_text('one')
+        (tmp_path / 'package' / 'notes.txt').write_text('notes')
+        (tmp_path / 'two.py').write_text('two')
+
+        content_hashes = hash_files(
+            [str(tmp_path / 'package'), str(tmp_path / 'two.py')], '.py')
+        assert list(content_hashes) == [
+            str(tmp_path / 'package' / 'one.py'), str(tmp_path / 'two.py')]
+
+        (tmp_path / 'two.py').write_text('three')
+        assert hash_files([str(tmp_path)], '.py') != content_hashes
+
+    def test_parse_file_results(self):
+        lines = [
+            'package/one.py\n', '    F 1:0 first - A (2)\n', '    M 4:4 Cls.second - A (4)\n',
+            'package/two.py\n', "ERROR: couldn't parse\n",
+        ]
+        file_results = parse_file_results(
+            lines, RADON_INCREMENTAL['file_regex'],
+            ['package/one.py', 'package/two.py', 'package/three.py']
+        )
+        assert file_results == {
+            'package/one.py': {'sum': 6.0, 'count': 2},
+            'package/two.py': {'sum': 0.0, 'count': 0},
+            'package/three.py': {'sum': 0.0, 'count': 0},
+        }
+
+        file_results = parse_file_results(
+            [os.path.abspath('package/one.py') + ':E1:bad\n'], r'^(?P<file>[^:]+):',
+            ['package/one.py']
+        )
+        assert file_results['package/one.py']['count'] == 1
+
+    def test_aggregate(self):
+        file_results = [{'sum': 6.0, 'count': 2}, {'sum': 3.0, 'count': 1}]
+        assert aggregate(file_results, 'sum') == 9.0
+        assert aggregate(file_results, 'mean') == 3.0
+        assert aggregate(file_results, 'count') == 3.0
+        assert aggregate([], 'mean') is None
+
+    def test_result_cache(self, tmp_path):
+        cache = ResultCache('radon_cc', RADON_INCREMENTAL, str(tmp_path), max_entries=2)
+        cache.put('one.py', 'aaa', {'sum': 1.0, 'count': 1})
+        cache.put('two.py', 'bbb', {'sum': 2.0, 'count': 1})
+        cache.save()
+
+        cache = ResultCache('radon_cc', RADON_INCREMENTAL, str(tmp_path), max_entries=2)
+        assert cache.get('one.py', 'aaa') == {'sum': 1.0, 'count': 1}
+        assert cache.get('one.py', 'changed') is None
+        cache.put('three.py', 'ccc', {'sum': 3.0, 'count': 1})
+        cache.save()
+
+        cache = ResultCache('radon_cc', RADON_INCREMENTAL, str(tmp_path), max_entries=2)
+        assert cache.get('two.py', 'bbb') is None
+        assert cache.get('one.py', 'aaa') is not None
+        assert cache.get('three.py', 'ccc') is not None
+
+        other_config = dict(RADON_INCREMENTAL, aggregate='sum')
+        assert ResultCache('radon_cc', other_config, str(tmp_path)).get('one.py', 'aaa') is None
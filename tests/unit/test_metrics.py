@@ -0,0 +1,68 @@
+"""This unit tests utils.metrics."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import json
+import os
+import pstats
+
+import pytest
+
+from py_dev_hammer.utils.metrics import Metrics, start_profiling, stop_profiling
+
+
+class TestMetrics(object):
+
+    def test_span_disabled(self):
+        metrics = Metrics()
+        with metrics.span('stage.parse') as span:
+            span.add('bytes', 10)
+            span.set('status_code', 201)
+        metrics.record('parse.pylint', 0.5)
+        assert metrics.spans == []
+        assert metrics.span('a') is metrics.span('b')
+
+    def test_span(self):
+        metrics = Metrics()
+        metrics.enable()
+        with metrics.span('github.POST', context='pylint') as span:
+            span.add('bytes', 10)
+            span.add('retries')
+            span.add('retries')
+        with pytest.raises(ValueError):
+            with metrics.span('github.POST'):
+                raise ValueError()
+        metrics.record('parse.pylint', 0.5, bytes=100)
+
+        first, second, recorded = metrics.spans
+        assert first['attributes'] == {'context': 'pylint', 'bytes': 10, 'retries': 2}
+        assert first['start'] >= 0
+        assert second['attributes'] == {'error': 'ValueError'}
+        assert recorded == {
+            'name': 'parse.pylint', 'start': None, 'seconds': 0.5, 'attributes': {'bytes': 100}}
+
+        summary = metrics.report()['summary']
+        assert summary['github.POST']['count'] == 2
+        assert summary['github.POST']['retries'] == 2
+        assert summary['parse.pylint']['bytes'] == 100
+
+    def test_write_report(self, tmp_path):
+        metrics = Metrics()
+        metrics.enable()
+        with metrics.span('stage.dynamodb'):
+            pass
+        report_file = str(tmp_path / 'metrics.json')
+        metrics.write_report(report_file)
+        with open(report_file) as report_str:
+            report = json.load(report_str)
+        assert report['summary']['stage.dynamodb']['count'] == 1
+        assert report['total_seconds'] >= report['spans'][0]['seconds']
+
+    def test_profiling(self, tmp_path):
+        profiler = start_profiling()
+        sorted(range(1000), reverse=True)
+        stats_file, memory_file = stop_profiling(profiler, str(tmp_path / 'profile'))
+        assert pstats.Stats(stats_file).total_calls > 0
+        with open(memory_file) as memory_str:
+            assert memory_str.readline().startswith('Peak traced memory')
+        assert os.path.dirname(stats_file) == str(tmp_path / 'profile')
@@ -0,0 +1,105 @@
+"""This unit tests utils.parsers."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import os
+from xml.etree.ElementTree import ParseError
+
+import pytest
+
+from py_dev_hammer.utils.parsers import (
+    parse_junit_xml, parse_junit_with_regex, find_last_match, find_first_match, match_lines,
+    parse_cobertura_xml,
+)
+from tests import TEST_RESOURCES_DIR
+from tests.data_factory import (
+    TEST_PARAM_DICT_PYTEST_FAIL, TEST_PARAM_DICT_PYLINT, JUNIT_XML_MULTIPLE_SUITES,
+    JUNIT_XML_TOTALS_ROOT, TEST_PARAM_DICT_COBERTURA, COBERTURA_FILES,
+)
+
+
+class TestParsers(object):
+
+    def test_parse_junit_xml_single_suite(self):
+        results = parse_junit_xml(os.path.join(TEST_RESOURCES_DIR, 'pytest_fail.xml'))
+        assert results['totals'] == {'errors': 0, 'failures': 1, 'skips': 0, 'tests': 8}
+        assert results['suites'] == [{'name': 'pytest', 'tests': 8, 'time': 1.131}]
+
+    def test_parse_junit_xml_multiple_suites(self, tmp_path):
+        input_file = tmp_path / 'pytest.xml'
+        input_file.write_text(JUNIT_XML_MULTIPLE_SUITES)
+        results = parse_junit_xml(str(input_file))
+        assert results['totals'] == {'errors': 1, 'failures': 2, 'skips': 3, 'tests': 10}
+        assert [suite['name'] for suite in results['suites']] == ['unit', 'functional']
+        assert results['suites'][1]['time'] == 2.5
+
+    def test_parse_junit_xml_totals_root(self, tmp_path):
+        input_file = tmp_path / 'pytest.xml'
+        input_file.write_text(JUNIT_XML_TOTALS_ROOT)
+        results = parse_junit_xml(str(input_file))
+        assert results == {
+            'totals': {'errors': 0, 'failures': 1, 'skips': 0, 'tests': 4}, 'suites': []}
+        results = parse_junit_xml(str(input_file), suite_timings=True)
+        assert results['totals'] == {'errors': 0, 'failures': 1, 'skips': 0, 'tests': 4}
+        assert len(results['suites']) == 2
+
+    def test_parse_junit_xml_errors(self, tmp_path):
+        input_file = tmp_path / 'pytest.xml'
+        input_file.write_text('<testcase name="no suite"/>')
+        with pytest.raises(ParseError):
+            parse_junit_xml(str(input_file))
+        input_file.write_text('not xml')
+        with pytest.raises(ParseError):
+            parse_junit_xml(str(input_file))
+
+    def test_parse_junit_with_regex(self):
+        results = parse_junit_with_regex(
+            TEST_PARAM_DICT_PYTEST_FAIL['input_file'], TEST_PARAM_DICT_PYTEST_FAIL['regex_pattern'])
+        assert results['totals'] == {'errors': 0, 'failures': 1, 'skips': 0, 'tests': 8}
+        with pytest.raises(ParseError):
+            parse_junit_with_regex(TEST_PARAM_DICT_PYTEST_FAIL['input_file'], 'nope')
+
+    def test_find_last_match(self, tmp_path):
+        line_parse = find_last_match(
+            TEST_PARAM_DICT_PYLINT['input_file'], TEST_PARAM_DICT_PYLINT['regex_pattern'])
+        assert line_parse.group(1) == '10.00'
+
+        input_file = tmp_path / 'radon_cc.static'
+        input_file.write_text('total lines: 1\nnoise\ntotal lines: 2\nnoise\n\n')
+        assert find_last_match(str(input_file), r'total lines: (\d+)').group(1) == '2'
+        assert find_last_match(str(input_file), r'nothing here (\d+)') is None
+        input_file.write_text('total lines: 3')
+        assert find_last_match(str(input_file), r'total lines: (\d+)$').group(1) == '3'
+        input_file.write_text('')
+        assert find_last_match(str(input_file), r'total lines: (\d+)') is None
+
+    def test_find_first_match(self, tmp_path):
+        input_file = tmp_path / 'radon_cc.static'
+        input_file.write_text('total lines: 1\nnoise\ntotal lines: 2\n')
+        assert find_first_match(str(input_file), r'total lines: (\d+)$').group(1) == '1'
+        assert find_first_match(str(input_file), r'nothing here (\d+)') is None
+
+    def test_match_lines(self):
+        lines = iter(['total lines: 1\n', 'rated at 9.50/10\n', 'total lines: 2\n'])
+        line_parses = match_lines(lines, {
+            'first': (r'total lines: (\d+)$', 'first'),
+            'last': (r'total lines: (\d+)$', 'last'),
+            'pylint': (TEST_PARAM_DICT_PYLINT['regex_pattern'], 'last'),
+            'missing': (r'nothing here (\d+)', 'last'),
+        })
+        assert line_parses['first'].group(1) == '1'
+        assert line_parses['last'].group(1) == '2'
+        assert line_parses['pylint'].group(1) == '9.50'
+        assert line_parses['missing'] is None
+        assert next(lines, None) is None
+
+    def test_parse_cobertura_xml(self, tmp_path):
+        assert parse_cobertura_xml(TEST_PARAM_DICT_COBERTURA['input_file']) == COBERTURA_FILES
+
+        input_file = tmp_path / 'coverage.xml'
+        input_file.write_text('<coverage><packages/></coverage>')
+        assert parse_cobertura_xml(str(input_file)) == {}
+
+        input_file.write_text('<coverage><packages>')
+        with pytest.raises(ParseError):
+            parse_cobertura_xml(str(input_file))
@@ -0,0 +1,106 @@
+"""This unit tests utils.registry."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import os
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.registry import build_test_registry, load_app_config, load_test_registry
+from tests import TEST_RESOURCES_DIR
+from tests.data_factory import APP_CONFIG, TEST_REGISTRY
+
+APP_CONFIG_FILE = os.path.join(TEST_RESOURCES_DIR, 'app_config_test.yml')
+
+
+class TestRegistry(object):
+
+    def test_build_test_registry(self):
+        assert list(TEST_REGISTRY) == [
+            'pytest', 'pylint', 'coverage', 'radon_cc', 'line_counter']
+        assert TEST_REGISTRY['pytest'].dynamic
+        assert not TEST_REGISTRY['pylint'].dynamic
+        assert TEST_REGISTRY['pylint'].regex.match('rated at 9.50/10').group(1) == '9.50'
+        assert TEST_REGISTRY['pylint'].match == 'last'
+        assert TEST_REGISTRY['pylint'].better == 'higher'
+        assert TEST_REGISTRY['radon_cc'].better == 'lower'
+        assert TEST_REGISTRY['pytest'].stdout_file == 'pytest.static'
+        assert TEST_REGISTRY['pylint'].stdout_file == 'pylint.static'
+        assert TEST_REGISTRY['coverage'].command is None
+        assert TEST_REGISTRY['coverage'].stdout_file is None
+        assert TEST_REGISTRY['coverage'].format == 'cobertura'
+        assert TEST_REGISTRY['coverage'].regex is None
+        assert TEST_REGISTRY['line_counter'].incremental['aggregate'] == 'sum'
+        assert TEST_REGISTRY['radon_cc'].incremental['suffix'] == '.py'
+        with pytest.raises(TypeError):
+            TEST_REGISTRY['pylint'] = None
+
+    @pytest.mark.parametrize('tests_to_run', [
+        {'dynamic': {'pylint': APP_CONFIG['tests_to_run']['static']['pylint']},
+         'static': {'pylint': APP_CONFIG['tests_to_run']['static']['pylint']}},
+        {'static': {'pylint': {'input_file': 'pylint.static'}}},
+        {'static': {'pylint': dict(APP_CONFIG['tests_to_run']['static']['pylint'], match='all')}},
+        {'static': {'pylint': dict(
+            APP_CONFIG['tests_to_run']['static']['pylint'], better='sideways')}},
+        {'static': {'pylint': dict(
+            APP_CONFIG['tests_to_run']['static']['pylint'], regex_pattern='(unclosed')}},
+        {'static': {'pylint': dict(
+            APP_CONFIG['tests_to_run']['static']['pylint'], command=['pylint', 'src'])}},
+        {'static': {'pylint': dict(APP_CONFIG['tests_to_run']['static']['pylint'], format='xml')}},
+        {'dynamic': {'pytest': dict(
+            APP_CONFIG['tests_to_run']['dynamic']['pytest'], format='cobertura')}},
+        {'static': {'coverage': dict(
+            APP_CONFIG['tests_to_run']['static']['coverage'],
+            incremental=APP_CONFIG['tests_to_run']['static']['line_counter']['incremental'])}},
+        {'dynamic': {'pytest': dict(
+            APP_CONFIG['tests_to_run']['dynamic']['pytest'],
+            incremental=APP_CONFIG['tests_to_run']['static']['line_counter']['incremental'])}},
+        {'static': {'line_counter': dict(
+            APP_CONFIG['tests_to_run']['static']['line_counter'], incremental={'paths': ['src']})}},
+        {'static': {'line_counter': dict(
+            APP_CONFIG['tests_to_run']['static']['line_counter'], incremental=dict(
+                APP_CONFIG['tests_to_run']['static']['line_counter']['incremental'],
+                aggregate='median'))}},
+        {'static': {'line_counter': dict(
+            APP_CONFIG['tests_to_run']['static']['line_counter'], incremental=dict(
+                APP_CONFIG['tests_to_run']['static']['line_counter']['incremental'],
+                file_regex=r'(?P<value>\d+)'))}},
+        {'static': {'line_counter': dict(
+            APP_CONFIG['tests_to_run']['static']['line_counter'], incremental=dict(
+                APP_CONFIG['tests_to_run']['static']['line_counter']['incremental'],
+                exit_statuses=['1']))}},
+    ])
+    def test_build_test_registry_invalid(self, tests_to_run):
+        with pytest.raises(GeneralError):
+            build_test_registry(tests_to_run)
+
+    def test_load_test_registry(self, tmp_path):
+        registry = load_test_registry(APP_CONFIG_FILE, cache_dir=str(tmp_path))
+        assert dict(registry) == dict(TEST_REGISTRY)
+        assert len(os.listdir(str(tmp_path))) == 1
+
+        with patch('yaml.safe_load') as mock_load:
+            assert dict(load_test_registry(APP_CONFIG_FILE, cache_dir=str(tmp_path))) == dict(
+                TEST_REGISTRY)
+        assert not mock_load.called
+
+    def test_load_app_config(self, tmp_path):
+        cache_dir = str(tmp_path / 'cache')
+        with patch('yaml.safe_load', wraps=yaml.safe_load) as mock_load:
+            assert load_app_config(APP_CONFIG_FILE, cache_dir=cache_dir) == APP_CONFIG
+            assert dict(load_test_registry(APP_CONFIG_FILE, cache_dir=cache_dir)) == dict(
+                TEST_REGISTRY)
+            assert load_app_config(APP_CONFIG_FILE, cache_dir=cache_dir) == APP_CONFIG
+        assert mock_load.call_count == 1
+
+        config_file = str(tmp_path / 'app_config.yml')
+        with open(config_file, 'w') as config_str:
+            yaml.safe_dump(dict(APP_CONFIG, retries={1: 'one'}), config_str)
+        load_app_config(config_file, cache_dir=cache_dir)
+        assert len(os.listdir(cache_dir)) == 1
+
+        with pytest.raises(GeneralError):
+            load_app_config(str(tmp_path / 'canny_find_it_captain.yml'), cache_dir=cache_dir)
@@ -0,0 +1,45 @@
+"""This unit tests utils.rollups."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import decimal
+
+from py_dev_hammer.utils.rollups import get_rollup_key, get_trend, roll_up
+from tests.data_factory import CODEBUILD_GIT_BRANCH, PARTITION_AND_SORT_KEY, ROLLUP_METRICS
+
+
+class TestRollups(object):
+
+    def test_get_rollup_key(self):
+        rollup_key = get_rollup_key(PARTITION_AND_SORT_KEY)
+        assert rollup_key['partition_key_value'] == f'{CODEBUILD_GIT_BRANCH}#rollup'
+        assert rollup_key['sort_key_value'] == 0
+        assert rollup_key['sort_key_name'] == PARTITION_AND_SORT_KEY['sort_key_name']
+
+    def test_roll_up(self):
+        metrics = roll_up(ROLLUP_METRICS, {'pylint': decimal.Decimal('80')}, set(), 2)
+        assert metrics['pylint'] == {
+            'last': decimal.Decimal('80'),
+            'best': decimal.Decimal('100'),
+            'streak': 2,
+            'window': [decimal.Decimal('90'), decimal.Decimal('80')],
+        }
+        assert ROLLUP_METRICS['pylint']['last'] == decimal.Decimal('90')
+
+        metrics = roll_up(ROLLUP_METRICS, {'pylint': decimal.Decimal('80')}, {'pylint'}, 20)
+        assert metrics['pylint']['best'] == decimal.Decimal('80')
+        assert metrics['pylint']['streak'] == 0
+        assert len(metrics['pylint']['window']) == 3
+
+        metrics = roll_up({}, {'coverage': decimal.Decimal('75')}, set(), 20)
+        assert metrics['coverage']['streak'] == 0
+        assert metrics['coverage']['window'] == [decimal.Decimal('75')]
+
+    def test_get_trend(self):
+        assert get_trend(ROLLUP_METRICS, 'pylint') == {
+            'mean': decimal.Decimal('95'),
+            'window': 2,
+            'best': decimal.Decimal('100'),
+            'streak': 1,
+        }
+        assert get_trend(ROLLUP_METRICS, 'coverage') is None
@@ -0,0 +1,27 @@
+"""This unit tests utils.runner."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import pytest
+
+from py_dev_hammer.utils.errors import GeneralError
+from py_dev_hammer.utils.runner import run_command
+
+
+class TestRunner(object):
+
+    def test_run_command(self, tmp_path):
+        tee_file = tmp_path / 'output.static'
+        first_line, exit_status = run_command(
+            'printf "one\\ntwo\\nthree\\n"; exit 3', next, tee_file=str(tee_file))
+        assert first_line == 'one\n'
+        assert exit_status == 3
+        assert tee_file.read_text() == 'one\ntwo\nthree\n'
+
+        lines, exit_status = run_command('echo one', list)
+        assert lines == ['one\n']
+        assert exit_status == 0
+
+    def test_run_command_not_found(self):
+        with pytest.raises(GeneralError):
+            run_command('canny_find_it_captain', list)
@@ -0,0 +1,110 @@
+"""This unit tests utils.spool."""
+
+# pylint: disable=missing-docstring, no-self-use, invalid-name
+
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from py_dev_hammer.utils.spool import Spool
+
+MODULE_UNDER_TEST = 'py_dev_hammer.utils.spool'
+
+
+class TestSpool(object):
+
+    def test_append_and_pending(self, tmp_path):
+        spool = Spool(str(tmp_path / 'spool'))
+        first_id = spool.append({'score': 1})
+        spool.append({'score': 2, 'id': 'second'})
+
+        pending = list(spool.pending())
+        assert [entry['score'] for _, entry in pending] == [1, 2]
+        assert pending[0][1]['id'] == first_id
+        assert pending[1][1]['id'] == 'second'
+        assert pending[-1][0] == os.path.getsize(spool.journal_file)
+
+    def test_commit(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        spool.append({'score': 1, 'id': 'first'})
+        spool.append({'score': 2, 'id': 'second'})
+
+        offset, entry = next(spool.pending())
+        spool.commit(offset, entry['id'])
+        assert [entry['id'] for _, entry in spool.pending()] == ['second']
+        assert Spool(str(tmp_path)).read_checkpoint()['flushed_ids'] == ['first']
+
+    def test_pending_skips_torn_and_unreadable_lines(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        spool.append({'score': 1})
+        with open(spool.journal_file, 'a') as journal:
+            journal.write('{"score": \n{"score": 3')
+
+        assert [entry['score'] for _, entry in spool.pending()] == [1]
+        spool.append({'score': 4})
+        assert [entry['score'] for _, entry in spool.pending()] == [1, 4]
+
+    def test_compact(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        spool.append({'score': 1})
+        assert not spool.compact()
+
+        for offset, entry in spool.pending():
+            spool.commit(offset, entry['id'])
+        assert spool.compact()
+        assert not os.path.exists(spool.journal_file)
+        assert spool.read_checkpoint()['offset'] == 0
+
+        spool.append({'score': 2})
+        assert [entry['score'] for _, entry in spool.pending()] == [2]
+
+    @pytest.mark.parametrize('crash_at', ['_write_checkpoint', 'remove'])
+    def test_compact_crash(self, crash_at, tmp_path):
+        spool = Spool(str(tmp_path))
+        spool.append({'score': 1, 'id': 'first'})
+        for offset, entry in spool.pending():
+            spool.commit(offset, entry['id'])
+
+        target = f'{MODULE_UNDER_TEST}.Spool._write_checkpoint'
+        if crash_at == 'remove':
+            target = f'{MODULE_UNDER_TEST}.os.remove'
+        with patch(target, side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                spool.compact()
+
+        spool = Spool(str(tmp_path))
+        spool.append({'score': 2, 'id': 'second'})
+        assert [entry['id'] for _, entry in spool.pending()] == ['second']
+        for offset, entry in spool.pending():
+            spool.commit(offset, entry['id'])
+        assert spool.compact()
+        assert sorted(os.listdir(str(tmp_path))) == ['checkpoint.json', 'journal.lock']
+
+    def test_append_waits_for_compact(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        appended = threading.Event()
+        with spool._lock_journal(exclusive=True):  # pylint: disable=protected-access
+            appender = threading.Thread(
+                target=lambda: appended.set() if spool.append({'score': 1}) else None)
+            appender.start()
+            assert not appended.wait(0.1)
+        appender.join(5)
+        assert appended.is_set()
+        assert [entry['score'] for _, entry in spool.pending()] == [1]
+
+    def test_read_checkpoint_unreadable(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        with open(spool.checkpoint_file, 'w') as checkpoint:
+            checkpoint.write('not json')
+        assert spool.read_checkpoint() == {'generation': 0, 'offset': 0, 'flushed_ids': []}
+
+    def test_lock(self, tmp_path):
+        spool = Spool(str(tmp_path))
+        with spool.lock() as locked:
+            assert locked
+            with Spool(str(tmp_path)).lock() as locked_again:
+                assert not locked_again
+        with spool.lock() as locked:
+            assert locked